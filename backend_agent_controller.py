@@ -1,57 +1,118 @@
 import asyncio
 import json
+import logging
 import time
-from datetime import datetime
+from collections import deque
 
-# Global state for agent management
+from utils.chat_store import get_chat_store
+
+logger = logging.getLogger(__name__)
+
+# Global state for agent management; logs holds (time, level, msg, args)
+# and is only formatted when the frontend asks for it
 agent_state = {
     "running": False,
-    "logs": [],
+    "logs": deque(maxlen=100),
     "last_activity": None
 }
 
+
+def record_event(level, msg, *args, **fields):
+    """Keep an event for the log view and hand it to the logging pipeline"""
+    now = time.time()
+    agent_state["logs"].append((now, level, msg, args))
+    agent_state["last_activity"] = now
+    logger.log(level, msg, *args, extra=fields)
+
+
+def format_time(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+
 def handle_chat(data):
     """Handle chat requests from the frontend"""
     try:
         user_input = data.get("input", "")
         if not user_input:
             return {"output": "Please provide a message.", "error": True}
+        session_id = data.get("session_id") or "default"
+        store = get_chat_store()
+        user_message = store.append(session_id, "user", user_input)
         
         # Simulate processing time
         time.sleep(1)
         
         # Simple echo response for testing
         response = f"Echo: {user_input}"
+        agent_message = store.append(session_id, "agent", response)
         
         # Add to logs
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        agent_state["logs"].append(f"[{timestamp}] Chat: User said '{user_input}', Agent responded '{response}'")
-        agent_state["last_activity"] = timestamp
+        record_event(logging.INFO, "Chat: User said '%s', Agent responded '%s'", user_input, response, session_id=session_id)
         
-        return {"output": response, "error": False}
+        return {
+            "output": response,
+            "error": False,
+            "session_id": session_id,
+            "message_ids": [user_message["id"], agent_message["id"]],
+        }
         
     except Exception as e:
         error_msg = f"Error processing chat: {str(e)}"
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        agent_state["logs"].append(f"[{timestamp}] ERROR: {error_msg}")
+        record_event(logging.ERROR, "%s", error_msg)
         return {"output": error_msg, "error": True}
 
 
+async def generate_reply(user_input):
+    """Produce the agent's reply as ("token", text) and ("step", info) events"""
+    # Simple echo response for testing, streamed word by word
+    words = f"Echo: {user_input}".split(" ")
+    for i, word in enumerate(words):
+        await asyncio.sleep(0.05)
+        yield "token", word if i == 0 else " " + word
+
+
+async def stream_chat(data):
+    """Stream a chat reply as (event, data) pairs for Server-Sent Events"""
+    user_input = (data or {}).get("input", "")
+    if not user_input:
+        yield "error", {"message": "Please provide a message."}
+        return
+    session_id = data.get("session_id") or "default"
+    store = get_chat_store()
+    user_message = store.append(session_id, "user", user_input)
+    yield "start", {"session_id": session_id, "message_id": user_message["id"]}
+
+    chunks = []
+    status = "cancelled"
+    try:
+        async for event, payload in generate_reply(user_input):
+            if event == "token":
+                chunks.append(payload)
+            yield event, payload
+        status = "done"
+    except Exception as e:
+        status = "error"
+        yield "error", {"message": f"Error processing chat: {str(e)}"}
+    finally:
+        # Runs on client disconnect too, so partial replies are kept
+        response = "".join(chunks)
+        agent_message = store.append(session_id, "agent", response)
+        record_event(logging.INFO, "Chat (%s): User said '%s', Agent responded '%s'", status, user_input, response, session_id=session_id, status=status)
+    yield "done", {"output": response, "message_id": agent_message["id"]}
+
+
 def handle_agent(data):
     """Handle agent control requests (start/stop)"""
     try:
         action = data.get("action", "")
         agent_type = data.get("agent_type", "default")
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         if action == "start":
             if agent_state["running"]:
                 return {"status": "error", "message": "Agent is already running"}
             
             agent_state["running"] = True
-            agent_state["last_activity"] = timestamp
-            log_msg = f"[{timestamp}] Agent '{agent_type}' started successfully"
-            agent_state["logs"].append(log_msg)
+            record_event(logging.INFO, "Agent '%s' started successfully", agent_type, agent_type=agent_type)
             
             return {"status": "success", "message": f"Agent '{agent_type}' started"}
             
@@ -60,9 +121,7 @@ def handle_agent(data):
                 return {"status": "error", "message": "Agent is not running"}
             
             agent_state["running"] = False
-            agent_state["last_activity"] = timestamp
-            log_msg = f"[{timestamp}] Agent stopped"
-            agent_state["logs"].append(log_msg)
+            record_event(logging.INFO, "Agent stopped")
             
             return {"status": "success", "message": "Agent stopped"}
             
@@ -71,8 +130,7 @@ def handle_agent(data):
             
     except Exception as e:
         error_msg = f"Error handling agent request: {str(e)}"
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        agent_state["logs"].append(f"[{timestamp}] ERROR: {error_msg}")
+        record_event(logging.ERROR, "%s", error_msg)
         return {"status": "error", "message": error_msg}
 
 
@@ -80,24 +138,24 @@ def get_logs():
     """Get agent logs for the frontend"""
     try:
         # Add system info to logs
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         status = "RUNNING" if agent_state["running"] else "STOPPED"
+        last_activity = agent_state["last_activity"]
         
         system_info = [
             f"=== OpenManus Agent System ===",
-            f"Current Time: {timestamp}",
+            f"Current Time: {format_time(time.time())}",
             f"Agent Status: {status}",
-            f"Last Activity: {agent_state['last_activity'] or 'None'}",
+            f"Last Activity: {format_time(last_activity) if last_activity else 'None'}",
             f"Total Log Entries: {len(agent_state['logs'])}",
             "=" * 30
         ]
         
-        # Combine system info with actual logs
-        all_logs = system_info + agent_state["logs"]
-        
-        # Keep only last 100 log entries to prevent memory issues
-        if len(agent_state["logs"]) > 100:
-            agent_state["logs"] = agent_state["logs"][-100:]
+        # Combine system info with actual logs (the deque keeps the last 100)
+        entries = [
+            f"[{format_time(ts)}] {'ERROR: ' if level >= logging.ERROR else ''}{msg % args if args else msg}"
+            for ts, level, msg, args in list(agent_state["logs"])
+        ]
+        all_logs = system_info + entries
         
         return {"logs": all_logs, "status": "success"}
         
@@ -106,16 +164,31 @@ def get_logs():
         return {"logs": [error_msg], "status": "error"}
 
 
+def get_chat_history(session_id, before=None, limit=50):
+    """Get one page of a chat session, oldest message first"""
+    try:
+        before = int(before) if before not in (None, "") else None
+        limit = int(limit) if limit not in (None, "") else 50
+    except ValueError:
+        return {"status": "error", "message": "before and limit must be integers"}
+    page = get_chat_store().history(session_id or "default", before, limit)
+    page["status"] = "success"
+    return page
+
+
+def clear_chat_history(session_id):
+    """Delete all stored messages of a chat session"""
+    deleted = get_chat_store().clear(session_id or "default")
+    return {"status": "success", "deleted": deleted}
+
+
 # Initialize with some sample logs
 def initialize_logs():
     """Initialize the system with some sample logs"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    agent_state["logs"] = [
-        f"[{timestamp}] System initialized",
-        f"[{timestamp}] Backend API ready",
-        f"[{timestamp}] Waiting for commands..."
-    ]
-    agent_state["last_activity"] = timestamp
+    agent_state["logs"].clear()
+    record_event(logging.INFO, "System initialized")
+    record_event(logging.INFO, "Backend API ready")
+    record_event(logging.INFO, "Waiting for commands...")
 
 # Initialize on module load
 initialize_logs()
@@ -1,12 +1,39 @@
+import os
+
 from flask import Flask
 
 try:
-    from app.backend.routes import register_routes
+    from app.backend.routes import register_asgi_routes, register_routes
 except ImportError:
-    from backend_routes_Version2 import register_routes
+    from backend_routes_Version2 import register_asgi_routes, register_routes
+
+from utils.asgi_server import RequestTimeoutMiddleware, request_timeout_from_env
+from utils.log_pipeline import configure_logging
+from utils.tracing import configure_tracing
+
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "web")
 
 
-def create_app():
-    app = Flask(__name__, static_folder="web", static_url_path="/")
+def create_app(asgi=False):
+    """Build the web backend: a Flask app, or with `asgi=True` a FastAPI app."""
+    configure_logging()
+    configure_tracing()
+    if asgi:
+        from fastapi import FastAPI
+
+        app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+        register_asgi_routes(app, STATIC_FOLDER)
+        app.add_middleware(RequestTimeoutMiddleware, timeout=request_timeout_from_env())
+        return app
+
+    # The frontend is served by the catch-all route in register_routes
+    app = Flask(__name__, static_folder=None)
+    app.static_folder = "web"
     register_routes(app)
     return app
+
+
+def create_asgi_app():
+    """uvicorn factory for the production server."""
+    return create_app(asgi=True)
@@ -1,14 +1,29 @@
+import json
 import os
 import sys
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
-from flask import jsonify, request, send_from_directory
+from flask import Response, jsonify, request
 
 try:
-    from backend.agent_controller import get_logs, handle_agent, handle_chat
+    from backend.agent_controller import (
+        clear_chat_history,
+        get_chat_history,
+        get_logs,
+        handle_agent,
+        handle_chat,
+        stream_chat,
+    )
 except ImportError:
-    from backend_agent_controller import get_logs, handle_agent, handle_chat
+    from backend_agent_controller import (
+        clear_chat_history,
+        get_chat_history,
+        get_logs,
+        handle_agent,
+        handle_chat,
+        stream_chat,
+    )
 
 
 try:
@@ -16,13 +31,39 @@ try:
 except ImportError:
     from .key_loader import load_keys, save_keys
 
+from utils.sse import SSE_HEADERS, sse_stream, sync_sse_stream
+from utils.static_assets import StaticAssetStore
+from utils.tracing import tracer
+
+
+def wants_stream(headers, args):
+    """Clients opt into SSE with an Accept header or ?stream=1."""
+    accept = headers.get("Accept", "")
+    return "text/event-stream" in accept or args.get("stream") in ("1", "true")
+
 
 def register_routes(app):
     @app.route("/api/chat", methods=["POST"])
     def chat():
         data = request.get_json()
+        if wants_stream(request.headers, request.args):
+            return Response(
+                sync_sse_stream(stream_chat(data)),
+                mimetype="text/event-stream",
+                headers=SSE_HEADERS,
+            )
         return jsonify(handle_chat(data))
 
+    @app.route("/api/chat/history", methods=["GET", "DELETE"])
+    def chat_history():
+        session_id = request.args.get("session_id")
+        if request.method == "DELETE":
+            return jsonify(clear_chat_history(session_id))
+        result = get_chat_history(
+            session_id, request.args.get("before"), request.args.get("limit")
+        )
+        return jsonify(result), 400 if result["status"] == "error" else 200
+
     @app.route("/api/agent", methods=["POST"])
     def agent():
         data = request.get_json()
@@ -58,12 +99,100 @@ def register_routes(app):
     def health():
         return jsonify({"status": "ok", "message": "OpenManus backend is running"})
 
-    # Serve frontend
+    @app.route("/api/metrics", methods=["GET"])
+    def metrics():
+        return jsonify(tracer.metrics())
+
+    # Serve frontend from memory; unknown paths fall back to index.html
+    assets = StaticAssetStore(app.static_folder, auto_reload=app.debug)
+    app.extensions["static_assets"] = assets
+
     @app.route("/", defaults={"path": ""})
     @app.route("/<path:path>")
     def serve(path):
-        file_path = os.path.join(app.static_folder, path)
-        if path != "" and os.path.exists(file_path):
-            return send_from_directory(app.static_folder, path)
-        else:
-            return send_from_directory(app.static_folder, "index.html")
+        status, headers, body = assets.respond(
+            path, request.headers, fallback="index.html"
+        )
+        return Response(body, status=status, headers=headers)
+
+
+def register_asgi_routes(app, static_folder, auto_reload=False):
+    """The same routes as register_routes, as async handlers on a FastAPI app."""
+    from fastapi import Request
+    from fastapi.responses import JSONResponse, Response, StreamingResponse
+    from starlette.concurrency import run_in_threadpool
+
+    async def json_body(request):
+        body = await request.body()
+        return json.loads(body) if body else {}
+
+    # The controller functions block, so keep them off the event loop
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        data = await json_body(request)
+        if wants_stream(request.headers, request.query_params):
+            # Starlette cancels the stream when the client disconnects
+            return StreamingResponse(
+                sse_stream(stream_chat(data)),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS,
+            )
+        return await run_in_threadpool(handle_chat, data)
+
+    @app.get("/api/chat/history")
+    async def chat_history(
+        session_id: str = None, before: str = None, limit: str = None
+    ):
+        result = await run_in_threadpool(get_chat_history, session_id, before, limit)
+        return JSONResponse(result, 400 if result["status"] == "error" else 200)
+
+    @app.delete("/api/chat/history")
+    async def delete_chat_history(session_id: str = None):
+        return await run_in_threadpool(clear_chat_history, session_id)
+
+    @app.post("/api/agent")
+    async def agent(request: Request):
+        return await run_in_threadpool(handle_agent, await json_body(request))
+
+    @app.post("/api/agent/start")
+    async def agent_start(request: Request):
+        data = await json_body(request) or {}
+        data["action"] = "start"
+        return await run_in_threadpool(handle_agent, data)
+
+    @app.post("/api/agent/stop")
+    async def agent_stop(request: Request):
+        data = await json_body(request) or {}
+        data["action"] = "stop"
+        return await run_in_threadpool(handle_agent, data)
+
+    @app.get("/api/agent/logs")
+    async def logs():
+        return get_logs()
+
+    @app.get("/api/keys")
+    async def get_keys():
+        return await run_in_threadpool(load_keys)
+
+    @app.post("/api/keys")
+    async def post_keys(request: Request):
+        await run_in_threadpool(save_keys, await json_body(request))
+        return {"status": "ok"}
+
+    @app.get("/api/health")
+    async def health():
+        return {"status": "ok", "message": "OpenManus backend is running"}
+
+    @app.get("/api/metrics")
+    async def metrics():
+        return tracer.metrics()
+
+    assets = StaticAssetStore(static_folder, auto_reload=auto_reload)
+    app.state.static_assets = assets
+
+    @app.api_route("/{path:path}", methods=["GET", "HEAD"])
+    async def serve(path: str, request: Request):
+        status, headers, body = assets.respond(
+            path, request.headers, fallback="index.html"
+        )
+        return Response(body, status_code=status, headers=headers)
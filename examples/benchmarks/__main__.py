@@ -0,0 +1,86 @@
+"""
+Run the agent benchmark suite.
+
+    python -m examples.benchmarks --concurrency 1 4 16 --output bench.json
+    python -m examples.benchmarks --latency-scale 0 --compare bench.json
+"""
+import argparse
+import asyncio
+import json
+
+from examples.benchmarks.runner import (
+    compare,
+    environment,
+    run_at_concurrency,
+    write_report,
+)
+from examples.benchmarks.tasks import load_tasks
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="OpenManus agent benchmarks")
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 4], help="Levels to run"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs of each task per level"
+    )
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=0.1,
+        help="Multiplier for scripted LLM/tool latencies (0 measures pure overhead)",
+    )
+    parser.add_argument(
+        "--sequential-tools",
+        action="store_true",
+        help="Execute tool calls one at a time instead of through the dispatcher",
+    )
+    parser.add_argument("--tasks", help="JSON file with scripted tasks")
+    parser.add_argument("--output", default="bench_output.json", help="Report path")
+    parser.add_argument("--compare", help="Baseline report to diff against")
+    return parser.parse_args()
+
+
+async def main() -> None:
+    args = parse_args()
+    tasks = load_tasks(args.tasks)
+    report = {
+        "environment": environment(),
+        "settings": {
+            "repeat": args.repeat,
+            "latency_scale": args.latency_scale,
+            "parallel_tools": not args.sequential_tools,
+            "tasks": [task.name for task in tasks],
+        },
+        "runs": [],
+    }
+    for level in args.concurrency:
+        run = await run_at_concurrency(
+            tasks,
+            level,
+            repeat=args.repeat,
+            latency_scale=args.latency_scale,
+            parallel_tools=not args.sequential_tools,
+        )
+        report["runs"].append(run)
+        print(
+            f"concurrency={level:<4} tasks={run['tasks']:<4} "
+            f"throughput={run['throughput']:.2f}/s p50={run['latency']['p50']:.3f}s "
+            f"p95={run['latency']['p95']:.3f}s "
+            f"overhead/step={run['steps']['mean_overhead_ms']:.3f}ms "
+            f"rss={run['peak_rss_mb']}MB"
+        )
+
+    write_report(report, args.output)
+    print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        for line in compare(report, baseline):
+            print(line)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,212 @@
+"""Replays scripted tasks through the think/act loop and collects metrics."""
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from examples.benchmarks.stubs import ScriptedTask, StubLLM, StubToolbox
+from utils.tool_dispatch import ToolCallDispatcher
+
+
+@dataclass
+class StepTiming:
+    llm: float
+    tool: float
+    overhead: float
+    tool_calls: int
+
+
+@dataclass
+class TaskResult:
+    task: str
+    latency: float
+    steps: List[StepTiming] = field(default_factory=list)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+async def run_task(
+    task: ScriptedTask,
+    latency_scale: float = 1.0,
+    parallel_tools: bool = True,
+    max_steps: int = 20,
+) -> TaskResult:
+    """Run one task the way ToolCallAgent does: think, act, repeat."""
+    llm = StubLLM(task, latency_scale)
+    tools = StubToolbox(latency_scale)
+    dispatcher = ToolCallDispatcher()
+    messages: List[Dict[str, Any]] = [{"role": "user", "content": task.prompt}]
+    result = TaskResult(task=task.name, latency=0.0)
+
+    started = time.perf_counter()
+    for _ in range(max_steps):
+        step_start = time.perf_counter()
+        response = await llm.ask_tool(messages)
+        llm_done = time.perf_counter()
+        messages.append(
+            {
+                "role": "assistant",
+                "content": response.content,
+                "tool_calls": [
+                    {"id": c.id, "function": vars(c.function)}
+                    for c in response.tool_calls
+                ],
+            }
+        )
+        if parallel_tools:
+            outputs = await dispatcher.dispatch(response.tool_calls, tools.execute)
+        else:
+            outputs = [await tools.execute(c) for c in response.tool_calls]
+        tools_done = time.perf_counter()
+        for call, output in zip(response.tool_calls, outputs):
+            messages.append(
+                {
+                    "role": "tool",
+                    "content": output,
+                    "tool_call_id": call.id,
+                    "name": call.function.name,
+                }
+            )
+        step_end = time.perf_counter()
+
+        llm_time = llm_done - step_start
+        tool_time = tools_done - llm_done
+        result.steps.append(
+            StepTiming(
+                llm=llm_time,
+                tool=tool_time,
+                overhead=(step_end - step_start) - llm_time - tool_time,
+                tool_calls=len(response.tool_calls),
+            )
+        )
+        names = {c.function.name for c in response.tool_calls}
+        if not response.tool_calls or "terminate" in names:
+            break
+
+    result.latency = time.perf_counter() - started
+    result.prompt_tokens = llm.total_input_tokens
+    result.completion_tokens = llm.total_completion_tokens
+    return result
+
+
+async def run_at_concurrency(
+    tasks: List[ScriptedTask],
+    concurrency: int,
+    repeat: int = 1,
+    latency_scale: float = 1.0,
+    parallel_tools: bool = True,
+) -> Dict[str, Any]:
+    """Run every task `repeat` times with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(task: ScriptedTask) -> TaskResult:
+        async with semaphore:
+            return await run_task(task, latency_scale, parallel_tools)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(bounded(task) for _ in range(repeat) for task in tasks)
+    )
+    wall_time = time.perf_counter() - started
+    return summarize(results, concurrency, wall_time)
+
+
+def summarize(
+    results: List[TaskResult], concurrency: int, wall_time: float
+) -> Dict[str, Any]:
+    latencies = sorted(r.latency for r in results)
+    steps = [s for r in results for s in r.steps]
+    per_task: Dict[str, List[float]] = {}
+    for r in results:
+        per_task.setdefault(r.task, []).append(r.latency)
+    return {
+        "concurrency": concurrency,
+        "tasks": len(results),
+        "wall_time": wall_time,
+        "throughput": len(results) / wall_time if wall_time else 0.0,
+        "latency": {
+            "mean": statistics.fmean(latencies),
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "max": latencies[-1],
+        },
+        "steps": {
+            "count": len(steps),
+            "llm": sum(s.llm for s in steps),
+            "tool": sum(s.tool for s in steps),
+            "overhead": sum(s.overhead for s in steps),
+            "mean_overhead_ms": 1000 * statistics.fmean(s.overhead for s in steps),
+        },
+        "tokens": {
+            "prompt": sum(r.prompt_tokens for r in results),
+            "completion": sum(r.completion_tokens for r in results),
+        },
+        "per_task_mean_latency": {
+            name: statistics.fmean(values) for name, values in per_task.items()
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    index = round((len(sorted_values) - 1) * pct / 100)
+    return sorted_values[index]
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Describe throughput and p50 changes for concurrency levels in both reports."""
+    before = {run["concurrency"]: run for run in baseline.get("runs", [])}
+    lines = []
+    for run in current.get("runs", []):
+        old = before.get(run["concurrency"])
+        if old is None:
+            continue
+        throughput = _delta(run["throughput"], old["throughput"])
+        p50 = _delta(run["latency"]["p50"], old["latency"]["p50"])
+        lines.append(
+            f"concurrency={run['concurrency']}: throughput {throughput:+.1f}%, "
+            f"p50 latency {p50:+.1f}%"
+        )
+    return lines
+
+
+def _delta(new: float, old: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,99 @@
+"""Deterministic stand-ins for the LLM and tools used by the benchmark runner."""
+import asyncio
+import json
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class ScriptedStep:
+    """One LLM turn: the tool calls it returns and what it costs."""
+
+    tool_calls: List[Dict[str, Any]] = field(default_factory=list)
+    content: str = ""
+    llm_latency: float = 0.5
+    prompt_tokens: int = 1500
+    completion_tokens: int = 150
+
+
+@dataclass
+class ScriptedTask:
+    """A prompt plus the fixed sequence of turns the stub LLM will replay."""
+
+    name: str
+    prompt: str
+    steps: List[ScriptedStep]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScriptedTask":
+        return cls(
+            name=data["name"],
+            prompt=data.get("prompt", data["name"]),
+            steps=[ScriptedStep(**step) for step in data["steps"]],
+        )
+
+
+class StubLLM:
+    """Replays a ScriptedTask turn by turn, mimicking LLM.ask_tool."""
+
+    def __init__(self, task: ScriptedTask, latency_scale: float = 1.0):
+        self.task = task
+        self.latency_scale = latency_scale
+        self.total_input_tokens = 0
+        self.total_completion_tokens = 0
+        self._turn = 0
+        self._call_id = 0
+
+    async def ask_tool(self, messages: List[Dict[str, Any]], **kwargs) -> Any:
+        if self._turn < len(self.task.steps):
+            step = self.task.steps[self._turn]
+        else:
+            step = ScriptedStep(tool_calls=[{"name": "terminate"}], llm_latency=0)
+        self._turn += 1
+        await asyncio.sleep(step.llm_latency * self.latency_scale)
+        self.total_input_tokens += step.prompt_tokens
+        self.total_completion_tokens += step.completion_tokens
+        return SimpleNamespace(
+            content=step.content,
+            tool_calls=[self._tool_call(call) for call in step.tool_calls],
+        )
+
+    def _tool_call(self, call: Dict[str, Any]) -> Any:
+        self._call_id += 1
+        return SimpleNamespace(
+            id=f"call_{self._call_id}",
+            type="function",
+            function=SimpleNamespace(
+                name=call["name"], arguments=json.dumps(call.get("arguments", {}))
+            ),
+        )
+
+
+DEFAULT_TOOL_LATENCIES = {
+    "python_execute": 0.3,
+    "str_replace_editor": 0.05,
+    "web_search": 0.8,
+    "browser_use": 1.5,
+    "bash": 0.2,
+    "terminate": 0.0,
+}
+
+
+class StubToolbox:
+    """Tools that sleep for a fixed latency and return a deterministic string."""
+
+    def __init__(
+        self,
+        latency_scale: float = 1.0,
+        latencies: Optional[Dict[str, float]] = None,
+    ):
+        self.latency_scale = latency_scale
+        self.latencies = {**DEFAULT_TOOL_LATENCIES, **(latencies or {})}
+
+    async def execute(self, call: Any) -> str:
+        name = call.function.name
+        args = json.loads(call.function.arguments or "{}")
+        latency = args.pop("latency", self.latencies.get(name, 0.1))
+        await asyncio.sleep(latency * self.latency_scale)
+        return f"Observed output of cmd `{name}` executed:\n{json.dumps(args)}"
@@ -0,0 +1,77 @@
+"""Built-in scripted tasks; pass --tasks to load others from JSON."""
+import json
+from typing import List, Optional
+
+from examples.benchmarks.stubs import ScriptedStep, ScriptedTask
+
+
+def _call(name: str, **arguments):
+    return {"name": name, "arguments": arguments}
+
+
+BUILTIN_TASKS: List[ScriptedTask] = [
+    ScriptedTask(
+        name="single_tool",
+        prompt="Print hello world with Python",
+        steps=[
+            ScriptedStep([_call("python_execute", code="print('hello world')")]),
+            ScriptedStep([_call("terminate", status="success")], llm_latency=0.2),
+        ],
+    ),
+    ScriptedTask(
+        name="research_fanout",
+        prompt="Compare three libraries and write a summary file",
+        steps=[
+            ScriptedStep(
+                [
+                    _call("web_search", query="library a"),
+                    _call("web_search", query="library b"),
+                    _call("web_search", query="library c"),
+                ]
+            ),
+            ScriptedStep(
+                [
+                    _call("python_execute", code="summary = '...'"),
+                    _call(
+                        "str_replace_editor",
+                        command="create",
+                        path="/workspace/summary.md",
+                    ),
+                ],
+                llm_latency=0.8,
+                prompt_tokens=4000,
+            ),
+            ScriptedStep([_call("terminate", status="success")], llm_latency=0.2),
+        ],
+    ),
+    ScriptedTask(
+        name="browse_and_edit",
+        prompt="Open a page, extract data and patch a file",
+        steps=[
+            ScriptedStep([_call("browser_use", action="go_to_url", url="https://x")]),
+            ScriptedStep(
+                [_call("browser_use", action="extract_content", goal="table")],
+                prompt_tokens=6000,
+            ),
+            ScriptedStep(
+                [
+                    _call(
+                        "str_replace_editor",
+                        command="str_replace",
+                        path="/workspace/a.py",
+                    )
+                ]
+            ),
+            ScriptedStep([_call("bash", command="pytest -q")]),
+            ScriptedStep([_call("terminate", status="success")], llm_latency=0.2),
+        ],
+    ),
+]
+
+
+def load_tasks(path: Optional[str] = None) -> List[ScriptedTask]:
+    """Load tasks from a JSON list of task dicts, or return the built-ins."""
+    if not path:
+        return list(BUILTIN_TASKS)
+    with open(path, "r", encoding="utf-8") as f:
+        return [ScriptedTask.from_dict(item) for item in json.load(f)]
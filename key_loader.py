@@ -8,20 +8,24 @@ import json
 import os
 
 
-def load_keys():
+def find_keys_file():
     # Prefer project-level keys.txt (project root). If not present, fall back to
     # user's home directory keys.txt to preserve previous behavior.
     home = os.path.expanduser("~")
     project_keys = os.path.join(os.getcwd(), "keys.txt")
     home_keys = os.path.join(home, "keys.txt")
-    keys = {}
-    keys_path = None
     if os.path.exists(project_keys):
-        keys_path = project_keys
-    elif os.path.exists(home_keys):
-        keys_path = home_keys
+        return project_keys
+    if os.path.exists(home_keys):
+        return home_keys
+    return None
+
+
+def load_keys(keys_path=None):
+    keys = {}
+    keys_path = keys_path or find_keys_file()
 
-    if keys_path:
+    if keys_path and os.path.exists(keys_path):
         with open(keys_path, "r", encoding="utf-8") as f:
             for line in f:
                 if line.strip() and not line.strip().startswith("#"):
@@ -6,13 +6,32 @@ import os
 # Add the current directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-try:
-    from app.agent.manus import Manus
-    from app.logger import logger
-except ImportError:
-    print("Warning: app module not found. This script requires the full OpenManus agent implementation.")
-    print("For web interface, use: python3 test_server.py")
-    sys.exit(1)
+from utils.checkpoint import (
+    CheckpointError,
+    RunLog,
+    add_resume_arguments,
+    agent_checkpoint,
+    checkpoint_agent,
+    new_run_id,
+    restore_agent,
+)
+from utils.llm_replay import add_transcript_arguments, configure_llm_transcript
+from utils.log_pipeline import configure_logging
+from utils.memory_store import (
+    add_memory_arguments,
+    get_memory_store,
+    remember_tool_results,
+    with_memories,
+)
+from utils.pipelining import (
+    add_pipeline_arguments,
+    enable_pipelining,
+    pipelining_enabled,
+)
+from utils.startup import print_startup_profile
+from utils.step_budget import add_step_budget_arguments, control_steps
+from utils.tracing import configure_tracing
+from utils.workspace_index import add_workspace_arguments, enable_workspace_index
 
 
 async def main():
@@ -21,19 +40,89 @@ async def main():
     parser.add_argument(
         "--prompt", type=str, required=False, help="Input prompt for the agent"
     )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Report import time per module and exit",
+    )
+    add_resume_arguments(parser)
+    add_transcript_arguments(parser)
+    add_memory_arguments(parser)
+    add_pipeline_arguments(parser)
+    add_step_budget_arguments(parser)
+    add_workspace_arguments(parser)
     args = parser.parse_args()
 
+    if args.profile_startup:
+        print_startup_profile(["app.agent.manus", "app.logger"])
+        return
+    if args.resume:
+        log = RunLog(args.resume)
+        try:
+            start = log.start_record(entry="main")
+            checkpoint = agent_checkpoint(log)
+        except CheckpointError as e:
+            print(f"Cannot resume: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    # Heavy agent dependencies are imported only once we know they are needed
+    try:
+        from app.agent.manus import Manus
+        from app.logger import logger
+    except ImportError:
+        print("Warning: app module not found. This script requires the full OpenManus agent implementation.")
+        print("For web interface, use: python3 test_server.py")
+        sys.exit(1)
+
+    configure_llm_transcript(args.record, args.replay, args.replay_latency)
+    configure_logging()
+    configure_tracing()
+
     # Create and initialize Manus agent
     agent = await Manus.create()
     try:
-        # Use command line prompt if provided, otherwise ask for input
-        prompt = args.prompt if args.prompt else input("Enter your prompt: ")
-        if not prompt.strip():
-            logger.warning("Empty prompt provided.")
-            return
+        if args.resume:
+            prompt = start["prompt"]
+            if log.latest()["kind"] == "finish":
+                logger.info(f"Run {log.run_id} already finished.")
+                return
+            if checkpoint:
+                # The restored memory already holds the prompt
+                restore_agent(agent, checkpoint)
+                logger.warning(
+                    f"Resuming run {log.run_id} after step {agent.current_step}"
+                )
+        else:
+            # Use command line prompt if provided, otherwise ask for input
+            prompt = args.prompt if args.prompt else input("Enter your prompt: ")
+            if not prompt.strip():
+                logger.warning("Empty prompt provided.")
+                return
+            log = RunLog(new_run_id())
+            log.append("start", entry="main", prompt=prompt)
+            checkpoint = None
+        logger.info(f"Run id: {log.run_id} (continue with --resume {log.run_id})")
+        checkpoint_agent(agent, log)
+        memory = get_memory_store() if args.memory else None
+        if memory is not None and args.remember_tools:
+            remember_tool_results(agent, memory)
+        if pipelining_enabled(args.pipeline):
+            enable_pipelining(agent)
+        if args.adaptive_steps:
+            control_steps(agent)
+        if args.workspace_index:
+            enable_workspace_index(agent)
 
         logger.warning("Processing your request...")
-        await agent.run(prompt)
+        if checkpoint:
+            result = await agent.run(None)
+        else:
+            result = await agent.run(
+                with_memories(prompt, memory) if memory is not None else prompt
+            )
+        log.append("finish")
+        if memory is not None:
+            memory.add(f"Task: {prompt}\nOutcome: {str(result)[-1500:]}", kind="task")
         logger.info("Request processing completed.")
     except KeyboardInterrupt:
         logger.warning("Operation interrupted.")
@@ -20,13 +20,14 @@ class WSLAgent:
             print("3. Run a shell command (Linux)")
             print("4. List files in home directory (Linux)")
             print("5. Open Windows Explorer")
-            print("6. Transfer file from WSL to Windows Desktop")
-            print("7. Transfer file from Windows to WSL home")
+            print("6. Transfer file or folder from WSL to Windows Desktop")
+            print("7. Transfer file or folder from Windows to WSL home")
             print("8. Show WSL/Windows usernames")
             print("9. Shutdown WSL")
             print("10. Reboot WSL")
+            print("11. Run several shell commands at once (Linux)")
             print("0. Exit agent mode")
-            choice = input("Enter choice [0-10]: ").strip()
+            choice = input("Enter choice [0-11]: ").strip()
             if choice == "1":
                 path = input("Enter path (leave blank for home): ").strip() or None
                 self.tools.open_file_manager(path)
@@ -63,6 +64,15 @@ class WSLAgent:
                 self.tools.shutdown_wsl()
             elif choice == "10":
                 self.tools.reboot_wsl()
+            elif choice == "11":
+                print("Enter one command per line, blank line to start:")
+                commands = []
+                while True:
+                    cmd = input("> ").strip()
+                    if not cmd:
+                        break
+                    commands.append(cmd)
+                self.tools.run_commands(commands)
             elif choice == "0":
                 print("[OpenManus] Exiting WSL agent mode.")
                 break
@@ -80,6 +90,8 @@ try:
 except ImportError:
     from .key_loader import inject_keys_env, load_keys
 
+from utils.asgi_server import ServerSettings, add_server_arguments, run_server
+
 
 def detect_wsl():
     return "WSL_DISTRO_NAME" in os.environ
@@ -93,8 +105,9 @@ if __name__ == "__main__":
     parser.add_argument(
         "--agent",
         action="store_true",
-        help="Run in agent mode (Manus simulation, WSL supported)",
+        help="Run in agent mode (Manus simulation, Linux and WSL)",
     )
+    add_server_arguments(parser, host="127.0.0.1", port=7860)
     args = parser.parse_args()
 
     # Load API keys
@@ -107,12 +120,14 @@ if __name__ == "__main__":
     if detect_wsl():
         print("[OpenManus] Detected WSL environment.")
 
-    if args.agent and detect_wsl():
+    if args.agent:
         agent = WSLAgent()
         agent.run()
+    elif args.web and args.production:
+        run_server(ServerSettings.from_args(args))
     elif args.web:
         app = create_app()
-        app.run(host="127.0.0.1", port=7860)
+        app.run(host=args.host, port=args.port)
     else:
         # CLI fallback
         try:
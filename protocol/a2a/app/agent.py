@@ -2,6 +2,7 @@ import httpx
 from typing import Any, Dict, AsyncIterable, Literal, List, ClassVar
 from pydantic import BaseModel
 from app.agent.manus import Manus
+from utils.tool_dispatch import ParallelToolCallMixin
 
 
 class ResponseFormat(BaseModel):
@@ -11,7 +12,7 @@ class ResponseFormat(BaseModel):
     message: str
 
 
-class A2AManus(Manus):
+class A2AManus(ParallelToolCallMixin, Manus):
 
     async def invoke(self, query, sessionId) -> str:
         config = {"configurable": {"thread_id": sessionId}}
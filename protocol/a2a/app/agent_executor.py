@@ -1,3 +1,4 @@
+import asyncio
 import logging
 
 from a2a.server.agent_execution import AgentExecutor, RequestContext
@@ -7,26 +8,33 @@ from a2a.types import (
     InvalidParamsError,
     Part,
     Task,
+    TaskNotCancelableError,
+    TaskState,
     TextPart,
-    UnsupportedOperationError,
 )
 from a2a.utils import (
     completed_task,
     new_artifact,
 )
 from .agent import A2AManus
+from utils.request_scheduler import ANONYMOUS, RequestScheduler
+from utils.tracing import tracer
 from a2a.utils.errors import ServerError
-from typing import Callable, Awaitable
+from typing import Callable, Awaitable, Optional
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class ManusExecutor(AgentExecutor):
     """Currency Conversion AgentExecutor Example."""
 
-    def __init__(self, agent_factory: Callable[[], Awaitable[A2AManus]]):
+    def __init__(
+        self,
+        agent_factory: Callable[[], Awaitable[A2AManus]],
+        scheduler: Optional[RequestScheduler] = None,
+    ):
         self.agent_factory = agent_factory
+        self.scheduler = scheduler or RequestScheduler.from_env()
 
     async def execute(
         self,
@@ -38,12 +46,38 @@ class ManusExecutor(AgentExecutor):
             raise ServerError(error=InvalidParamsError())
 
         query = context.get_user_input()
+
+        async def invoke():
+            # The span starts once the scheduler admits the request, so it
+            # measures execution; queue time is reported by the scheduler
+            with tracer.span("a2a.execute", context_id=context.context_id or ""):
+                agent = await self.agent_factory()
+                try:
+                    return await agent.invoke(query, context.context_id)
+                finally:
+                    await agent.cleanup()
+
         try:
-            self.agent = await self.agent_factory()
-            result = await self.agent.invoke(query, context.context_id)
-            print(f"Final Result ===> {result}")
+            result = await self.scheduler.run(
+                invoke,
+                task_id=context.task_id,
+                context_id=context.context_id,
+                client_id=self._client_id(context),
+            )
+            logger.debug(
+                "Final result: %s", result, extra={"context_id": context.context_id}
+            )
+        except asyncio.CancelledError:
+            logger.info(
+                "Task %s cancelled",
+                context.task_id,
+                extra={"context_id": context.context_id},
+            )
+            raise
         except Exception as e:
-            print("Error invoking agent: %s", e)
+            logger.exception(
+                "Error invoking agent", extra={"context_id": context.context_id}
+            )
             raise ServerError(error=ValueError(f"Error invoking agent: {e}")) from e
         parts = [
             Part(
@@ -68,7 +102,23 @@ class ManusExecutor(AgentExecutor):
     def _validate_request(self, context: RequestContext) -> bool:
         return False
 
+    @staticmethod
+    def _client_id(context: RequestContext) -> str:
+        """The API client a request is accounted to for fair queueing."""
+        call_context = context.call_context
+        if call_context is None:
+            return ANONYMOUS
+        client_id = call_context.state.get("client_id")
+        if not client_id and call_context.user.is_authenticated:
+            client_id = call_context.user.user_name
+        return client_id or ANONYMOUS
+
     async def cancel(
         self, request: RequestContext, event_queue: EventQueue
     ) -> Task | None:
-        raise ServerError(error=UnsupportedOperationError())
+        if not self.scheduler.cancel(request.task_id):
+            raise ServerError(error=TaskNotCancelableError())
+        TaskUpdater(event_queue, request.task_id, request.context_id).update_status(
+            TaskState.canceled, final=True
+        )
+        return None
@@ -2,6 +2,8 @@ import httpx
 import argparse
 
 from a2a.server.apps import A2AStarletteApplication
+from a2a.server.apps.starlette_app import DefaultCallContextBuilder
+from a2a.server.context import ServerCallContext
 from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.tasks import InMemoryTaskStore, InMemoryPushNotifier
 from a2a.types import (
@@ -16,20 +18,76 @@ from .agent import A2AManus
 from app.tool.browser_use_tool import _BROWSER_DESCRIPTION
 from app.tool.str_replace_editor import _STR_REPLACE_EDITOR_DESCRIPTION
 from app.tool.terminate import _TERMINATE_DESCRIPTION
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from utils.log_pipeline import configure_logging
+from utils.request_scheduler import RequestScheduler
+from utils.step_budget import StepBudgetController, budget_metrics, control_steps
+from utils.tracing import configure_tracing, tracer
 import logging
 from dotenv import load_dotenv
 import asyncio
+import os
 from typing import Optional
 
 load_dotenv()
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-async def main(host: str = "localhost", port: int = 10000):
+CLIENT_ID_HEADER = "X-Client-Id"
+TRUST_CLIENT_ID_ENV = "OPENMANUS_A2A_TRUST_CLIENT_ID_HEADER"
+
+
+class ClientCallContextBuilder(DefaultCallContextBuilder):
+    """Records which API client made a call, for fair queueing.
+
+    The authenticated user is used when there is one, otherwise the peer
+    address. Any caller can set X-Client-Id, and with it claim a heavier
+    client's weight or spread its load over many ids, so the header is only
+    honoured when OPENMANUS_A2A_TRUST_CLIENT_ID_HEADER is set. Set it only
+    behind an authenticating proxy that overwrites the header.
+    """
+
+    def __init__(self, trust_header: Optional[bool] = None):
+        if trust_header is None:
+            value = os.environ.get(TRUST_CLIENT_ID_ENV, "")
+            trust_header = value.lower() in ("1", "true", "yes", "on")
+        self.trust_header = trust_header
+
+    def build(self, request: Request) -> ServerCallContext:
+        context = super().build(request)
+        client_id = None
+        if context.user.is_authenticated:
+            client_id = context.user.user_name
+        elif self.trust_header:
+            client_id = request.headers.get(CLIENT_ID_HEADER)
+        if not client_id and request.client:
+            client_id = request.client.host
+        if client_id:
+            context.state["client_id"] = client_id
+        return context
+
+
+async def metrics(request: Request) -> JSONResponse:
+    body = {**tracer.metrics(), "step_budget": budget_metrics.to_dict()}
+    scheduler = getattr(request.app.state, "scheduler", None)
+    if scheduler is not None:
+        body["scheduler"] = scheduler.snapshot()
+    return JSONResponse(body)
+
+
+# Upper bound only; each request gets an adaptive budget below it
+A2A_MAX_STEPS = 20
+
+
+async def main(
+    host: str = "localhost", port: int = 10000, max_concurrency: Optional[int] = None
+):
     """Starts the Manus Agent server."""
     try:
+        configure_logging()
+        configure_tracing()
         capabilities = AgentCapabilities(streaming=False, pushNotifications=True)
         skills = [
             AgentSkill(
@@ -83,31 +141,48 @@ async def main(host: str = "localhost", port: int = 10000):
             skills=skills,
         )
 
+        step_budgets = StepBudgetController()
+
+        async def create_agent() -> A2AManus:
+            agent = await A2AManus.create(max_steps=A2A_MAX_STEPS)
+            control_steps(agent, step_budgets)
+            return agent
+
+        scheduler = RequestScheduler.from_env(max_concurrency)
         httpx_client = httpx.AsyncClient()
         request_handler = DefaultRequestHandler(
             agent_executor=ManusExecutor(
-                agent_factory=lambda: A2AManus.create(max_steps=3)
+                agent_factory=create_agent, scheduler=scheduler
             ),
             task_store=InMemoryTaskStore(),
             push_notifier=InMemoryPushNotifier(httpx_client),
         )
 
         server = A2AStarletteApplication(
-            agent_card=agent_card, http_handler=request_handler
+            agent_card=agent_card,
+            http_handler=request_handler,
+            context_builder=ClientCallContextBuilder(),
         )
 
         logger.info(f"Starting server on {host}:{port}")
-        return server.build()
+        app = server.build()
+        app.state.scheduler = scheduler
+        app.add_route("/api/metrics", metrics, methods=["GET"])
+        return app
     except Exception as e:
         logger.error(f"An error occurred during server startup: {e}")
         exit(1)
 
 
-def run_server(host: Optional[str] = "localhost", port: Optional[int] = 10000):
+def run_server(
+    host: Optional[str] = "localhost",
+    port: Optional[int] = 10000,
+    max_concurrency: Optional[int] = None,
+):
     try:
         import uvicorn
 
-        app = asyncio.run(main(host, port))
+        app = asyncio.run(main(host, port, max_concurrency))
         config = uvicorn.Config(
             app=app, host=host, port=port, loop="asyncio", proxy_headers=True
         )
@@ -129,6 +204,11 @@ if __name__ == "__main__":
     parser.add_argument(
         "--port", type=int, default=10000, help="Server port, default is 10000"
     )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        help="Requests of different contexts run in parallel, default is 4",
+    )
     args = parser.parse_args()
     # Start the server with the specified or default host and port
-    run_server(args.host, args.port)
+    run_server(args.host, args.port, args.max_concurrency)
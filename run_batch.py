@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from utils.llm_replay import add_transcript_arguments, configure_llm_transcript
+from utils.log_pipeline import configure_logging
+from utils.tracing import configure_tracing, tracer
+
+
+AgentFactory = Callable[[], Awaitable[Any]]
+
+
+def load_jobs(path: str) -> List[Dict[str, Any]]:
+    """Read jobs from JSONL; each line needs a prompt (or title/body) and may have an id."""
+    jobs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            prompt = data.get("prompt") or "\n\n".join(
+                part for part in (data.get("title"), data.get("body")) if part
+            )
+            job_id = data.get("id") or data.get("request_id") or f"line-{line_no}"
+            jobs.append({"id": str(job_id), "prompt": prompt})
+    return jobs
+
+
+def truncate_partial_line(path: str) -> None:
+    """Drop a trailing line left half-written by a crash."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids that already have a successful result in the output file."""
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+async def create_manus() -> Any:
+    from app.agent.manus import Manus
+
+    return await Manus.create()
+
+
+class BatchRunner:
+    """Runs jobs through a bounded pool of agents, streaming results to JSONL."""
+
+    def __init__(
+        self,
+        output_path: str,
+        agent_factory: AgentFactory = create_manus,
+        concurrency: int = 4,
+        timeout: Optional[float] = 1800,
+        retries: int = 1,
+        retry_backoff: float = 2.0,
+    ):
+        self.output_path = output_path
+        self.agent_factory = agent_factory
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._write_lock = asyncio.Lock()
+
+    async def run(self, jobs: List[Dict[str, Any]], resume: bool = True) -> Dict:
+        """Run every job not already completed; return a summary."""
+        truncate_partial_line(self.output_path)
+        skip = completed_ids(self.output_path) if resume else set()
+        pending = [job for job in jobs if job["id"] not in skip]
+        queue: asyncio.Queue = asyncio.Queue()
+        for job in pending:
+            queue.put_nowait(job)
+
+        summary = {"skipped": len(jobs) - len(pending), "ok": 0, "failed": 0}
+        started = time.perf_counter()
+
+        async def worker() -> None:
+            while True:
+                try:
+                    job = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                record = await self.run_job(job)
+                summary["ok" if record["status"] == "ok" else "failed"] += 1
+                await self._write(record)
+
+        workers = min(self.concurrency, len(pending)) or 1
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        summary["elapsed"] = round(time.perf_counter() - started, 3)
+        return summary
+
+    async def run_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one job with timeout and retries; never raises."""
+        record: Dict[str, Any] = {"id": job["id"], "attempts": 0}
+        started = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            record["attempts"] = attempt + 1
+            try:
+                with tracer.span("batch.job", job_id=job["id"], attempt=attempt + 1):
+                    result = await asyncio.wait_for(
+                        self._invoke(job["prompt"]), timeout=self.timeout
+                    )
+                record.update(status="ok", result=result, error=None)
+                break
+            except asyncio.TimeoutError:
+                record.update(
+                    status="timeout", error=f"Timed out after {self.timeout}s"
+                )
+            except Exception as e:
+                record.update(status="error", error=f"{type(e).__name__}: {e}")
+            if attempt < self.retries:
+                await asyncio.sleep(self.retry_backoff * (2**attempt))
+        record["elapsed"] = round(time.perf_counter() - started, 3)
+        return record
+
+    async def _invoke(self, prompt: str) -> Any:
+        agent = await self.agent_factory()
+        try:
+            return await agent.run(prompt)
+        finally:
+            cleanup = getattr(agent, "cleanup", None)
+            if cleanup is not None:
+                await cleanup()
+
+    async def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        async with self._write_lock:
+            with open(self.output_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Run prompts from a JSONL file")
+    parser.add_argument("input", help="JSONL file with one job per line")
+    parser.add_argument(
+        "--output", "-o", default="batch_results.jsonl", help="Results JSONL file"
+    )
+    parser.add_argument(
+        "--concurrency", "-c", type=int, default=4, help="Agents running at once"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=1800, help="Per-job timeout in seconds"
+    )
+    parser.add_argument(
+        "--retries", type=int, default=1, help="Retries for failed or timed-out jobs"
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Re-run jobs that already succeeded in the output file",
+    )
+    add_transcript_arguments(parser)
+    return parser.parse_args()
+
+
+async def run_batch() -> None:
+    """Main entry point for the batch runner."""
+    args = parse_args()
+    configure_llm_transcript(args.record, args.replay, args.replay_latency)
+    configure_tracing()
+
+    from app.logger import logger
+
+    # After app.logger so its loguru sinks are replaced by the queue bridge
+    configure_logging()
+
+    jobs = load_jobs(args.input)
+    runner = BatchRunner(
+        args.output,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        retries=args.retries,
+    )
+    logger.info(f"Running {len(jobs)} jobs with concurrency {args.concurrency}")
+    summary = await runner.run(jobs, resume=not args.no_resume)
+    logger.info(
+        f"Batch finished in {summary['elapsed']:.2f}s: {summary['ok']} ok, "
+        f"{summary['failed']} failed, {summary['skipped']} skipped"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(run_batch())
@@ -1,38 +1,141 @@
+import argparse
 import asyncio
+import sys
 import time
 
-from app.agent.data_analysis import DataAnalysis
-from app.agent.manus import Manus
-from app.config import config
-from app.flow.flow_factory import FlowFactory, FlowType
-from app.logger import logger
+from utils.checkpoint import (
+    CheckpointError,
+    RunLog,
+    add_resume_arguments,
+    checkpoint_flow,
+    new_run_id,
+    restore_flow,
+)
+from utils.llm_replay import add_transcript_arguments, configure_llm_transcript
+from utils.log_pipeline import configure_logging
+from utils.memory_store import add_memory_arguments, get_memory_store, with_memories
+from utils.pipelining import (
+    add_pipeline_arguments,
+    enable_pipelining,
+    pipelining_enabled,
+)
+from utils.startup import print_startup_profile
+from utils.step_budget import (
+    StepBudgetController,
+    add_step_budget_arguments,
+    control_steps,
+)
+from utils.tracing import configure_tracing, tracer
+from utils.workspace_index import add_workspace_arguments, enable_workspace_index
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the planning flow")
+    parser.add_argument("--prompt", help="Input prompt for the flow")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Report import time per module and exit",
+    )
+    add_resume_arguments(parser)
+    add_transcript_arguments(parser)
+    add_memory_arguments(parser)
+    add_pipeline_arguments(parser)
+    add_step_budget_arguments(parser)
+    add_workspace_arguments(parser)
+    return parser.parse_args()
 
 
 async def run_flow():
+    args = parse_args()
+    if args.profile_startup:
+        print_startup_profile(
+            ["app.agent.manus", "app.agent.data_analysis", "app.flow.flow_factory"]
+        )
+        return
+    if args.resume:
+        log = RunLog(args.resume)
+        try:
+            prompt = log.start_record(entry="flow")["prompt"]
+        except CheckpointError as e:
+            print(f"Cannot resume: {e}", file=sys.stderr)
+            sys.exit(1)
+    configure_llm_transcript(args.record, args.replay, args.replay_latency)
+    configure_logging()
+    configure_tracing()
+
+    # Agent modules pull in the tool stack; import only what this run uses
+    from app.agent.manus import Manus
+    from app.config import config
+    from app.flow.flow_factory import FlowFactory, FlowType
+    from app.logger import logger
+
     agents = {
         "manus": Manus(),
     }
     if config.run_flow_config.use_data_analysis_agent:
+        from app.agent.data_analysis import DataAnalysis
+
+        from utils.data_session import DataSessionTool
+
         agents["data_analysis"] = DataAnalysis()
+        # Datasets stay loaded across steps instead of being re-read each time
+        agents["data_analysis"].available_tools.add_tool(DataSessionTool())
+    if pipelining_enabled(args.pipeline):
+        for agent in agents.values():
+            enable_pipelining(agent)
+    if args.adaptive_steps:
+        # One controller, so the agents share a step history
+        step_budgets = StepBudgetController()
+        for agent in agents.values():
+            control_steps(agent, step_budgets)
+    if args.workspace_index:
+        for agent in agents.values():
+            enable_workspace_index(agent)
     try:
-        prompt = input("Enter your prompt: ")
+        if args.resume:
+            if log.latest()["kind"] == "finish":
+                logger.info(f"Run {log.run_id} already finished.")
+                return
+        else:
+            prompt = args.prompt or input("Enter your prompt: ")
 
-        if prompt.strip().isspace() or not prompt:
-            logger.warning("Empty prompt provided.")
-            return
+            if prompt.strip().isspace() or not prompt:
+                logger.warning("Empty prompt provided.")
+                return
+            log = RunLog(new_run_id())
+            log.append("start", entry="flow", prompt=prompt)
 
         flow = FlowFactory.create_flow(
             flow_type=FlowType.PLANNING,
             agents=agents,
         )
+        checkpoint = log.latest("flow_step")
+        if checkpoint:
+            # With the plan restored, an empty input continues its open steps
+            restore_flow(flow, checkpoint["flow"])
+            logger.warning(f"Resuming run {log.run_id} from its last checkpoint")
+        logger.info(f"Run id: {log.run_id} (continue with --resume {log.run_id})")
+        checkpoint_flow(flow, log)
+        memory = get_memory_store() if args.memory else None
         logger.warning("Processing your request...")
 
         try:
             start_time = time.time()
-            result = await asyncio.wait_for(
-                flow.execute(prompt),
-                timeout=3600,  # 60 minute timeout for the entire execution
-            )
+            with tracer.span("flow.execute"):
+                if checkpoint:
+                    flow_input = ""
+                elif memory is not None:
+                    flow_input = with_memories(prompt, memory)
+                else:
+                    flow_input = prompt
+                result = await asyncio.wait_for(
+                    flow.execute(flow_input),
+                    timeout=3600,  # 60 minute timeout for the entire execution
+                )
+            log.append("finish")
+            if memory is not None:
+                memory.add(f"Task: {prompt}\nOutcome: {result[-1500:]}", kind="task")
             elapsed_time = time.time() - start_time
             logger.info(f"Request processed in {elapsed_time:.2f} seconds")
             logger.info(result)
@@ -41,6 +144,9 @@ async def run_flow():
             logger.info(
                 "Operation terminated due to timeout. Please try a simpler request."
             )
+            logger.info(
+                f"Completed steps were saved; continue with --resume {log.run_id}"
+            )
 
     except KeyboardInterrupt:
         logger.info("Operation cancelled by user.")
@@ -3,17 +3,27 @@ import argparse
 import asyncio
 import sys
 
-from app.agent.mcp import MCPAgent
-from app.config import config
-from app.logger import logger
+from utils.config_snapshot import get_config
+from utils.llm_replay import add_transcript_arguments, configure_llm_transcript
+from utils.log_pipeline import configure_logging
+from utils.startup import print_startup_profile
+from utils.tracing import configure_tracing
+
+
+DEFAULT_SERVER_REFERENCE = "app.mcp.server"
 
 
 class MCPRunner:
     """Runner class for MCP Agent with proper path handling and configuration."""
 
     def __init__(self):
-        self.root_path = config.root_path
-        self.server_reference = config.mcp_config.server_reference
+        from app.agent.mcp import MCPAgent
+
+        snapshot = get_config()
+        self.root_path = snapshot.root_path
+        self.server_reference = snapshot.get(
+            "mcp.server_reference", DEFAULT_SERVER_REFERENCE
+        )
         self.agent = MCPAgent()
 
     async def initialize(
@@ -22,6 +32,8 @@ class MCPRunner:
         server_url: str | None = None,
     ) -> None:
         """Initialize the MCP agent with the appropriate connection."""
+        from app.logger import logger
+
         logger.info(f"Initializing MCPAgent with {connection_type} connection...")
 
         if connection_type == "stdio":
@@ -51,6 +63,8 @@ class MCPRunner:
 
     async def run_default(self) -> None:
         """Run the agent in default mode."""
+        from app.logger import logger
+
         prompt = input("Enter your prompt: ")
         if not prompt.strip():
             logger.warning("Empty prompt provided.")
@@ -62,6 +76,8 @@ class MCPRunner:
 
     async def cleanup(self) -> None:
         """Clean up agent resources."""
+        from app.logger import logger
+
         await self.agent.cleanup()
         logger.info("Session ended")
 
@@ -85,12 +101,28 @@ def parse_args() -> argparse.Namespace:
         "--interactive", "-i", action="store_true", help="Run in interactive mode"
     )
     parser.add_argument("--prompt", "-p", help="Single prompt to execute and exit")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Report import time per module and exit",
+    )
+    add_transcript_arguments(parser)
     return parser.parse_args()
 
 
 async def run_mcp() -> None:
     """Main entry point for the MCP runner."""
     args = parse_args()
+    if args.profile_startup:
+        print_startup_profile(["app.agent.mcp"])
+        return
+    configure_llm_transcript(args.record, args.replay, args.replay_latency)
+    configure_logging()
+    configure_tracing()
+
+    # The app package pulls in the tool stack; load it only for a real run
+    from app.logger import logger
+
     runner = MCPRunner()
 
     try:
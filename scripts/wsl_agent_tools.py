@@ -1,49 +1,134 @@
+import asyncio
 import os
 import subprocess
-from typing import Optional
+import time
+from typing import List, Optional, Sequence
+
+from utils.command_runner import (
+    CommandPool,
+    CommandResult,
+    has_command,
+    is_wsl,
+    run_command,
+)
+from utils.file_transfer import FileTransfer, TransferStats, format_bytes
+
+
+DEFAULT_TIMEOUT = float(os.environ.get("OPENMANUS_COMMAND_TIMEOUT", "300"))
 
 
 class WSLAgentTools:
     """
     Utility class for WSLAgent to perform user-like actions in WSL.
     Extend this with more methods as needed.
+
+    Shell commands run on an asyncio engine with streamed output, a timeout
+    and Ctrl-C cancellation. Windows-specific actions are skipped with a
+    message on plain Linux.
     """
 
+    def __init__(
+        self, timeout: Optional[float] = DEFAULT_TIMEOUT, max_concurrency: int = 4
+    ):
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.wsl = is_wsl()
+
+    @staticmethod
+    def _print_output(stream: str, line: str):
+        prefix = "[WSLAgent] " if stream == "stdout" else "[WSLAgent] stderr: "
+        print(prefix + line, end="" if line.endswith("\n") else "\n", flush=True)
+
+    def _require_wsl(self, action: str) -> bool:
+        if self.wsl and has_command("wslpath"):
+            return True
+        print(f"[WSLAgent] {action} is only available under WSL.")
+        return False
+
+    def _launch(self, argv: List[str]) -> bool:
+        """Start a desktop program without waiting for it."""
+        if not has_command(argv[0]):
+            print(f"[WSLAgent] '{argv[0]}' is not available on this system.")
+            return False
+        subprocess.Popen(
+            argv,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        return True
+
+    def _transfer(self, src: str, dest: str) -> TransferStats:
+        """Copy a file or directory into `dest`, printing progress."""
+        if os.path.isdir(dest):
+            dest = os.path.join(dest, os.path.basename(os.path.normpath(src)))
+        last = [0.0]
+
+        def progress(stats: TransferStats):
+            now = time.monotonic()
+            if now - last[0] < 0.5 and stats.files_done < stats.files_total:
+                return
+            last[0] = now
+            print(
+                f"\r[WSLAgent] {stats.files_done}/{stats.files_total} files, "
+                f"{format_bytes(stats.bytes_copied)} at "
+                f"{format_bytes(stats.throughput)}/s",
+                end="",
+                flush=True,
+            )
+
+        stats = FileTransfer(on_progress=progress).transfer(src, dest)
+        print()
+        if stats.files_skipped:
+            print(f"[WSLAgent] Skipped {stats.files_skipped} unchanged file(s)")
+        for path, error in stats.errors:
+            print(f"[WSLAgent] Failed to copy {path}: {error}")
+        return stats
+
+    def _wslpath(self, *args: str) -> str:
+        result = asyncio.run(run_command(["wslpath", *args], timeout=10))
+        if not result.ok:
+            raise RuntimeError(result.stderr.strip() or "wslpath failed")
+        return result.stdout.strip()
+
     def open_windows_explorer(self, path: Optional[str] = None):
         """Open Windows Explorer at the given path from WSL (if possible)."""
         path = path or os.path.expanduser("~")
+        if not self._require_wsl("Windows Explorer"):
+            return self.open_file_manager(path)
         # Convert WSL path to Windows path
         try:
-            win_path = subprocess.check_output(
-                ["wslpath", "-w", path], text=True
-            ).strip()
-            subprocess.Popen(["explorer.exe", win_path])
-            print(f"[WSLAgent] Opened Windows Explorer at: {win_path}")
+            win_path = self._wslpath("-w", path)
+            if self._launch(["explorer.exe", win_path]):
+                print(f"[WSLAgent] Opened Windows Explorer at: {win_path}")
         except Exception as e:
             print(f"[WSLAgent] Failed to open Windows Explorer: {e}")
 
     def transfer_file_to_windows(self, wsl_path: str, win_dest: Optional[str] = None):
-        """Copy a file from WSL to Windows user's Desktop (or specified path)."""
+        """Copy a file or directory from WSL to the Windows Desktop (or a path)."""
+        if not self._require_wsl("Copying to Windows"):
+            return
         try:
             win_user = os.environ.get("WINUSER") or "Administrator"
             if not win_dest:
                 win_dest = f"/mnt/c/Users/{win_user}/Desktop/"
-            win_path = subprocess.check_output(
-                ["wslpath", "-w", win_dest], text=True
-            ).strip()
-            subprocess.run(["cp", wsl_path, win_dest], check=True)
+            win_path = self._wslpath("-w", win_dest)
+            self._transfer(wsl_path, win_dest)
             print(f"[WSLAgent] Copied {wsl_path} to Windows: {win_path}")
         except Exception as e:
             print(f"[WSLAgent] Failed to copy file to Windows: {e}")
 
     def transfer_file_to_wsl(self, win_path: str, wsl_dest: Optional[str] = None):
-        """Copy a file from Windows to WSL home (or specified path)."""
+        """Copy a file or directory from Windows to WSL home (or a path)."""
+        if not self._require_wsl("Copying from Windows"):
+            return
         try:
             if not wsl_dest:
                 wsl_dest = os.path.expanduser("~")
             # Convert Windows path to WSL path
-            wsl_path = subprocess.check_output(["wslpath", win_path], text=True).strip()
-            subprocess.run(["cp", wsl_path, wsl_dest], check=True)
+            wsl_path = self._wslpath(win_path)
+            self._transfer(wsl_path, wsl_dest)
             print(f"[WSLAgent] Copied {win_path} to WSL: {wsl_dest}")
         except Exception as e:
             print(f"[WSLAgent] Failed to copy file to WSL: {e}")
@@ -61,17 +146,21 @@ class WSLAgentTools:
 
     def shutdown_wsl(self):
         """Shutdown the WSL instance."""
+        if not self._require_wsl("Shutting down WSL"):
+            return
         try:
             print("[WSLAgent] Shutting down WSL...")
-            subprocess.Popen(["wsl.exe", "--shutdown"])
+            self._launch(["wsl.exe", "--shutdown"])
         except Exception as e:
             print(f"[WSLAgent] Failed to shutdown WSL: {e}")
 
     def reboot_wsl(self):
         """Reboot the WSL instance (shutdown and restart)."""
+        if not self._require_wsl("Rebooting WSL"):
+            return
         try:
             print("[WSLAgent] Rebooting WSL...")
-            subprocess.Popen(["wsl.exe", "--shutdown"])
+            self._launch(["wsl.exe", "--shutdown"])
             print("[WSLAgent] Please restart WSL manually.")
         except Exception as e:
             print(f"[WSLAgent] Failed to reboot WSL: {e}")
@@ -80,28 +169,64 @@ class WSLAgentTools:
         """Open the default file manager at the given path (Linux/WSL)."""
         path = path or os.path.expanduser("~")
         try:
-            subprocess.Popen(["xdg-open", path])
-            print(f"[WSLAgent] Opened file manager at: {path}")
+            if self._launch(["xdg-open", path]):
+                print(f"[WSLAgent] Opened file manager at: {path}")
         except Exception as e:
             print(f"[WSLAgent] Failed to open file manager: {e}")
 
     def open_url(self, url: str):
         """Open a URL in the default browser."""
         try:
-            subprocess.Popen(["xdg-open", url])
-            print(f"[WSLAgent] Opened URL: {url}")
+            if self._launch(["xdg-open", url]):
+                print(f"[WSLAgent] Opened URL: {url}")
         except Exception as e:
             print(f"[WSLAgent] Failed to open URL: {e}")
 
-    def run_command(self, command: str):
-        """Run a shell command as the user."""
+    async def run_command_async(self, command: str) -> CommandResult:
+        """Run a shell command, streaming its output as it is produced."""
+        return await run_command(
+            command, timeout=self.timeout, on_output=self._print_output
+        )
+
+    async def run_commands_async(self, commands: Sequence[str]) -> List[CommandResult]:
+        """Run several shell commands at once, bounded by max_concurrency."""
+        pool = CommandPool(self.max_concurrency, self.timeout)
         try:
-            result = subprocess.run(
-                command, shell=True, check=True, capture_output=True, text=True
+            return await pool.run_all(commands, on_output=self._print_output)
+        finally:
+            await pool.cancel_all()
+
+    def _report(self, result: CommandResult):
+        if result.timed_out:
+            print(
+                f"[WSLAgent] Command timed out after {self.timeout:g}s: {result.command}"
             )
-            print(f"[WSLAgent] Command output:\n{result.stdout}")
-        except subprocess.CalledProcessError as e:
-            print(f"[WSLAgent] Command failed: {e.stderr}")
+        elif result.returncode != 0:
+            print(f"[WSLAgent] Command failed ({result.returncode}): {result.command}")
+
+    def run_command(self, command: str) -> Optional[CommandResult]:
+        """Run a shell command as the user."""
+        try:
+            result = asyncio.run(self.run_command_async(command))
+        except KeyboardInterrupt:
+            print("[WSLAgent] Command cancelled.")
+            return None
+        self._report(result)
+        return result
+
+    def run_commands(self, commands: Sequence[str]) -> List[CommandResult]:
+        """Run several shell commands concurrently."""
+        try:
+            results = asyncio.run(self.run_commands_async(commands))
+        except KeyboardInterrupt:
+            print("[WSLAgent] Commands cancelled.")
+            return []
+        for result in results:
+            if isinstance(result, CommandResult):
+                self._report(result)
+            else:
+                print(f"[WSLAgent] Command failed: {result}")
+        return results
 
     def list_home_files(self):
         """List files in the user's home directory."""
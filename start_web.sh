@@ -23,9 +23,20 @@ if [ -f "requirements.min.txt" ]; then
 fi
 
 # Start the web server
+# Usage: ./start_web.sh            Flask development server
+#        ./start_web.sh production  uvicorn, one process (agent state is in memory)
+if [ "$1" = "production" ] || [ "$1" = "prod" ]; then
+    shift
+    echo "Starting production server..."
+    echo "Web interface will be available at: http://localhost:5000"
+    echo "Single process; restart it to pick up changes. Stop with Ctrl+C"
+    echo ""
+    exec python3 test_server.py --production "$@"
+fi
+
 echo "Starting Flask development server..."
 echo "Web interface will be available at: http://localhost:5000"
 echo "Press Ctrl+C to stop the server"
 echo ""
 
-python3 test_server.py
+python3 test_server.py "$@"
@@ -4,15 +4,30 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
+import argparse
+
 from backend_app_Version2 import create_app
+from utils.asgi_server import ServerSettings, add_server_arguments, run_server
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenManus web server")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    if args.production:
+        settings = ServerSettings.from_args(args)
+        print("Starting OpenManus server under uvicorn...")
+        print(f"Server will be available at: http://localhost:{settings.port}")
+        print("Press Ctrl+C to stop the server")
+        run_server(settings)
+        sys.exit(0)
+
     app = create_app()
     print("Starting OpenManus test server...")
-    print("Server will be available at: http://localhost:5000")
+    print(f"Server will be available at: http://localhost:{args.port}")
     print("Press Ctrl+C to stop the server")
     
     try:
-        app.run(host='0.0.0.0', port=5000, debug=True)
+        app.run(host=args.host, port=args.port, debug=True)
     except KeyboardInterrupt:
         print("\nServer stopped.")
@@ -31,3 +31,97 @@ def test_keys_endpoint(monkeypatch):
     post_resp = client.post("/api/keys", json={"NEW": "VALUE2"})
     assert post_resp.status_code == 200
     assert post_resp.get_json().get("status") == "ok"
+
+
+def test_asgi_app_serves_same_routes(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import backend_routes_Version2 as routes
+
+    monkeypatch.setattr(routes, "load_keys", lambda: {"TEST_KEY": "VALUE"})
+
+    from backend_app_Version2 import create_app
+
+    client = TestClient(create_app(asgi=True))
+
+    assert client.get("/").status_code == 200
+    assert client.get("/api/health").json()["status"] == "ok"
+    assert client.get("/api/keys").json() == {"TEST_KEY": "VALUE"}
+
+
+def test_request_timeout_returns_504():
+    import asyncio
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from utils.asgi_server import RequestTimeoutMiddleware
+
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(1)
+        return {}
+
+    app.add_middleware(RequestTimeoutMiddleware, timeout=0.05)
+
+    assert TestClient(app).get("/slow").status_code == 504
+
+
+def test_server_has_no_workers_option():
+    import argparse
+
+    import pytest
+
+    from utils.asgi_server import add_server_arguments
+
+    parser = argparse.ArgumentParser()
+    add_server_arguments(parser)
+    # Agent state is per process, so the server is single-process only
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--production", "--workers", "2"])
+
+
+def test_chat_history_endpoint(monkeypatch, tmp_path):
+    import backend_agent_controller as controller
+    from utils.chat_store import ChatStore
+
+    store = ChatStore(str(tmp_path / "chat.db"))
+    monkeypatch.setattr(controller, "get_chat_store", lambda: store)
+    for i in range(3):
+        store.append("s", "user", f"m{i}")
+
+    from backend_app_Version2 import create_app
+
+    client = create_app().test_client()
+
+    page = client.get("/api/chat/history?session_id=s&limit=2").get_json()
+    assert [m["content"] for m in page["messages"]] == ["m1", "m2"]
+    older = client.get(
+        f"/api/chat/history?session_id=s&before={page['next_cursor']}"
+    ).get_json()
+    assert [m["content"] for m in older["messages"]] == ["m0"]
+    assert client.get("/api/chat/history?limit=x").status_code == 400
+
+
+def test_chat_streams_sse_and_persists_reply(monkeypatch, tmp_path):
+    import backend_agent_controller as controller
+    from utils.chat_store import ChatStore
+
+    store = ChatStore(str(tmp_path / "chat.db"))
+    monkeypatch.setattr(controller, "get_chat_store", lambda: store)
+
+    from backend_app_Version2 import create_app
+
+    client = create_app().test_client()
+    resp = client.post(
+        "/api/chat",
+        json={"input": "hi", "session_id": "s"},
+        headers={"Accept": "text/event-stream"},
+    )
+
+    body = resp.get_data(as_text=True)
+    assert resp.mimetype == "text/event-stream"
+    assert "event: token" in body and "event: done" in body
+    assert [m["content"] for m in store.history("s")["messages"]] == ["hi", "Echo: hi"]
@@ -0,0 +1,28 @@
+import pytest
+
+from examples.benchmarks.runner import compare, run_at_concurrency, run_task
+from examples.benchmarks.tasks import BUILTIN_TASKS
+
+
+@pytest.mark.asyncio
+async def test_run_task_records_each_step():
+    task = BUILTIN_TASKS[1]
+
+    result = await run_task(task, latency_scale=0)
+
+    assert len(result.steps) == len(task.steps)
+    assert result.prompt_tokens == sum(s.prompt_tokens for s in task.steps)
+    assert [s.tool_calls for s in result.steps] == [3, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_report_and_compare():
+    run = await run_at_concurrency(BUILTIN_TASKS, concurrency=2, latency_scale=0)
+
+    assert run["tasks"] == len(BUILTIN_TASKS)
+    assert run["throughput"] > 0
+    assert set(run["steps"]) >= {"llm", "tool", "overhead"}
+    report = {"runs": [run]}
+    assert compare(report, report) == [
+        "concurrency=2: throughput +0.0%, p50 latency +0.0%"
+    ]
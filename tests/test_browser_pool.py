@@ -0,0 +1,98 @@
+import pytest
+
+from utils.browser_pool import BrowserPool, BrowserPoolSettings
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+        self.pages = []
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.handlers = {}
+        self.contexts = []
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def new_context(self, **kwargs):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        pass
+
+
+def make_pool(**settings):
+    browsers = []
+
+    async def factory():
+        browsers.append(FakeBrowser())
+        return browsers[-1]
+
+    settings.setdefault("context_memory_limit_mb", 0)
+    return BrowserPool(BrowserPoolSettings(**settings), factory), browsers
+
+
+@pytest.mark.asyncio
+async def test_contexts_are_isolated_and_reused():
+    pool, browsers = make_pool()
+
+    first = await pool.acquire("a")
+    second = await pool.acquire("b")
+    again = await pool.acquire("a")
+
+    assert first is not second
+    assert first is again
+    assert len(browsers) == 1
+
+
+@pytest.mark.asyncio
+async def test_lru_idle_context_is_evicted():
+    pool, _ = make_pool(max_contexts=2)
+
+    async with pool.lease("a") as ctx_a:
+        pass
+    async with pool.lease("b"):
+        pass
+    await pool.acquire("c")
+
+    assert ctx_a.closed
+    assert pool.snapshot()["evicted"] == 1
+    assert pool.snapshot()["contexts"] == 2
+
+
+@pytest.mark.asyncio
+async def test_crashed_browser_is_relaunched():
+    pool, browsers = make_pool()
+
+    before = await pool.acquire("a")
+    browsers[0].handlers["disconnected"]()
+    after = await pool.acquire("a")
+
+    assert before is not after
+    assert len(browsers) == 2
+    assert pool.snapshot()["crashed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_memory_ceiling_recycles_context(monkeypatch):
+    pool, _ = make_pool(context_memory_limit_mb=100, memory_check_interval=0)
+
+    async def heavy(context):
+        return 500.0
+
+    first = await pool.acquire("a")
+    await pool.release("a")
+    monkeypatch.setattr(BrowserPool, "context_memory_mb", staticmethod(heavy))
+    second = await pool.acquire("a")
+
+    assert first.closed
+    assert second is not first
+    assert pool.snapshot()["recycled"] == 1
@@ -0,0 +1,28 @@
+from utils.chat_store import ChatStore
+
+
+def test_cursor_pagination_walks_back_through_session(tmp_path):
+    store = ChatStore(str(tmp_path / "chat.db"))
+    for i in range(5):
+        store.append("s1", "user", f"m{i}")
+    store.append("s2", "user", "other")
+
+    page = store.history("s1", limit=2)
+    assert [m["content"] for m in page["messages"]] == ["m3", "m4"]
+
+    page = store.history("s1", before=page["next_cursor"], limit=2)
+    assert [m["content"] for m in page["messages"]] == ["m1", "m2"]
+
+    page = store.history("s1", before=page["next_cursor"], limit=2)
+    assert [m["content"] for m in page["messages"]] == ["m0"]
+    assert page["next_cursor"] is None
+
+
+def test_clear_only_affects_one_session(tmp_path):
+    store = ChatStore(str(tmp_path / "chat.db"))
+    store.append("s1", "user", "a")
+    store.append("s2", "user", "b")
+
+    assert store.clear("s1") == 1
+    assert store.history("s1")["messages"] == []
+    assert len(store.history("s2")["messages"]) == 1
@@ -0,0 +1,137 @@
+import pytest
+
+from utils.checkpoint import (
+    CheckpointError,
+    RunLog,
+    agent_checkpoint,
+    checkpoint_agent,
+    checkpoint_flow,
+    restore_agent,
+    restore_flow,
+)
+
+
+class Msg(dict):
+    def model_dump(self, exclude_none=True):
+        return dict(self)
+
+
+class Memory:
+    def __init__(self):
+        self.messages = []
+
+
+class FakeAgent:
+    name = "fake"
+
+    def __init__(self):
+        self.memory = Memory()
+        self.current_step = 0
+
+    async def step(self):
+        self.memory.messages.append(Msg(role="tool", content=f"r{self.current_step}"))
+        return "ok"
+
+
+class FakePlanningTool:
+    def __init__(self):
+        self.plans = {}
+
+
+class FakeFlow:
+    def __init__(self, agent):
+        self.agents = {"manus": agent}
+        self.planning_tool = FakePlanningTool()
+        self.active_plan_id = None
+        self.current_step_index = None
+
+    async def _create_initial_plan(self, text):
+        self.active_plan_id = "plan_1"
+        self.planning_tool.plans["plan_1"] = {
+            "steps": ["a", "b"],
+            "step_statuses": ["not_started"] * 2,
+        }
+
+    async def _execute_step(self, index):
+        self.current_step_index = index
+        self.planning_tool.plans["plan_1"]["step_statuses"][index] = "completed"
+        await self.agents["manus"].step()
+
+
+@pytest.mark.asyncio
+async def test_agent_checkpoint_and_restore(tmp_path):
+    log = RunLog("r1", root=str(tmp_path))
+    log.append("start", prompt="hi")
+    agent = FakeAgent()
+    checkpoint_agent(agent, log)
+    for agent.current_step in (1, 2):
+        await agent.step()
+
+    resumed = FakeAgent()
+    restore_agent(resumed, agent_checkpoint(log), message_type=Msg)
+
+    assert resumed.current_step == 2
+    assert [m["content"] for m in resumed.memory.messages] == ["r1", "r2"]
+    # Each record holds only the step's new messages
+    assert [len(r["agent"]["memory"]) for r in log.records()[1:]] == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_trimmed_memory_is_rebuilt(tmp_path):
+    log = RunLog("r4", root=str(tmp_path))
+    agent = FakeAgent()
+    checkpoint_agent(agent, log)
+    for agent.current_step in range(1, 6):
+        await agent.step()
+        # Like Memory(max_messages=3), which keeps only the newest messages
+        del agent.memory.messages[:-3]
+    agent.memory.messages = [Msg(role="user", content="rewritten")]
+    await agent.step()
+
+    snapshot = agent_checkpoint(log)
+    assert [m["content"] for m in snapshot["memory"]] == ["rewritten", "r5"]
+    kinds = [r["agent"].get("memory_drop") for r in log.records()]
+    assert kinds == [None, 0, 0, 0, 1, None]
+
+
+@pytest.mark.asyncio
+async def test_flow_resumes_with_completed_steps(tmp_path):
+    log = RunLog("r2", root=str(tmp_path))
+    flow = FakeFlow(FakeAgent())
+    checkpoint_flow(flow, log)
+    await flow._create_initial_plan("task")
+    await flow._execute_step(0)
+    # A crash while writing the next record leaves a torn line
+    with open(log.path, "a") as f:
+        f.write('{"seq": 9, "kind": "flow')
+
+    resumed = FakeFlow(FakeAgent())
+    restore_flow(resumed, log.latest("flow_step")["flow"], message_type=Msg)
+
+    plan = resumed.planning_tool.plans["plan_1"]
+    assert plan["step_statuses"] == ["completed", "not_started"]
+    assert len(resumed.agents["manus"].memory.messages) == 1
+
+
+def test_unknown_run_cannot_resume(tmp_path):
+    with pytest.raises(CheckpointError):
+        RunLog("missing", root=str(tmp_path)).start_record()
+
+
+def test_run_resumes_only_from_its_entry_point(tmp_path):
+    log = RunLog("r5", root=str(tmp_path))
+    log.append("start", entry="flow", prompt="hi")
+    assert log.start_record(entry="flow")["prompt"] == "hi"
+    with pytest.raises(CheckpointError, match="flow entry point"):
+        log.start_record(entry="main")
+
+
+def test_append_after_crash_drops_torn_line(tmp_path):
+    log = RunLog("r3", root=str(tmp_path))
+    log.append("start", prompt="hi")
+    with open(log.path, "a") as f:
+        f.write('{"seq": 2, "kin')
+
+    RunLog("r3", root=str(tmp_path)).append("finish")
+
+    assert [r["kind"] for r in log.records()] == ["start", "finish"]
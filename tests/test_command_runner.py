@@ -0,0 +1,78 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+from scripts.wsl_agent_tools import WSLAgentTools
+from utils.command_runner import CommandPool, run_command
+
+
+@pytest.mark.asyncio
+async def test_output_is_streamed_per_line():
+    seen = []
+    result = await run_command(
+        [sys.executable, "-c", "import sys; print('a'); print('b', file=sys.stderr)"],
+        on_output=lambda stream, line: seen.append((stream, line)),
+    )
+    assert result.ok
+    assert result.stdout == "a\n"
+    assert result.stderr == "b\n"
+    assert sorted(seen) == [("stderr", "b\n"), ("stdout", "a\n")]
+
+
+@pytest.mark.asyncio
+async def test_lines_longer_than_the_stream_limit():
+    result = await run_command([sys.executable, "-c", "print('x' * 100000)"])
+    assert result.ok
+    assert result.stdout == "x" * 100000 + "\n"
+
+
+@pytest.mark.asyncio
+async def test_timeout_kills_the_process_group():
+    started = time.monotonic()
+    # The shell's child sleep would keep the pipes open if it survived
+    result = await run_command("echo start; sleep 30; echo never", timeout=0.3)
+    assert result.timed_out and not result.ok
+    assert result.stdout == "start\n"
+    assert time.monotonic() - started < 5
+
+
+@pytest.mark.asyncio
+async def test_timeout_covers_commands_that_close_their_output():
+    started = time.monotonic()
+    result = await run_command("exec >/dev/null 2>&1; sleep 8", timeout=0.5)
+    assert result.timed_out and not result.ok
+    assert time.monotonic() - started < 5
+
+
+@pytest.mark.asyncio
+async def test_cancellation_stops_the_command():
+    task = asyncio.ensure_future(run_command("sleep 30"))
+    await asyncio.sleep(0.2)
+    task.cancel()
+    started = time.monotonic()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert time.monotonic() - started < 5
+
+
+@pytest.mark.asyncio
+async def test_pool_bounds_concurrency():
+    pool = CommandPool(max_concurrency=2)
+    started = time.monotonic()
+    results = await pool.run_all(["sleep 0.3; echo %d" % i for i in range(4)])
+    elapsed = time.monotonic() - started
+    assert [r.stdout for r in results] == ["0\n", "1\n", "2\n", "3\n"]
+    assert 0.6 <= elapsed < 3
+
+
+def test_tools_report_failures_and_timeouts(capsys):
+    tools = WSLAgentTools(timeout=0.3)
+    assert tools.run_command("echo hello").ok
+    tools.run_command("exit 3")
+    tools.run_command("sleep 10")
+    out = capsys.readouterr().out
+    assert "[WSLAgent] hello" in out
+    assert "Command failed (3)" in out
+    assert "timed out" in out
@@ -0,0 +1,107 @@
+import os
+import time
+
+import pytest
+
+import utils.config_snapshot
+from utils.config_snapshot import ConfigError, ConfigLoader
+
+
+CONFIG = """
+[llm]
+provider = "openai"
+
+[llm.openai]
+model = "gpt-4o"
+api_key = "${OpenAI}"
+max_tokens = 4096
+"""
+
+
+@pytest.fixture
+def files(tmp_path):
+    config = tmp_path / "config.toml"
+    keys = tmp_path / "keys.txt"
+    config.write_text(CONFIG)
+    keys.write_text("OpenAI=sk-test\n")
+    (tmp_path / "mcp.json").write_text('{"mcpServers": {"s": {"type": "sse"}}}')
+    return config, keys, tmp_path / "cache"
+
+
+def make_loader(files):
+    config, keys, cache = files
+    return ConfigLoader(str(config), str(keys), cache_dir=str(cache))
+
+
+def test_snapshot_is_resolved_and_frozen(files):
+    snapshot = make_loader(files).current()
+
+    assert snapshot.llm["api_key"] == "sk-test"
+    assert snapshot.get("llm.openai.model") == "gpt-4o"
+    assert "s" in snapshot.mcp_servers
+    with pytest.raises(TypeError):
+        snapshot.data["llm"]["provider"] = "other"
+
+
+def test_compiled_result_is_reused_from_disk(files, monkeypatch):
+    first = make_loader(files).current()
+
+    def fail(*args):
+        raise AssertionError("recompiled")
+
+    monkeypatch.setattr(ConfigLoader, "_compile", fail)
+    monkeypatch.setattr(utils.config_snapshot, "validate", fail)
+    cached = make_loader(files).current()
+    assert cached.digest == first.digest
+    assert cached.llm["api_key"] == "sk-test"
+
+
+def test_refresh_reloads_and_notifies(files):
+    config, keys, _ = files
+    loader = make_loader(files)
+    loader.current()
+    seen = []
+    loader.subscribe(
+        lambda new, old: seen.append((old.llm["api_key"], new.llm["api_key"]))
+    )
+
+    assert loader.refresh() is False
+    keys.write_text("OpenAI=sk-rotated\n")
+    os.utime(keys, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+
+    assert loader.refresh() is True
+    assert seen == [("sk-test", "sk-rotated")]
+
+
+def test_invalid_config_raises(files):
+    config, _, _ = files
+    config.write_text('[llm]\nprovider = "missing"\n')
+
+    with pytest.raises(ConfigError):
+        make_loader(files).current()
+
+    config.write_text(CONFIG)
+    (config.parent / "mcp.json").write_text("[1, 2]")
+    with pytest.raises(ConfigError, match="mcp"):
+        make_loader(files).current()
+
+
+def test_mcp_json_extends_the_mcp_table(files):
+    config, _, _ = files
+    config.write_text(CONFIG + '\n[mcp]\nserver_reference = "app.mcp.server"\n')
+    snapshot = make_loader(files).current()
+    assert snapshot.get("mcp.server_reference") == "app.mcp.server"
+    assert "s" in snapshot.mcp_servers
+
+
+def test_env_placeholders_are_resolved_per_process_and_not_cached(files, monkeypatch):
+    config, _, cache = files
+    config.write_text(CONFIG + 'search_key = "${MYKEY}"\n')
+    monkeypatch.setenv("MYKEY", "first-secret")
+    assert make_loader(files).current().get("llm.openai.search_key") == "first-secret"
+
+    monkeypatch.setenv("MYKEY", "second-secret")
+    assert make_loader(files).current().get("llm.openai.search_key") == "second-secret"
+    for path in cache.iterdir():
+        blob = path.read_bytes()
+        assert b"secret" not in blob and b"sk-test" not in blob
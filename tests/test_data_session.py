@@ -0,0 +1,125 @@
+import json
+import os
+
+import pytest
+
+from utils.data_session import DataSession, DataSessionError, DataSessionTool
+
+
+CSV = """id,city,price,qty,note
+1,Paris,10.5,2,
+2,Berlin,3,1,x
+3,Paris,,5,y
+4,Rome,7.25,2,
+5,Berlin,12,n/a,z
+"""
+
+
+@pytest.fixture
+def session(tmp_path):
+    path = tmp_path / "orders.csv"
+    path.write_text(CSV)
+    session = DataSession(str(tmp_path / "cache"))
+    session.load(str(path))
+    return session
+
+
+def test_columns_are_typed_and_cached(session, tmp_path):
+    data = session.get("orders")
+    assert data.rows == 5
+    assert data.kinds == {
+        "id": "int",
+        "city": "category",
+        "price": "float",
+        "qty": "float",
+        "note": "category",
+    }
+    # A second session maps the cache instead of parsing the CSV again
+    other = DataSession(str(tmp_path / "cache"))
+    cached = other.cache_path(str(tmp_path / "orders.csv"))
+    assert os.path.exists(os.path.join(cached, "manifest.json"))
+    assert other.load(str(tmp_path / "orders.csv"), "again").rows == 5
+
+    # Editing the file invalidates the cache
+    (tmp_path / "orders.csv").write_text(CSV + "6,Oslo,1,1,\n")
+    assert other.load(str(tmp_path / "orders.csv")).rows == 6
+    assert len(os.listdir(tmp_path / "cache")) == 1
+
+
+def test_select_filters_and_sorts(session):
+    data = session.get("orders")
+    result = data.select(
+        ["id", "price"],
+        where=[["city", "in", ["Paris", "Berlin"]], ["price", ">", 5]],
+        sort_by="price",
+        descending=True,
+    )
+    assert result == {
+        "matched": 2,
+        "columns": ["id", "price"],
+        "rows": [[5, 12.0], [1, 10.5]],
+    }
+    assert data.select(["id"], where=[["price", "is null"]])["rows"] == [[3]]
+    assert data.select(["id"], where=[["city", "contains", "ER"]])["rows"] == [[2], [5]]
+    # Missing prices sort last in both directions
+    for descending in (False, True):
+        ids = data.select(["id"], sort_by="price", descending=descending)["rows"]
+        assert ids[-1] == [3]
+
+
+def test_text_after_numeric_chunks_becomes_category(tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.data_session.CHUNK_ROWS", 2)
+    path = tmp_path / "codes.csv"
+    path.write_text("id,code\n1,1\n2,2.5\n3,\n4,B7\n")
+    data = DataSession(str(tmp_path / "cache")).load(str(path))
+    assert data.kinds == {"id": "int", "code": "category"}
+    assert data.select(["code"])["rows"] == [["1"], ["2.5"], [""], ["B7"]]
+
+
+def test_group_by_aggregates(session):
+    result = session.get("orders").aggregate(
+        {"price": ["mean", "min", "max", "nunique"], "id": "count"},
+        group_by=["city"],
+        sort_by="count(id)",
+    )
+    assert result["columns"] == [
+        "city",
+        "mean(price)",
+        "min(price)",
+        "max(price)",
+        "nunique(price)",
+        "count(id)",
+    ]
+    rows = {row[0]: row[1:] for row in result["rows"]}
+    assert rows["Paris"] == [10.5, 10.5, 10.5, 1, 2]
+    assert rows["Berlin"] == [7.5, 3.0, 12.0, 2, 2]
+    assert rows["Rome"] == [7.25, 7.25, 7.25, 1, 1]
+    total = session.get("orders").aggregate({"qty": ["sum", "count"]})
+    assert total["rows"] == [[10.0, 5]]
+
+
+@pytest.mark.asyncio
+async def test_tool_reports_errors_to_the_agent(session):
+    tool = DataSessionTool(session)
+    assert tool.to_param()["function"]["name"] == "data_session"
+    described = json.loads(await tool(command="describe"))
+    assert described["columns"]["city"]["unique"] == 3
+    assert (await tool(command="select", where=[["nope", "==", 1]])).startswith(
+        "Error: Unknown column 'nope'"
+    )
+    with pytest.raises(DataSessionError):
+        session.get("missing")
+
+
+@pytest.mark.asyncio
+async def test_condition_values_are_checked(session):
+    tool = DataSessionTool(session)
+    reply = await tool(command="select", where=[["price", ">", "abc"]])
+    assert reply.startswith("Error: Column 'price' is numeric")
+    assert (await tool(command="select", where=[["id", "in", [1, None]]])).startswith(
+        "Error:"
+    )
+    # A scalar for "in" is a list of one, not a string of characters
+    data = session.get("orders")
+    assert data.select(["id"], where=[["city", "in", "Rome"]])["rows"] == [[4]]
+    assert data.select(["id"], where=[["qty", "in", 5]])["rows"] == [[3]]
@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from utils.file_editor import FileEditError, IndexedFileEditor, LineIndex
+
+
+@pytest.fixture
+def sample(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text("".join(f"<p>line {i}</p>\n" for i in range(1, 501)))
+    return path
+
+
+def test_view_range(sample):
+    editor = IndexedFileEditor()
+
+    text, first = editor.view(str(sample), [10, 12])
+
+    assert first == 10
+    assert text.splitlines() == ["<p>line 10</p>", "<p>line 11</p>", "<p>line 12</p>"]
+    assert editor.view(str(sample), [500, -1])[0] == "<p>line 500</p>"
+    with pytest.raises(FileEditError):
+        editor.view(str(sample), [0, 3])
+
+
+def test_str_replace_insert_and_undo(sample):
+    editor = IndexedFileEditor()
+    original = sample.read_text()
+
+    line = editor.str_replace(str(sample), "<p>line 250</p>\n", "<p>a</p>\n<p>b</p>\n")
+    editor.insert(str(sample), 0, "<html>")
+
+    assert line == 250
+    assert editor.view(str(sample), [251, 252])[0] == "<p>a</p>\n<p>b</p>"
+    assert editor.index(str(sample)).line_count == 502
+
+    editor.undo(str(sample))
+    editor.undo(str(sample))
+    assert sample.read_text() == original
+
+
+def test_undo_refuses_after_external_change(sample):
+    editor = IndexedFileEditor()
+    editor.str_replace(str(sample), "<p>line 250</p>", "<p>edited</p>")
+    sample.write_text(sample.read_text().replace("<p>edited</p>", "<p>mine</p>"))
+    changed = sample.read_text()
+
+    with pytest.raises(FileEditError, match="modified since"):
+        editor.undo(str(sample))
+    assert sample.read_text() == changed
+
+
+def test_str_replace_requires_unique_match(sample):
+    editor = IndexedFileEditor()
+
+    with pytest.raises(FileEditError, match="Multiple occurrences"):
+        editor.str_replace(str(sample), "<p>line 1", "x")
+    with pytest.raises(FileEditError, match="did not appear"):
+        editor.str_replace(str(sample), "missing", "x")
+
+
+def test_cache_invalidated_by_external_write(sample):
+    editor = IndexedFileEditor()
+    editor.index(str(sample))
+
+    sample.write_text("one\ntwo\n")
+
+    assert editor.index(str(sample)).line_count == 2
+
+
+def test_incremental_index_matches_rebuild(tmp_path):
+    rng = random.Random(7)
+    path = tmp_path / "f.txt"
+    path.write_text("a\nbb\n\nccc\nd")
+    editor = IndexedFileEditor()
+    for _ in range(200):
+        data = path.read_bytes()
+        start = rng.randrange(len(data) + 1)
+        old = data[start : start + rng.randrange(4)].decode()
+        new = rng.choice(["", "x", "\n", "y\nz", "\n\n"])
+        if old and data.count(old.encode()) == 1:
+            editor.str_replace(str(path), old, new)
+        else:
+            editor.insert(
+                str(path), rng.randrange(editor.index(str(path)).line_count + 1), new
+            )
+        cached = editor.index(str(path))
+        fresh = LineIndex.build(str(path))
+        assert list(cached.starts) == list(fresh.starts)
+        assert cached.size == fresh.size
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from utils.file_transfer import FileTransfer, TransferStats
+
+
+@pytest.fixture
+def tree(tmp_path):
+    src = tmp_path / "wsl"
+    (src / "nested").mkdir(parents=True)
+    for i in range(20):
+        (src / f"small{i}.txt").write_text(f"file {i}\n" * 10)
+    (src / "nested" / "large.bin").write_bytes(os.urandom(300_000))
+    (src / "empty").write_bytes(b"")
+    return src, tmp_path / "windows"
+
+
+def listing(root):
+    return {
+        os.path.relpath(os.path.join(dirpath, name), root): open(
+            os.path.join(dirpath, name), "rb"
+        ).read()
+        for dirpath, _, files in os.walk(root)
+        for name in files
+    }
+
+
+def test_directory_copy_with_chunked_large_file(tree):
+    src, dst = tree
+    seen = []
+    stats = FileTransfer(
+        workers=4, chunk_size=64 * 1024, verify=True, on_progress=seen.append
+    ).transfer(str(src), str(dst))
+    assert listing(dst) == listing(src)
+    assert stats.files_copied == stats.files_total == 22
+    assert stats.bytes_copied == stats.bytes_total
+    assert not stats.errors
+    assert seen and seen[-1].throughput > 0
+    big = os.stat(dst / "nested" / "large.bin")
+    assert big.st_mtime_ns == os.stat(src / "nested" / "large.bin").st_mtime_ns
+
+
+def test_second_transfer_skips_unchanged_files(tree):
+    src, dst = tree
+    FileTransfer().transfer(str(src), str(dst))
+    (src / "small3.txt").write_text("changed and longer\n")
+
+    stats = FileTransfer().transfer(str(src), str(dst))
+    assert stats.files_copied == 1
+    assert stats.files_skipped == 21
+    assert (dst / "small3.txt").read_text() == "changed and longer\n"
+
+
+def test_hash_compare_catches_same_size_edits(tree):
+    src, dst = tree
+    FileTransfer().transfer(str(src), str(dst))
+    path = src / "small0.txt"
+    stat = os.stat(path)
+    path.write_text(path.read_text().upper())
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert FileTransfer().transfer(str(src), str(dst)).files_copied == 0
+    stats = FileTransfer(compare="hash").transfer(str(src), str(dst))
+    assert stats.files_copied == 1
+    assert (dst / "small0.txt").read_text() == path.read_text()
+
+
+def test_errors_are_reported_per_file(tmp_path):
+    stats = TransferStats()
+    transfer = FileTransfer()
+    transfer._transfer_file(
+        str(tmp_path / "missing"), str(tmp_path / "out"), os.stat(tmp_path), stats
+    )
+    assert stats.errors and stats.files_copied == 0
+    assert not any(name.startswith("out") for name in os.listdir(tmp_path))
+
+
+def test_same_size_edit_within_two_seconds_is_copied(tree):
+    src, dst = tree
+    FileTransfer().transfer(str(src), str(dst))
+    path = src / "small1.txt"
+    stat = os.stat(path)
+    path.write_text(path.read_text().replace("file", "FILE"))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 500_000_000))
+
+    assert FileTransfer().transfer(str(src), str(dst)).files_copied == 1
+    assert (dst / "small1.txt").read_text() == path.read_text()
+    # An explicit tolerance (e.g. for a FAT target) still skips it
+    path.write_text(path.read_text().lower())
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 900_000_000))
+    tolerant = FileTransfer(mtime_tolerance_ns=2 * 10**9)
+    assert tolerant.transfer(str(src), str(dst)).files_copied == 0
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from utils.llm_replay import LatencyModel, ReplayMissError, wrap_client
+
+
+def completion(text):
+    return ChatCompletion.model_validate(
+        {
+            "id": "c1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": text},
+                }
+            ],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+        }
+    )
+
+
+def chunk(text):
+    return ChatCompletionChunk.model_validate(
+        {
+            "id": "c2",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "gpt-4o",
+            "choices": [{"index": 0, "delta": {"content": text}}],
+        }
+    )
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        if params.get("stream"):
+            return self._stream()
+        return completion(params["messages"][-1]["content"].upper())
+
+    async def _stream(self):
+        for text in ("a", "b"):
+            yield chunk(text)
+
+
+class FakeClient:
+    def __init__(self):
+        self.chat = type("Chat", (), {"completions": FakeCompletions()})()
+
+
+def request(text, **extra):
+    return {"model": "gpt-4o", "messages": [{"role": "user", "content": text}], **extra}
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay_offline(tmp_path):
+    path = str(tmp_path / "llm.jsonl")
+    recorder = wrap_client(FakeClient(), record=path)
+    await recorder.chat.completions.create(**request("hi"))
+    stream = await recorder.chat.completions.create(**request("s", stream=True))
+    assert [c.choices[0].delta.content async for c in stream] == ["a", "b"]
+
+    lines = [json.loads(line) for line in open(path)]
+    assert len(lines) == 2 and "request" not in lines[0]
+
+    replay = wrap_client(None, replay=path, strict=True)
+    response = await replay.chat.completions.create(**request("hi"))
+    assert response.choices[0].message.content == "HI"
+    assert response.usage.prompt_tokens == 3
+    stream = await replay.chat.completions.create(**request("s", stream=True))
+    assert [c.choices[0].delta.content async for c in stream] == ["a", "b"]
+
+    with pytest.raises(ReplayMissError):
+        await replay.chat.completions.create(**request("hi"))
+
+
+@pytest.mark.asyncio
+async def test_non_strict_replay_falls_back_to_file_order(tmp_path):
+    path = str(tmp_path / "llm.jsonl")
+    recorder = wrap_client(FakeClient(), record=path)
+    await recorder.chat.completions.create(**request("first"))
+    await recorder.chat.completions.create(**request("second"))
+
+    replay = wrap_client(None, replay=path)
+    changed = await replay.chat.completions.create(**request("first at 10:01"))
+    exact = await replay.chat.completions.create(**request("second"))
+
+    assert changed.choices[0].message.content == "FIRST"
+    assert exact.choices[0].message.content == "SECOND"
+
+
+def test_latency_model():
+    assert LatencyModel().delay(2.0) == 0.0
+    assert LatencyModel("recorded*0.5").delay(2.0) == 1.0
+    assert LatencyModel("fixed:0.25").delay(2.0) == 0.25
+    assert LatencyModel("lognormal:0,0.1").delay(0) > 0
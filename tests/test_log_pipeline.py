@@ -0,0 +1,54 @@
+import json
+import logging
+import queue
+
+from utils.log_pipeline import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    SamplingFilter,
+    SizeTimeRotatingFileHandler,
+    parse_sample_rates,
+)
+
+
+def make_record(name="app.agent", level=logging.INFO, msg="step %d", args=(1,)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_json_formatter_includes_extra_fields():
+    record = make_record()
+    record.session_id = "abc"
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "step 1"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app.agent"
+    assert entry["session_id"] == "abc"
+    assert "args" not in entry
+
+
+def test_sampling_keeps_one_in_n_and_all_warnings():
+    sampler = SamplingFilter(parse_sample_rates("app=0.5,app.agent=0.25"))
+    kept = [sampler.filter(make_record()) for _ in range(8)]
+    assert kept.count(True) == 2
+    assert sum(sampler.filter(make_record("app.tool")) for _ in range(8)) == 4
+    assert all(sampler.filter(make_record(level=logging.WARNING)) for _ in range(8))
+    assert sampler.filter(make_record("other"))
+
+
+def test_file_handler_rotates_by_size(tmp_path):
+    path = tmp_path / "openmanus.jsonl"
+    handler = SizeTimeRotatingFileHandler(str(path), max_bytes=200, backup_count=2)
+    handler.setFormatter(JsonFormatter())
+    for i in range(20):
+        handler.emit(make_record(args=(i,)))
+    handler.close()
+    assert (tmp_path / "openmanus.jsonl.1").exists()
+    assert not (tmp_path / "openmanus.jsonl.3").exists()
+
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(1))
+    before = DroppingQueueHandler.dropped
+    handler.handle(make_record())
+    handler.handle(make_record())
+    assert DroppingQueueHandler.dropped == before + 1
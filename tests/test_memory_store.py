@@ -0,0 +1,104 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from utils.memory_store import (
+    HashingEmbedder,
+    MemoryStore,
+    remember_tool_results,
+    with_memories,
+)
+
+
+TASKS = [
+    "Scrape the product prices from the shop website into a CSV file",
+    "Plot monthly sales from sales.csv as a bar chart",
+    "Summarize the attached PDF report in five bullet points",
+    "Write a Python script that renames photos by their EXIF date",
+]
+
+
+def test_import_does_not_load_numpy():
+    code = "import sys, utils.memory_store; print(sorted(sys.modules))"
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert "'numpy.linalg'" not in out.stdout
+
+
+def test_embedder_is_deterministic_and_normalized():
+    embed = HashingEmbedder(64)
+    a, b = embed(["plot a chart", "plot a chart"])
+    assert np.allclose(a, b)
+    assert np.isclose(np.linalg.norm(a), 1.0)
+
+
+def test_search_ranks_similar_tasks_first(tmp_path):
+    store = MemoryStore(str(tmp_path))
+    store.add_many(TASKS)
+    hits = store.search("make a bar chart of the sales csv", k=2)
+    assert hits[0].text == TASKS[1]
+    assert hits[0].score > hits[1].score
+    assert store.search("anything", kind="tool") == []
+
+
+def test_memories_persist_and_duplicates_are_skipped(tmp_path):
+    store = MemoryStore(str(tmp_path))
+    first = store.add(TASKS[0], source="test")
+    assert store.add(TASKS[0]) == first
+    store.close()
+
+    # A torn line from a crash is dropped on reopen
+    with open(tmp_path / "meta.jsonl", "a") as f:
+        f.write('{"id": 1, "kin')
+    reopened = MemoryStore(str(tmp_path))
+    assert len(reopened) == 1
+    assert reopened.search(TASKS[0])[0].meta == {"source": "test"}
+    reopened.add(TASKS[2])
+    assert len(MemoryStore(str(tmp_path))) == 2
+
+
+def test_ivf_index_finds_exact_matches(tmp_path):
+    rng = np.random.default_rng(1)
+    words = "alpha beta gamma delta csv plot chart pdf python sort".split()
+    texts = [" ".join(rng.choice(words, 5)) + f" job{i}" for i in range(600)]
+    store = MemoryStore(str(tmp_path), dedupe_threshold=1.0)
+    store.add_many(texts)
+    store.train(clusters=8)
+    for i in (0, 123, 599):
+        assert store.search(texts[i], k=1)[0].id == i
+    assert MemoryStore(str(tmp_path))._centroids.shape == (8, store.dim)
+
+
+@pytest.mark.asyncio
+async def test_tool_results_are_remembered(tmp_path):
+    class Function:
+        name = "python_execute"
+        arguments = '{"code": "print(2 + 2)"}'
+
+    class Command:
+        function = Function()
+
+    class Agent:
+        output = "4"
+
+        async def execute_tool(self, command):
+            # Same wrapping as ToolCallAgent.execute_tool
+            return f"Observed output of cmd `python_execute` executed:\n{self.output}"
+
+    store = MemoryStore(str(tmp_path))
+    agent = Agent()
+    remember_tool_results(agent, store)
+    assert (await agent.execute_tool(Command())).endswith("executed:\n4")
+    hit = store.search("python print", kind="tool")[0]
+    assert hit.meta == {"tool": "python_execute"}
+    assert hit.text.endswith("-> 4")
+
+    agent.output = "Error: NameError: name 'x' is not defined"
+    await agent.execute_tool(Command())
+    assert len(store) == 1
+    assert with_memories("unrelated", MemoryStore(str(tmp_path / "empty"))) == (
+        "unrelated"
+    )
@@ -0,0 +1,83 @@
+import pytest
+
+from utils.page_cache import CachedPage, PageCache, freshness_lifetime
+
+
+HTML = b"<html><body><h1>Title</h1><script>x()</script><p>Hello</p></body></html>"
+
+
+def make_cache(tmp_path, responses):
+    calls = []
+
+    async def fetcher(url, headers):
+        calls.append(dict(headers))
+        return responses.pop(0)
+
+    return PageCache(cache_dir=str(tmp_path), fetcher=fetcher), calls
+
+
+def test_freshness_lifetime():
+    assert freshness_lifetime({"cache-control": "max-age=60"}, 5) == (60.0, False)
+    assert freshness_lifetime({"cache-control": "no-store"}, 5)[0] is None
+    assert freshness_lifetime({"cache-control": "no-cache"}, 5) == (5, True)
+    assert freshness_lifetime({}, 5) == (5, False)
+
+
+@pytest.mark.asyncio
+async def test_fresh_entry_served_without_fetch(tmp_path):
+    cache, calls = make_cache(tmp_path, [(200, {"Cache-Control": "max-age=600"}, HTML)])
+
+    first = await cache.fetch("https://example.com")
+    second = await cache.fetch("https://example.com")
+
+    assert not first.from_cache
+    assert second.from_cache
+    assert second.body == HTML
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_revalidated_with_etag(tmp_path):
+    cache, calls = make_cache(
+        tmp_path,
+        [
+            (200, {"Cache-Control": "max-age=0", "ETag": '"v1"'}, HTML),
+            (304, {"Cache-Control": "max-age=600"}, b""),
+        ],
+    )
+
+    await cache.fetch("https://example.com")
+    page = await cache.fetch("https://example.com")
+
+    assert calls[1]["If-None-Match"] == '"v1"'
+    assert page.revalidated
+    assert page.body == HTML
+
+
+@pytest.mark.asyncio
+async def test_conversion_memoized_by_content(tmp_path):
+    cache, _ = make_cache(
+        tmp_path,
+        [
+            (200, {"Cache-Control": "max-age=600"}, HTML),
+            (200, {"Cache-Control": "max-age=600"}, HTML),
+        ],
+    )
+
+    text = await cache.text("https://a.example.com")
+    page = await cache.fetch("https://b.example.com")
+
+    assert "Hello" in text and "x()" not in text
+    assert (tmp_path / "derived" / f"{page.body_hash}.text").exists()
+    assert await cache.convert(page, "text") == text
+
+
+def test_key_depends_on_headers():
+    assert PageCache.cache_key("u", {"Accept": "a"}) != PageCache.cache_key("u")
+
+
+@pytest.mark.parametrize("charset", ["foo", "base64", "latin-1"])
+def test_html_decodes_with_any_declared_charset(charset):
+    headers = {"content-type": f"text/html; charset={charset}"}
+    page = CachedPage("u", 200, headers, "caf\u00e9".encode("latin-1"), "h")
+    assert page.html.startswith("caf")
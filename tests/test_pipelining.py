@@ -0,0 +1,169 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from openai.types.chat import ChatCompletionChunk
+
+from utils.pipelining import Prefetcher, ToolCallStream, enable_pipelining, extract_urls
+
+
+def chunk(content=None, calls=None, finish=None, usage=None):
+    return ChatCompletionChunk.model_validate(
+        {
+            "id": "c",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "m",
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"content": content, "tool_calls": calls},
+                    "finish_reason": finish,
+                }
+            ],
+            "usage": usage,
+        }
+    )
+
+
+def call_delta(index, id=None, name=None, arguments=""):
+    function = {"arguments": arguments}
+    if name:
+        function["name"] = name
+    return {"index": index, "id": id, "type": "function", "function": function}
+
+
+SEARCH_ARGS = json.dumps({"query": "kernel pipelining"})
+BASH_ARGS = json.dumps({"command": "ls"})
+CHUNKS = [
+    chunk(content="Searching first."),
+    chunk(calls=[call_delta(0, "call_a", "web_search", SEARCH_ARGS[:10])]),
+    chunk(calls=[call_delta(0, arguments=SEARCH_ARGS[10:])]),
+    chunk(calls=[call_delta(1, "call_b", "bash", BASH_ARGS)]),
+    chunk(finish="tool_calls"),
+    chunk(usage={"prompt_tokens": 7, "completion_tokens": 5, "total_tokens": 12}),
+]
+
+
+def test_tool_call_stream_emits_calls_as_they_complete():
+    stream = ToolCallStream()
+    emitted = [[c["id"] for c in stream.feed(c)] for c in CHUNKS]
+    assert emitted == [[], [], ["call_a"], ["call_b"], [], []]
+    assert stream.finish() == []
+
+    message = stream.completion().choices[0].message
+    assert message.content == "Searching first."
+    assert [c.function.arguments for c in message.tool_calls] == [
+        SEARCH_ARGS,
+        BASH_ARGS,
+    ]
+
+
+class FakeCompletions:
+    def __init__(self, delay):
+        self.delay = delay
+        self.requests = []
+
+    async def create(self, **params):
+        self.requests.append(params)
+        if not params.get("stream"):
+            return "plain"
+
+        async def stream():
+            for c in CHUNKS:
+                await asyncio.sleep(self.delay)
+                yield c
+
+        return stream()
+
+
+class FakeAgent:
+    name = "fake"
+
+    def __init__(self, delay=0.02):
+        self.llm = SimpleNamespace(
+            client=SimpleNamespace(
+                chat=SimpleNamespace(completions=FakeCompletions(delay))
+            )
+        )
+        self.memory = SimpleNamespace(
+            messages=[SimpleNamespace(content="Read https://example.com/a.")]
+        )
+        self.available_tools = SimpleNamespace(tool_map={"web_search": None})
+        self.executed = []
+        self.stream_finished_at = None
+        self.tool_calls = []
+
+    async def think(self):
+        # Same shape as LLM.ask_tool, which always sets stream=False
+        response = await self.llm.client.chat.completions.create(
+            model="m", messages=[], tools=[{"type": "function"}], stream=False
+        )
+        self.stream_finished_at = asyncio.get_running_loop().time()
+        self.tool_calls = response.choices[0].message.tool_calls
+        return True
+
+    async def act(self):
+        return [await self.execute_tool(call) for call in self.tool_calls]
+
+    async def execute_tool(self, command):
+        self.executed.append((command.function.name, asyncio.get_running_loop().time()))
+        return f"ran {command.function.name}"
+
+    async def cleanup(self):
+        pass
+
+
+class FakePageCache:
+    def __init__(self):
+        self.urls = []
+
+    async def fetch(self, url):
+        self.urls.append(url)
+
+
+@pytest.mark.asyncio
+async def test_pure_tools_start_before_the_stream_ends():
+    agent = FakeAgent()
+    cache = FakePageCache()
+    stats = enable_pipelining(agent, Prefetcher(page_cache=cache))
+
+    assert await agent.think()
+    assert await agent.act() == ["ran web_search", "ran bash"]
+    (search, search_at), (bash, bash_at) = agent.executed
+    assert search == "web_search" and search_at < agent.stream_finished_at
+    assert bash == "bash" and bash_at >= agent.stream_finished_at
+    assert stats.speculative_calls == stats.speculative_hits == 1
+    request = agent.llm.client.chat.completions._completions.requests[-1]
+    assert request["stream"] is True
+
+    await agent.cleanup()
+    assert cache.urls == ["https://example.com/a"]
+    assert stats.prefetched_urls == 1
+
+
+@pytest.mark.asyncio
+async def test_requests_outside_think_are_not_streamed():
+    agent = FakeAgent()
+    enable_pipelining(agent, Prefetcher())
+    completions = agent.llm.client.chat.completions
+    assert await completions.create(model="m", tools=[{}]) == "plain"
+    assert "stream" not in completions._completions.requests[-1]
+
+
+@pytest.mark.asyncio
+async def test_prefetch_failures_are_counted_not_raised():
+    async def broken(agent):
+        raise RuntimeError("no sandbox")
+
+    prefetcher = Prefetcher(warmers=[broken])
+    prefetcher.schedule(FakeAgent())
+    await asyncio.sleep(0.01)
+    assert prefetcher.pending == 0
+    assert prefetcher.stats.prefetch_errors == 1
+
+
+def test_extract_urls_strips_punctuation_and_duplicates():
+    text = "See (https://a.io/x), https://a.io/x. and http://b.org/?q=1!"
+    assert extract_urls(text) == ["https://a.io/x", "http://b.org/?q=1"]
@@ -0,0 +1,61 @@
+import pytest
+
+from utils.python_kernel import KernelPool, PythonKernel
+
+
+@pytest.fixture
+def kernel():
+    kernel = PythonKernel(preload=()).start()
+    yield kernel
+    kernel.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_state_persists_between_calls(kernel):
+    await kernel.execute("import math\nx = 21")
+    result = await kernel.execute("print(math.floor(x * 2.0))")
+
+    assert result == {"observation": "42\n", "success": True}
+
+
+@pytest.mark.asyncio
+async def test_output_is_streamed(kernel):
+    events = [e async for e in kernel.stream("print('a')\nprint('b')")]
+
+    assert [e.kind for e in events] == ["stdout"] * 4 + ["done"]
+
+
+@pytest.mark.asyncio
+async def test_errors_keep_kernel(kernel):
+    await kernel.execute("y = 1")
+    result = await kernel.execute("raise ValueError('boom')")
+
+    assert not result["success"]
+    assert "ValueError: boom" in result["observation"]
+    assert (await kernel.execute("print(y)"))["observation"] == "1\n"
+
+
+@pytest.mark.asyncio
+async def test_timeout_and_crash_restart(kernel):
+    result = await kernel.execute("import time\ntime.sleep(10)", timeout=0.5)
+    assert not result["success"] and "timeout" in result["observation"]
+
+    result = await kernel.execute("import os\nos._exit(3)")
+    assert not result["success"] and "exit code 3" in result["observation"]
+
+    assert kernel.restarts == 2
+    assert (await kernel.execute("print('ok')"))["success"]
+
+
+@pytest.mark.asyncio
+async def test_pool_binds_kernel_per_session():
+    pool = KernelPool(size=1, preload=())
+    try:
+        pool.warm()
+        first = pool.acquire("s1")
+        assert pool.acquire("s1") is first
+        assert pool.acquire("s2") is not first
+        pool.release("s1")
+        assert not first.alive
+    finally:
+        pool.shutdown()
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from utils.request_scheduler import RequestScheduler, parse_weights
+
+
+def recorder(log, name, delay=0.01):
+    async def work():
+        log.append(("start", name))
+        await asyncio.sleep(delay)
+        log.append(("end", name))
+        return name
+
+    return work
+
+
+@pytest.mark.asyncio
+async def test_same_context_is_serialized_and_others_run_in_parallel():
+    scheduler = RequestScheduler(max_concurrency=4)
+    log = []
+    results = await asyncio.gather(
+        scheduler.run(recorder(log, "a1"), context_id="a"),
+        scheduler.run(recorder(log, "a2"), context_id="a"),
+        scheduler.run(recorder(log, "b1"), context_id="b"),
+    )
+    assert results == ["a1", "a2", "b1"]
+    assert log.index(("end", "a1")) < log.index(("start", "a2"))
+    assert log.index(("start", "b1")) < log.index(("end", "a1"))
+
+
+@pytest.mark.asyncio
+async def test_weighted_fair_share_across_clients():
+    scheduler = RequestScheduler(max_concurrency=1, weights={"gold": 2})
+    log = []
+    blocker = asyncio.ensure_future(scheduler.run(recorder(log, "warmup", 0.02)))
+    await asyncio.sleep(0)
+    jobs = [
+        scheduler.run(recorder(log, f"{client}{i}", 0), client_id=client)
+        for client in ("free", "gold")
+        for i in range(4)
+    ]
+    await asyncio.gather(blocker, *jobs)
+
+    order = [name for event, name in log if event == "start"][1:]
+    # Gold gets two slots for each one of free's while both are backlogged
+    assert order[:6] == ["gold0", "free0", "gold1", "gold2", "free1", "gold3"]
+    clients = scheduler.snapshot()["clients"]
+    assert clients["gold"]["completed"] == 4
+    assert clients["free"]["queue_time"]["count"] == 4
+
+
+@pytest.mark.asyncio
+async def test_cancel_queued_and_running_requests():
+    scheduler = RequestScheduler(max_concurrency=1)
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(10)
+
+    running = asyncio.ensure_future(scheduler.run(slow, task_id="t1"))
+    queued = asyncio.ensure_future(scheduler.run(slow, task_id="t2"))
+    await started.wait()
+
+    assert scheduler.cancel("t2")
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+    assert scheduler.cancel("t1")
+    with pytest.raises(asyncio.CancelledError):
+        await running
+    assert not scheduler.cancel("t1")
+
+    snapshot = scheduler.snapshot()
+    assert snapshot["running"] == snapshot["queued"] == 0
+    assert snapshot["clients"]["anonymous"]["cancelled"] == 2
+
+
+def test_parse_weights():
+    assert parse_weights("alice=3, bob=0.5,") == {"alice": 3.0, "bob": 0.5}
+    assert parse_weights(None) == {}
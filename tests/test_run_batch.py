@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import pytest
+
+from run_batch import BatchRunner, load_jobs
+
+
+class EchoAgent:
+    active = 0
+    peak = 0
+
+    async def run(self, prompt):
+        EchoAgent.active += 1
+        EchoAgent.peak = max(EchoAgent.peak, EchoAgent.active)
+        await asyncio.sleep(0.01)
+        EchoAgent.active -= 1
+        if prompt == "fail":
+            raise RuntimeError("boom")
+        if prompt == "slow":
+            await asyncio.sleep(1)
+        return prompt.upper()
+
+
+async def echo_factory():
+    return EchoAgent()
+
+
+def read(path):
+    return [json.loads(line) for line in open(path)]
+
+
+def test_load_jobs_accepts_backlog_format(tmp_path):
+    path = tmp_path / "in.jsonl"
+    path.write_text(
+        json.dumps({"request_id": "r1", "title": "T", "body": "B"})
+        + "\n\n"
+        + json.dumps({"prompt": "p"})
+        + "\n"
+    )
+
+    assert load_jobs(str(path)) == [
+        {"id": "r1", "prompt": "T\n\nB"},
+        {"id": "line-3", "prompt": "p"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_timeout_and_retries(tmp_path):
+    out = tmp_path / "out.jsonl"
+    jobs = [{"id": str(i), "prompt": f"job {i}"} for i in range(6)]
+    jobs += [{"id": "f", "prompt": "fail"}, {"id": "s", "prompt": "slow"}]
+    runner = BatchRunner(
+        str(out), echo_factory, concurrency=3, timeout=0.2, retry_backoff=0
+    )
+
+    summary = await runner.run(jobs)
+
+    records = {r["id"]: r for r in read(out)}
+    assert summary["ok"] == 6 and summary["failed"] == 2
+    assert EchoAgent.peak == 3
+    assert records["0"]["result"] == "JOB 0"
+    assert records["f"]["status"] == "error" and records["f"]["attempts"] == 2
+    assert records["s"]["status"] == "timeout"
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_completed_jobs(tmp_path):
+    out = tmp_path / "out.jsonl"
+    out.write_text(json.dumps({"id": "a", "status": "ok"}) + "\n" + '{"id": "b", "sta')
+    runner = BatchRunner(str(out), echo_factory)
+
+    summary = await runner.run([{"id": "a", "prompt": "x"}, {"id": "b", "prompt": "y"}])
+
+    assert summary["skipped"] == 1 and summary["ok"] == 1
+    assert read(out)[-1]["id"] == "b"
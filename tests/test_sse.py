@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from utils.sse import format_sse, sse_stream, sync_sse_stream
+
+
+def producer(log):
+    async def events():
+        try:
+            for i in range(100):
+                await asyncio.sleep(0.01)
+                yield "token", i
+        finally:
+            log.append("closed")
+
+    return events()
+
+
+def test_format_sse():
+    assert format_sse("token", "hi", 3) == 'id: 3\nevent: token\ndata: "hi"\n\n'
+
+
+def test_sync_stream_close_cancels_producer():
+    log = []
+    stream = sync_sse_stream(producer(log))
+
+    assert "event: token" in next(stream)
+    stream.close()
+
+    assert log == ["closed"]
+
+
+@pytest.mark.asyncio
+async def test_async_stream_heartbeat_and_close():
+    log = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+            yield "token", 1
+        finally:
+            log.append("closed")
+
+    stream = sse_stream(slow(), heartbeat=0.01)
+    assert await stream.__anext__() == ": keep-alive\n\n"
+    await stream.aclose()
+
+    assert log == ["closed"]
@@ -0,0 +1,33 @@
+import sys
+
+import pytest
+
+from utils.startup import format_import_profile, lazy_import, profile_imports
+
+
+@pytest.fixture
+def slow_module(tmp_path, monkeypatch):
+    marker = tmp_path / "loaded"
+    (tmp_path / "fake_slow_mod.py").write_text(
+        f"open({str(marker)!r}, 'w').close()\nVALUE = 1\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "fake_slow_mod", marker
+    sys.modules.pop("fake_slow_mod", None)
+
+
+def test_lazy_import_defers_module_body(slow_module):
+    name, marker = slow_module
+    module = lazy_import(name)
+
+    assert sys.modules[name] is module
+    assert not marker.exists()
+    assert module.VALUE == 1
+    assert marker.exists()
+
+
+def test_profile_imports_reports_modules():
+    timings = profile_imports(["json"])
+
+    assert any(t.module == "json" for t in timings)
+    assert "json" in format_import_profile(timings)
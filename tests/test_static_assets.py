@@ -0,0 +1,36 @@
+import gzip
+
+import pytest
+
+from utils.static_assets import IMMUTABLE_CACHE, StaticAssetStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    (tmp_path / "static").mkdir()
+    (tmp_path / "static" / "app.js").write_text("console.log('hi');\n" * 100)
+    (tmp_path / "index.html").write_text('<script src="/static/app.js"></script>')
+    return StaticAssetStore(str(tmp_path))
+
+
+def test_compressed_variant_and_conditional_get(store):
+    status, headers, body = store.respond("static/app.js", {"Accept-Encoding": "gzip"})
+    assert status == 200 and headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body).startswith(b"console.log")
+
+    status, _, body = store.respond("static/app.js", {"If-None-Match": headers["ETag"]})
+    assert status == 304 and body == b""
+
+
+def test_html_links_fingerprinted_urls_served_immutable(store):
+    _, _, html = store.respond("", {}, fallback="index.html")
+    url = store.url_for("static/app.js")
+    assert url != "/static/app.js" and url.encode() in html
+
+    status, headers, _ = store.respond(url, {})
+    assert status == 200 and headers["Cache-Control"] == IMMUTABLE_CACHE
+
+
+def test_unknown_path_falls_back(store):
+    assert store.respond("missing/route", {}, fallback="index.html")[0] == 200
+    assert store.respond("missing/route", {})[0] == 404
@@ -0,0 +1,111 @@
+import enum
+from types import SimpleNamespace
+
+import pytest
+
+from utils.step_budget import (
+    BudgetMetrics,
+    StallDetector,
+    StepBudgetController,
+    StepHistory,
+    classify_task,
+    control_steps,
+)
+
+
+class State(enum.Enum):
+    IDLE = "IDLE"
+    FINISHED = "FINISHED"
+
+
+def call(name, arguments="{}"):
+    return SimpleNamespace(function=SimpleNamespace(name=name, arguments=arguments))
+
+
+class ScriptedAgent:
+    """Runs like BaseAgent.run: step until max_steps or FINISHED."""
+
+    name = "scripted"
+
+    def __init__(self, script, max_steps=30):
+        self.script = script
+        self.max_steps = max_steps
+        self.state = State.IDLE
+        self.memory = SimpleNamespace(messages=[])
+        self.tool_calls = []
+        self.nudges = []
+
+    async def run(self, request=None):
+        self.state = State.IDLE
+        self.steps = 0
+        while self.steps < self.max_steps and self.state != State.FINISHED:
+            await self.step()
+            self.steps += 1
+        self.state = State.IDLE
+        return f"ran {self.steps}"
+
+    async def step(self):
+        name, observation = self.script(self.steps)
+        self.tool_calls = [call(name)]
+        self.memory.messages.append(SimpleNamespace(role="assistant", content=""))
+        self.memory.messages.append(SimpleNamespace(role="tool", content=observation))
+        if name == "terminate":
+            self.state = State.FINISHED
+
+    def update_memory(self, role, content):
+        self.nudges.append(content)
+
+
+def controller(tmp_path):
+    return StepBudgetController(
+        StepHistory(str(tmp_path / "history.json")), metrics=BudgetMetrics()
+    )
+
+
+def test_stall_detector_signals():
+    repeated = StallDetector()
+    assert [repeated.observe(["a()"], str(i)) for i in range(3)][-1]
+
+    idle = StallDetector()
+    assert [idle.observe([f"c{i}()"], "same") for i in range(3)][-1]
+
+    oscillating = StallDetector()
+    results = [oscillating.observe([f"{'ab'[i % 2]}()"], str(i)) for i in range(4)]
+    assert results[:3] == [None, None, None] and "alternating" in results[3]
+
+
+@pytest.mark.asyncio
+async def test_looping_run_is_nudged_then_stopped(tmp_path):
+    budgets = controller(tmp_path)
+    agent = ScriptedAgent(lambda i: ("browser_use", f"page {i}"))
+    control_steps(agent, budgets)
+
+    assert await agent.run("Write python code for the parser") == "ran 6"
+    assert len(agent.nudges) == 1 and "stuck" in agent.nudges[0]
+    assert agent.max_steps == 30
+    metrics = budgets.metrics
+    assert metrics.stopped_early == 1 and metrics.replans == 1
+    assert metrics.steps_saved == 30 - 6
+
+
+@pytest.mark.asyncio
+async def test_budget_follows_history(tmp_path):
+    budgets = controller(tmp_path)
+    agent = ScriptedAgent(
+        lambda i: ("terminate" if i == 3 else f"tool{i}", f"result {i}")
+    )
+    control_steps(agent, budgets)
+
+    for _ in range(5):
+        assert await agent.run("Summarise this csv dataset") == "ran 4"
+    assert budgets.budget_for("data", cap=30) == 6
+    assert budgets.metrics.steps_saved == 0
+
+    reloaded = StepHistory(str(tmp_path / "history.json"))
+    assert [run["steps"] for run in reloaded.runs("data")] == [4] * 5
+
+
+def test_classify_task():
+    assert classify_task("Search the news website for today's headlines") == "browse"
+    assert classify_task("Plot a chart from sales.csv") == "data"
+    assert classify_task(None) == "general"
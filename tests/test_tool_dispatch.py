@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from utils.tool_dispatch import ToolCallDispatcher, ToolPolicy
+
+
+def call(name, arg):
+    return {"function": {"name": name, "arguments": arg}}
+
+
+@pytest.mark.asyncio
+async def test_results_keep_call_order():
+    dispatcher = ToolCallDispatcher()
+    delays = {"a": 0.03, "b": 0.0, "c": 0.01}
+
+    async def run(c):
+        await asyncio.sleep(delays[c["function"]["arguments"]])
+        return c["function"]["arguments"]
+
+    calls = [call("web_search", "a"), call("web_search", "b"), call("bash", "c")]
+    assert await dispatcher.dispatch(calls, run) == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_pure_calls_overlap_and_side_effects_serialize():
+    dispatcher = ToolCallDispatcher()
+    running = {"pure": 0, "effect": 0}
+    peak = {"pure": 0, "effect": 0}
+    order = []
+
+    async def run(c):
+        kind = "pure" if c["function"]["name"] == "web_search" else "effect"
+        running[kind] += 1
+        peak[kind] = max(peak[kind], running[kind])
+        await asyncio.sleep(0.01)
+        order.append(c["function"]["arguments"])
+        running[kind] -= 1
+
+    calls = [
+        call("python_execute", "1"),
+        call("web_search", "s1"),
+        call("str_replace_editor", "2"),
+        call("web_search", "s2"),
+        call("bash", "3"),
+    ]
+    await dispatcher.dispatch(calls, run)
+
+    assert peak == {"pure": 2, "effect": 1}
+    assert [x for x in order if not x.startswith("s")] == ["1", "2", "3"]
+
+
+@pytest.mark.asyncio
+async def test_per_tool_concurrency_limit():
+    dispatcher = ToolCallDispatcher({"fetch": ToolPolicy(pure=True, max_concurrency=2)})
+    running = peak = 0
+
+    async def run(c):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    await dispatcher.dispatch([call("fetch", str(i)) for i in range(6)], run)
+    assert peak == 2
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from utils.tracing import NOOP_SPAN, OTLPExporter, Tracer, traced, tracer
+
+
+def test_disabled_tracer_returns_noop():
+    assert Tracer().span("x") is NOOP_SPAN
+
+
+def test_spans_nest_and_aggregate():
+    t = Tracer()
+    t.enable()
+
+    with t.span("agent.step") as outer:
+        with t.span("tool.call", tool="bash") as inner:
+            pass
+
+    assert inner.parent_id == outer.span_id
+    assert inner.trace_id == outer.trace_id
+    metrics = t.metrics()["spans"]
+    assert metrics["agent.step"]["count"] == 1
+    assert metrics["tool.call"]["count"] == 1
+
+
+def test_errors_are_counted():
+    t = Tracer()
+    t.enable()
+
+    with pytest.raises(ValueError):
+        with t.span("llm.call"):
+            raise ValueError("boom")
+
+    assert t.metrics()["spans"]["llm.call"]["errors"] == 1
+
+
+def test_exporter_writes_otlp_json(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    t = Tracer()
+    t.exporter = OTLPExporter(path=str(path), flush_interval=0.05)
+    t.enabled = True
+
+    with t.span("sandbox.command", cmd="ls"):
+        pass
+    t.disable()
+
+    payload = json.loads(path.read_text().splitlines()[0])
+    span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert span["name"] == "sandbox.command"
+    assert span["attributes"] == [{"key": "cmd", "value": {"stringValue": "ls"}}]
+
+
+@pytest.mark.asyncio
+async def test_traced_decorator_and_metrics_endpoint():
+    @traced("file.transfer")
+    async def copy():
+        return "done"
+
+    tracer.reset()
+    tracer.enabled = True
+    try:
+        assert await copy() == "done"
+        from backend_app_Version2 import create_app
+
+        resp = create_app().test_client().get("/api/metrics")
+        assert resp.get_json()["spans"]["file.transfer"]["count"] == 1
+    finally:
+        tracer.enabled = False
+        tracer.reset()
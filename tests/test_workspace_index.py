@@ -0,0 +1,160 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from utils.workspace_index import (
+    WorkspaceIndex,
+    WorkspaceIndexTool,
+    enable_workspace_index,
+    track_agent_steps,
+)
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.py").write_text("def main():\n    return 1\n")
+    (tmp_path / "notes.txt").write_text("todo: write tests")
+    (tmp_path / "data.bin").write_bytes(b"\0\1\2")
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "__pycache__" / "x.pyc").write_bytes(b"\0")
+    return tmp_path
+
+
+def test_scan_lists_searches_and_greps(workspace):
+    index = WorkspaceIndex(str(workspace))
+    index.scan()
+    assert [e.path for e in index.list()] == ["data.bin", "notes.txt"]
+    assert index.directories() == ["src"]
+    assert [e.path for e in index.list(recursive=True)] == [
+        "data.bin",
+        "notes.txt",
+        "src/main.py",
+    ]
+    assert index.get("src/main.py").lines == 2
+    assert index.get("notes.txt").lines == 1
+    assert not index.get("data.bin").is_text
+    assert [e.path for e in index.search("*.py")] == ["src/main.py"]
+    assert [e.path for e in index.search("NOTES")] == ["notes.txt"]
+    assert index.grep(r"return \d") == [("src/main.py", 2, "    return 1")]
+
+
+def test_changes_since_step_are_netted(workspace):
+    index = WorkspaceIndex(str(workspace))
+    index.scan()
+    index.mark_step(1)
+
+    (workspace / "notes.txt").write_text("done")
+    (workspace / "tmp.txt").write_text("scratch")
+    (workspace / "report.md").write_text("# Report\n")
+    index.scan()
+    index.mark_step(2)
+    os.remove(workspace / "tmp.txt")
+    os.remove(workspace / "data.bin")
+    index.scan()
+
+    assert index.changes_since(1) == {
+        "added": ["report.md"],
+        "modified": ["notes.txt"],
+        "deleted": ["data.bin"],
+    }
+    assert index.changes_since(2)["deleted"] == ["data.bin", "tmp.txt"]
+    summary = index.summary_since(1)
+    assert "added: report.md (1 lines)" in summary
+    assert index.scan() == []
+
+
+def test_touch_without_content_change_is_not_reported(workspace):
+    index = WorkspaceIndex(str(workspace))
+    index.scan()
+    index.mark_step(1)
+    os.utime(workspace / "notes.txt", ns=(1, 1))
+    index.scan()
+    assert index.summary_since(1) == "No workspace changes since step 1."
+
+
+def test_watcher_picks_up_new_directories(workspace):
+    index = WorkspaceIndex(str(workspace), poll_interval=0.05).start()
+    try:
+        index.mark_step(0)
+        (workspace / "out" / "deep").mkdir(parents=True)
+        (workspace / "out" / "deep" / "result.csv").write_text("a,b\n1,2\n")
+        index.wait_until_current()
+        assert index.changes_since(0)["added"] == ["out/deep/result.csv"]
+    finally:
+        index.stop()
+
+
+@pytest.mark.asyncio
+async def test_agent_steps_are_marked(workspace):
+    class Agent:
+        current_step = 0
+
+        async def step(self):
+            self.current_step += 1
+            (workspace / f"step{self.current_step}.txt").write_text("x")
+            return "ok"
+
+    index = WorkspaceIndex(str(workspace))
+    index.scan()
+    agent = Agent()
+    track_agent_steps(agent, index)
+    assert await agent.step() == "ok"
+    await agent.step()
+    assert index.changes_since(1)["added"] == ["step2.txt"]
+
+
+@pytest.mark.asyncio
+async def test_tool_commands(workspace):
+    index = WorkspaceIndex(str(workspace))
+    index.scan()
+    index.mark_step(1)
+    (workspace / "report.md").write_text("# Report\n")
+    index.scan()
+    tool = WorkspaceIndexTool(index)
+
+    assert await tool.execute("list") == (
+        "src/\ndata.bin (3 bytes)\nnotes.txt (1 lines)\nreport.md (1 lines)"
+    )
+    assert await tool.execute("search", pattern="*.py") == "src/main.py (2 lines)"
+    assert await tool.execute("grep", pattern="TODO", ignore_case=True) == (
+        "notes.txt:1: todo: write tests"
+    )
+    assert "added: report.md" in await tool.execute("changes", since_step=1)
+    assert (await tool.execute("grep", pattern="(")).startswith("Error:")
+
+
+@pytest.mark.asyncio
+async def test_step_changes_are_added_to_memory(workspace):
+    class Agent:
+        current_step = 0
+
+        def __init__(self):
+            self.available_tools = SimpleNamespace(tools=[])
+            self.available_tools.add_tool = self.available_tools.tools.append
+            self.notes = []
+
+        async def step(self):
+            self.current_step += 1
+            if self.current_step == 1:
+                (workspace / "out.csv").write_text("a\n1\n")
+            return "ok"
+
+        def update_memory(self, role, content):
+            self.notes.append((role, content))
+
+    index = WorkspaceIndex(str(workspace))
+    index.scan()
+    agent = Agent()
+    enable_workspace_index(agent, index)
+    await agent.step()
+    await agent.step()
+
+    assert [tool.name for tool in agent.available_tools.tools] == ["workspace_index"]
+    assert agent.notes == [
+        (
+            "user",
+            "Workspace changes since the start of step 1:\nadded: out.csv (2 lines)",
+        )
+    ]
@@ -0,0 +1,167 @@
+"""
+Production serving for the web backend under uvicorn.
+
+`run_server()` starts the ASGI variant of `create_app()` with tuned
+keep-alive, a per-request timeout and graceful shutdown on SIGINT/SIGTERM.
+
+It always runs a single process. The agent controller keeps its state
+(running flag, log buffer) in process memory, so with several workers
+/api/agent/start, /stop and /logs would land in different processes and
+disagree; for the same reason there is no in-place reload, restart the
+server instead.
+"""
+import argparse
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_FACTORY = "backend_app_Version2:create_asgi_app"
+REQUEST_TIMEOUT_ENV = "OPENMANUS_REQUEST_TIMEOUT"
+
+
+@dataclass
+class ServerSettings:
+    host: str = "0.0.0.0"
+    port: int = 5000
+    keep_alive: int = 30
+    request_timeout: float = 120.0
+    graceful_timeout: int = 30
+    limit_concurrency: Optional[int] = None
+    backlog: int = 2048
+    reload: bool = False
+    access_log: bool = False
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "ServerSettings":
+        return cls(
+            host=args.host,
+            port=args.port,
+            keep_alive=args.keep_alive,
+            request_timeout=args.request_timeout,
+            graceful_timeout=args.graceful_timeout,
+            limit_concurrency=args.limit_concurrency,
+            reload=args.reload,
+            access_log=args.access_log,
+        )
+
+
+def add_server_arguments(
+    parser: argparse.ArgumentParser, host: str = "0.0.0.0", port: int = 5000
+) -> None:
+    """Add the production server options to an entry point's parser."""
+    defaults = ServerSettings()
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        help="Serve with uvicorn instead of the Flask dev server",
+    )
+    parser.add_argument("--host", default=host, help="Interface to bind")
+    parser.add_argument("--port", type=int, default=port, help="Port to bind")
+    parser.add_argument(
+        "--keep-alive",
+        type=int,
+        default=defaults.keep_alive,
+        help="Seconds to hold idle keep-alive connections",
+    )
+    parser.add_argument(
+        "--request-timeout",
+        type=float,
+        default=defaults.request_timeout,
+        help="Seconds before a request without a response gets a 504 (0 disables)",
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=defaults.graceful_timeout,
+        help="Seconds to let in-flight requests finish on shutdown",
+    )
+    parser.add_argument(
+        "--limit-concurrency",
+        type=int,
+        default=None,
+        help="Connections per worker before answering 503",
+    )
+    parser.add_argument(
+        "--reload", action="store_true", help="Restart on code changes (development)"
+    )
+    parser.add_argument("--access-log", action="store_true", help="Log every request")
+
+
+class RequestTimeoutMiddleware:
+    """Answer 504 when a handler has not started its response in time.
+
+    Once the response has started (e.g. a stream) the timeout no longer
+    applies, so long-lived streaming endpoints are not cut off.
+    """
+
+    def __init__(self, app, timeout: Optional[float]):
+        self.app = app
+        self.timeout = timeout
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.timeout:
+            await self.app(scope, receive, send)
+            return
+
+        started = False
+
+        async def send_wrapper(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        task = asyncio.ensure_future(self.app(scope, receive, send_wrapper))
+        try:
+            await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except asyncio.TimeoutError:
+            if started:
+                await task
+                return
+            task.cancel()
+            body = json.dumps({"error": "Request timed out"}).encode()
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 504,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode()),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": body})
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+
+
+def request_timeout_from_env() -> Optional[float]:
+    value = os.environ.get(REQUEST_TIMEOUT_ENV)
+    return float(value) if value else ServerSettings.request_timeout
+
+
+def run_server(settings: ServerSettings, app: str = APP_FACTORY) -> None:
+    """Run the ASGI app under uvicorn; blocks until shutdown."""
+    import uvicorn
+
+    # The factory reads the timeout when it builds the app (again on reload)
+    os.environ[REQUEST_TIMEOUT_ENV] = str(settings.request_timeout)
+    uvicorn.run(
+        app,
+        factory=True,
+        app_dir=PROJECT_ROOT,
+        host=settings.host,
+        port=settings.port,
+        reload=settings.reload,
+        timeout_keep_alive=settings.keep_alive,
+        timeout_graceful_shutdown=settings.graceful_timeout,
+        limit_concurrency=settings.limit_concurrency,
+        backlog=settings.backlog,
+        access_log=settings.access_log,
+        proxy_headers=True,
+    )
@@ -0,0 +1,313 @@
+"""
+Shared browser pool for the browser-use tool.
+
+A few long-lived Chromium processes hand out one isolated context per agent.
+Idle contexts are recycled in LRU order, contexts that grow past the memory
+ceiling are recycled, and browsers that crash are relaunched on next use.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+BrowserFactory = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class BrowserPoolSettings:
+    """Limits and launch options for a BrowserPool."""
+
+    max_browsers: int = 1
+    max_contexts: int = 8
+    context_memory_limit_mb: int = 512
+    memory_check_interval: float = 30.0
+    headless: bool = True
+    disable_security: bool = True
+    extra_chromium_args: List[str] = field(default_factory=list)
+    chrome_instance_path: Optional[str] = None
+    wss_url: Optional[str] = None
+    cdp_url: Optional[str] = None
+    proxy: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def from_browser_config(
+        cls, browser_config: Any, **overrides
+    ) -> "BrowserPoolSettings":
+        """Build settings from the `[browser]` section of the app config."""
+        settings = cls(**overrides)
+        if browser_config is None:
+            return settings
+        for name in (
+            "headless",
+            "disable_security",
+            "extra_chromium_args",
+            "chrome_instance_path",
+            "wss_url",
+            "cdp_url",
+        ):
+            value = getattr(browser_config, name, None)
+            if value not in (None, ""):
+                setattr(settings, name, value)
+        proxy = getattr(browser_config, "proxy", None)
+        if proxy and getattr(proxy, "server", None):
+            settings.proxy = {
+                k: v
+                for k, v in {
+                    "server": proxy.server,
+                    "username": getattr(proxy, "username", None),
+                    "password": getattr(proxy, "password", None),
+                }.items()
+                if v
+            }
+        return settings
+
+
+@dataclass
+class _BrowserSlot:
+    browser: Any
+    alive: bool = True
+    contexts: int = 0
+
+
+@dataclass
+class _Lease:
+    agent_id: str
+    slot: _BrowserSlot
+    context: Any
+    in_use: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    last_memory_check: float = field(default_factory=time.monotonic)
+
+
+class BrowserPool:
+    """Hands out isolated browser contexts from a small set of shared browsers."""
+
+    def __init__(
+        self,
+        settings: Optional[BrowserPoolSettings] = None,
+        browser_factory: Optional[BrowserFactory] = None,
+    ):
+        self.settings = settings or BrowserPoolSettings()
+        self._browser_factory = browser_factory or self._launch_browser
+        self._playwright = None
+        self._slots: List[_BrowserSlot] = []
+        # Ordered least- to most-recently used.
+        self._leases: "OrderedDict[str, _Lease]" = OrderedDict()
+        self._cond = asyncio.Condition()
+        self.stats = {"launched": 0, "crashed": 0, "recycled": 0, "evicted": 0}
+
+    @asynccontextmanager
+    async def lease(self, agent_id: str) -> AsyncIterator[Any]:
+        """Borrow the agent's context for the duration of the block."""
+        context = await self.acquire(agent_id)
+        try:
+            yield context
+        finally:
+            await self.release(agent_id)
+
+    async def acquire(self, agent_id: str) -> Any:
+        """Return the agent's context, creating one if needed."""
+        async with self._cond:
+            lease = self._leases.get(agent_id)
+            if lease and not lease.slot.alive:
+                self._drop_lease(lease)
+                lease = None
+            fresh = lease is None
+            if fresh:
+                lease = await self._new_lease(agent_id)
+            lease.in_use += 1
+            lease.last_used = time.monotonic()
+            self._leases.move_to_end(agent_id)
+
+        if not fresh and await self._over_memory_limit(lease):
+            await self.recycle(agent_id)
+            return await self.acquire(agent_id)
+        return lease.context
+
+    async def release(self, agent_id: str) -> None:
+        """Mark the agent's context idle so it can be evicted under pressure."""
+        async with self._cond:
+            lease = self._leases.get(agent_id)
+            if lease and lease.in_use:
+                lease.in_use -= 1
+                lease.last_used = time.monotonic()
+            self._cond.notify_all()
+
+    async def recycle(self, agent_id: str) -> None:
+        """Close the agent's context; the next acquire starts a fresh one."""
+        async with self._cond:
+            lease = self._leases.get(agent_id)
+            if lease is None:
+                return
+            self._drop_lease(lease)
+            self.stats["recycled"] += 1
+            self._cond.notify_all()
+        await self._close_context(lease.context)
+
+    async def close(self) -> None:
+        """Close every context and browser owned by the pool."""
+        async with self._cond:
+            leases = list(self._leases.values())
+            slots = list(self._slots)
+            self._leases.clear()
+            self._slots.clear()
+        for lease in leases:
+            await self._close_context(lease.context)
+        for slot in slots:
+            try:
+                await slot.browser.close()
+            except Exception as e:
+                logger.debug(f"Browser close failed: {e}")
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return pool occupancy and lifetime counters."""
+        return {
+            "browsers": sum(1 for s in self._slots if s.alive),
+            "contexts": len(self._leases),
+            "in_use": sum(1 for lease in self._leases.values() if lease.in_use),
+            **self.stats,
+        }
+
+    async def _new_lease(self, agent_id: str) -> _Lease:
+        while len(self._leases) >= self.settings.max_contexts:
+            victim = next(
+                (lease for lease in self._leases.values() if not lease.in_use), None
+            )
+            if victim is None:
+                await self._cond.wait()
+                continue
+            self._drop_lease(victim)
+            self.stats["evicted"] += 1
+            await self._close_context(victim.context)
+
+        slot = await self._pick_slot()
+        context = await slot.browser.new_context(**self._context_options())
+        slot.contexts += 1
+        lease = _Lease(agent_id=agent_id, slot=slot, context=context)
+        self._leases[agent_id] = lease
+        return lease
+
+    async def _pick_slot(self) -> _BrowserSlot:
+        self._slots = [s for s in self._slots if s.alive]
+        per_browser = max(1, self.settings.max_contexts // self.settings.max_browsers)
+        slot = min(self._slots, key=lambda s: s.contexts, default=None)
+        if slot is None or (
+            slot.contexts >= per_browser
+            and len(self._slots) < self.settings.max_browsers
+        ):
+            slot = _BrowserSlot(browser=await self._browser_factory())
+            self._watch(slot)
+            self._slots.append(slot)
+            self.stats["launched"] += 1
+        return slot
+
+    def _watch(self, slot: _BrowserSlot) -> None:
+        on = getattr(slot.browser, "on", None)
+        if on is None:
+            return
+
+        def _disconnected(*_):
+            if slot.alive:
+                slot.alive = False
+                self.stats["crashed"] += 1
+                logger.warning("Pooled browser disconnected; it will be relaunched")
+
+        on("disconnected", _disconnected)
+
+    def _drop_lease(self, lease: _Lease) -> None:
+        self._leases.pop(lease.agent_id, None)
+        lease.slot.contexts = max(0, lease.slot.contexts - 1)
+
+    async def _over_memory_limit(self, lease: _Lease) -> bool:
+        limit = self.settings.context_memory_limit_mb
+        now = time.monotonic()
+        if (
+            not limit
+            or now - lease.last_memory_check < self.settings.memory_check_interval
+        ):
+            return False
+        lease.last_memory_check = now
+        used_mb = await self.context_memory_mb(lease.context)
+        if used_mb > limit:
+            logger.info(
+                f"Context for {lease.agent_id} uses {used_mb:.0f} MB "
+                f"(limit {limit} MB), recycling"
+            )
+            return True
+        return False
+
+    @staticmethod
+    async def context_memory_mb(context: Any) -> float:
+        """Sum the JS heap of every page in a context via CDP."""
+        total = 0
+        for page in list(getattr(context, "pages", [])):
+            try:
+                session = await context.new_cdp_session(page)
+                await session.send("Performance.enable")
+                metrics = await session.send("Performance.getMetrics")
+                await session.detach()
+            except Exception:
+                continue
+            for metric in metrics.get("metrics", []):
+                if metric.get("name") == "JSHeapUsedSize":
+                    total += metric.get("value", 0)
+        return total / (1024 * 1024)
+
+    @staticmethod
+    async def _close_context(context: Any) -> None:
+        try:
+            await context.close()
+        except Exception as e:
+            logger.debug(f"Context close failed: {e}")
+
+    def _context_options(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = {}
+        if self.settings.disable_security:
+            options["bypass_csp"] = True
+            options["ignore_https_errors"] = True
+        if self.settings.proxy:
+            options["proxy"] = self.settings.proxy
+        return options
+
+    async def _launch_browser(self) -> Any:
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+
+            self._playwright = await async_playwright().start()
+        chromium = self._playwright.chromium
+        if self.settings.cdp_url:
+            return await chromium.connect_over_cdp(self.settings.cdp_url)
+        if self.settings.wss_url:
+            return await chromium.connect(self.settings.wss_url)
+        return await chromium.launch(
+            headless=self.settings.headless,
+            executable_path=self.settings.chrome_instance_path or None,
+            args=list(self.settings.extra_chromium_args),
+            proxy=self.settings.proxy,
+        )
+
+
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """Return the process-wide pool, configured from `[browser]` when available."""
+    global _browser_pool
+    if _browser_pool is None:
+        try:
+            from app.config import config
+
+            settings = BrowserPoolSettings.from_browser_config(config.browser_config)
+        except ImportError:
+            settings = BrowserPoolSettings()
+        _browser_pool = BrowserPool(settings)
+    return _browser_pool
@@ -0,0 +1,132 @@
+"""
+SQLite store for web chat conversations.
+
+Messages are appended per session and read back newest-first in pages using
+the message id as an opaque cursor, so loading the tail of a long
+conversation costs one indexed range scan regardless of its length.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+DEFAULT_DB_PATH = os.environ.get(
+    "OPENMANUS_CHAT_DB",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "workspace",
+        "chat_history.db",
+    ),
+)
+MAX_PAGE_SIZE = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session_id ON messages (session_id, id);
+CREATE INDEX IF NOT EXISTS idx_messages_session_time
+    ON messages (session_id, created_at);
+"""
+
+
+class ChatStore:
+    """Conversation history with cursor-paginated reads.
+
+    Each thread gets its own connection; WAL mode lets readers proceed while
+    a writer appends.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def append(self, session_id: str, role: str, content: str) -> Dict[str, Any]:
+        created_at = time.time()
+        cursor = self._connection().execute(
+            "INSERT INTO messages (session_id, role, content, created_at)"
+            " VALUES (?, ?, ?, ?)",
+            (session_id, role, content, created_at),
+        )
+        return {
+            "id": cursor.lastrowid,
+            "session_id": session_id,
+            "role": role,
+            "content": content,
+            "created_at": created_at,
+        }
+
+    def update(self, message_id: int, content: str) -> None:
+        self._connection().execute(
+            "UPDATE messages SET content = ? WHERE id = ?", (content, message_id)
+        )
+
+    def history(
+        self, session_id: str, before: Optional[int] = None, limit: int = 50
+    ) -> Dict[str, Any]:
+        """A page of messages older than `before`, oldest first.
+
+        `next_cursor` is passed back as `before` to fetch the previous page;
+        it is None once the start of the conversation is reached.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = (
+            "SELECT id, role, content, created_at FROM messages WHERE session_id = ?"
+        )
+        params: List[Any] = [session_id]
+        if before is not None:
+            query += " AND id < ?"
+            params.append(before)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = self._connection().execute(query, params).fetchall()
+        has_more = len(rows) > limit
+        messages = [dict(row) for row in reversed(rows[:limit])]
+        return {
+            "session_id": session_id,
+            "messages": messages,
+            "next_cursor": messages[0]["id"] if has_more else None,
+        }
+
+    def clear(self, session_id: str) -> int:
+        cursor = self._connection().execute(
+            "DELETE FROM messages WHERE session_id = ?", (session_id,)
+        )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_chat_store: Optional[ChatStore] = None
+
+
+def get_chat_store() -> ChatStore:
+    """Shared store used by the web backend."""
+    global _chat_store
+    if _chat_store is None:
+        _chat_store = ChatStore()
+    return _chat_store
@@ -0,0 +1,281 @@
+"""
+Append-only checkpoints for agent and flow runs.
+
+Every completed agent step (messages added to memory, step counter) or flow
+step (plan with step statuses, each agent's memory) is appended as one JSON
+line to `workspace/.runs/<run_id>.jsonl` and fsynced. `--resume <run_id>` restores
+the latest checkpoint and continues from the first unfinished step, so a
+timeout, crash or Ctrl-C no longer throws away finished work and its LLM
+spend.
+
+Agents and flows are the upstream `app.agent.*` / `app.flow.*` objects; they
+are used by attribute (memory.messages, current_step, planning_tool.plans,
+active_plan_id, _execute_step) so this module imports nothing from `app`
+until a checkpoint is restored.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+DEFAULT_RUN_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "workspace",
+    ".runs",
+)
+
+
+class CheckpointError(RuntimeError):
+    """The run cannot be resumed from its checkpoints."""
+
+
+def new_run_id() -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+class RunLog:
+    """The checkpoint file of one run."""
+
+    def __init__(self, run_id: str, root: str = DEFAULT_RUN_DIR):
+        self.run_id = run_id
+        self.path = os.path.join(root, f"{run_id}.jsonl")
+        self._lock = threading.Lock()
+        self._seq = None
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def append(self, kind: str, **state: Any) -> None:
+        """Durably append one record."""
+        with self._lock:
+            if self._seq is None:
+                self._truncate_torn_line()
+                self._seq = len(self.records())
+            self._seq += 1
+            record = {"seq": self._seq, "ts": time.time(), "kind": kind, **state}
+            line = json.dumps(record, ensure_ascii=False, default=str)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _truncate_torn_line(self) -> None:
+        if not self.exists:
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def records(self) -> List[Dict[str, Any]]:
+        """All complete records; a torn last line from a crash is ignored."""
+        if not self.exists:
+            return []
+        records = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+        return records
+
+    def latest(self, *kinds: str) -> Optional[Dict[str, Any]]:
+        for record in reversed(self.records()):
+            if not kinds or record["kind"] in kinds:
+                return record
+        return None
+
+    def start_record(self, entry: Optional[str] = None) -> Dict[str, Any]:
+        """The run's start record; `entry` must match the entry point if given."""
+        records = self.records()
+        if not records or records[0]["kind"] != "start":
+            raise CheckpointError(f"No checkpoints for run {self.run_id}")
+        started_by = records[0].get("entry")
+        if entry is not None and started_by != entry:
+            raise CheckpointError(
+                f"Run {self.run_id} was started by the {started_by} entry point, "
+                f"not {entry}"
+            )
+        return records[0]
+
+
+def _message_type() -> Any:
+    from app.schema import Message
+
+    return Message
+
+
+def _messages(agent: Any) -> List[Any]:
+    return list(getattr(getattr(agent, "memory", None), "messages", []))
+
+
+def _dump(messages: List[Any]) -> List[Any]:
+    return [
+        m.model_dump(exclude_none=True) if hasattr(m, "model_dump") else m
+        for m in messages
+    ]
+
+
+def snapshot_agent(agent: Any) -> Dict[str, Any]:
+    return {
+        "name": getattr(agent, "name", type(agent).__name__),
+        "current_step": getattr(agent, "current_step", 0),
+        "memory": _dump(_messages(agent)),
+    }
+
+
+class _MemoryTracker:
+    """Works out which messages changed since the last agent checkpoint."""
+
+    def __init__(self):
+        self.logged: Optional[List[Any]] = None
+
+    def delta(self, messages: List[Any]) -> Tuple[Optional[int], List[Any]]:
+        """(old messages dropped from the front, new messages at the end).
+
+        Memory only grows, or is trimmed from the front once it is full;
+        anything else returns None and the full list.
+        """
+        logged, self.logged = self.logged, messages
+        if logged is None:
+            return None, messages
+        if not logged:
+            return 0, messages
+        last = next(
+            (i for i in range(len(messages) - 1, -1, -1) if messages[i] is logged[-1]),
+            None,
+        )
+        if last is None:
+            return None, messages
+        drop = len(logged) - 1 - last
+        kept = messages[: last + 1]
+        if drop < 0 or any(a is not b for a, b in zip(logged[drop:], kept)):
+            return None, messages
+        return drop, messages[last + 1 :]
+
+
+def agent_checkpoint(log: RunLog) -> Optional[Dict[str, Any]]:
+    """The latest agent snapshot, rebuilt from the incremental records."""
+    snapshot = None
+    for record in log.records():
+        if record["kind"] != "agent_step":
+            continue
+        state = record["agent"]
+        drop = state.get("memory_drop")
+        if drop is None:
+            snapshot = dict(state)
+            continue
+        if snapshot is None:
+            raise CheckpointError(f"Run {log.run_id} has no full agent checkpoint")
+        memory = snapshot["memory"][drop:] + state["memory"]
+        snapshot = {**state, "memory": memory}
+        del snapshot["memory_drop"]
+    return snapshot
+
+
+def restore_agent(
+    agent: Any, snapshot: Dict[str, Any], message_type: Optional[Any] = None
+) -> None:
+    message_type = message_type or _message_type()
+    agent.memory.messages = [message_type(**m) for m in snapshot["memory"]]
+    agent.current_step = snapshot.get("current_step", 0)
+
+
+def snapshot_flow(flow: Any) -> Dict[str, Any]:
+    plan_id = getattr(flow, "active_plan_id", None)
+    plans = getattr(getattr(flow, "planning_tool", None), "plans", {})
+    return {
+        "active_plan_id": plan_id,
+        "plan": plans.get(plan_id),
+        "current_step_index": getattr(flow, "current_step_index", None),
+        "agents": {
+            key: snapshot_agent(agent)
+            for key, agent in getattr(flow, "agents", {}).items()
+        },
+    }
+
+
+def restore_flow(
+    flow: Any, snapshot: Dict[str, Any], message_type: Optional[Any] = None
+) -> None:
+    plan_id = snapshot["active_plan_id"]
+    if not plan_id or snapshot.get("plan") is None:
+        raise CheckpointError("Checkpoint has no plan to resume")
+    flow.active_plan_id = plan_id
+    flow.planning_tool.plans[plan_id] = snapshot["plan"]
+    flow.current_step_index = snapshot.get("current_step_index")
+    for key, agent_snapshot in snapshot.get("agents", {}).items():
+        if key in flow.agents:
+            restore_agent(flow.agents[key], agent_snapshot, message_type)
+            # Each plan step starts the executor with a fresh step budget
+            flow.agents[key].current_step = 0
+
+
+def _wrap(obj: Any, name: str, after: Callable[[], None]) -> None:
+    original = getattr(obj, name)
+
+    @functools.wraps(original)
+    async def wrapper(*args, **kwargs):
+        result = await original(*args, **kwargs)
+        after()
+        return result
+
+    # Instance attribute, so only this agent/flow is affected
+    object.__setattr__(obj, name, wrapper)
+
+
+def checkpoint_agent(agent: Any, log: RunLog) -> None:
+    """Append an agent checkpoint after every step.
+
+    Only the messages added since the previous checkpoint are written, so
+    the log grows with the run rather than with its square; resume with
+    `agent_checkpoint(log)`.
+    """
+    tracker = _MemoryTracker()
+
+    def after() -> None:
+        drop, messages = tracker.delta(_messages(agent))
+        state = {
+            "name": getattr(agent, "name", type(agent).__name__),
+            "current_step": getattr(agent, "current_step", 0),
+            "memory": _dump(messages),
+        }
+        if drop is not None:
+            state["memory_drop"] = drop
+        log.append("agent_step", agent=state)
+
+    _wrap(agent, "step", after)
+
+
+def checkpoint_flow(flow: Any, log: RunLog) -> None:
+    """Append a flow checkpoint after every plan step."""
+    _wrap(
+        flow, "_execute_step", lambda: log.append("flow_step", flow=snapshot_flow(flow))
+    )
+
+    # The plan exists before the first step runs; record it so a crash in
+    # step one does not mean re-planning
+    if hasattr(flow, "_create_initial_plan"):
+        _wrap(
+            flow,
+            "_create_initial_plan",
+            lambda: log.append("flow_step", flow=snapshot_flow(flow)),
+        )
+
+
+def add_resume_arguments(parser: Any) -> None:
+    """Add --resume to an entry point's argparse parser."""
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Continue a previous run from its last checkpoint",
+    )
@@ -0,0 +1,230 @@
+"""
+asyncio subprocess engine for the WSL/Linux agent tools.
+
+Commands run in their own process group with stdout and stderr read
+concurrently line by line, so output can be streamed to a callback while
+it is produced. A timeout or cancellation terminates the whole group
+(SIGTERM, then SIGKILL after a grace period), so a hanging command or one
+of its children can no longer freeze the caller. `CommandPool` bounds how
+many commands run at once.
+
+Nothing here depends on WSL; the Windows helpers in scripts/wsl_agent_tools
+check for `wslpath` and friends before using them.
+"""
+import asyncio
+import codecs
+import os
+import shutil
+import signal
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Set, Union
+
+
+Command = Union[str, Sequence[str]]
+OutputCallback = Callable[[str, str], None]
+
+# Output kept per stream; streaming callbacks still see every line
+MAX_CAPTURE = 1024 * 1024
+KILL_GRACE = 2.0
+# Pipes are read in chunks rather than with readline(), which fails on lines
+# longer than the StreamReader limit (64 KiB) such as minified JSON
+READ_CHUNK = 64 * 1024
+
+
+@dataclass
+class CommandResult:
+    command: Command
+    returncode: Optional[int]
+    stdout: str = ""
+    stderr: str = ""
+    duration: float = 0.0
+    timed_out: bool = False
+    truncated: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+
+class _Capture:
+    """Keeps the last `limit` characters of a stream."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.chunks: List[str] = []
+        self.size = 0
+        self.truncated = False
+
+    def add(self, text: str) -> None:
+        self.chunks.append(text)
+        self.size += len(text)
+        while self.size > self.limit and len(self.chunks) > 1:
+            self.size -= len(self.chunks.pop(0))
+            self.truncated = True
+
+    def text(self) -> str:
+        return "".join(self.chunks)[-self.limit :]
+
+
+async def _pump(
+    stream: asyncio.StreamReader,
+    name: str,
+    capture: _Capture,
+    on_output: Optional[OutputCallback],
+) -> None:
+    def emit(text: str) -> None:
+        capture.add(text)
+        if on_output is not None:
+            on_output(name, text)
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    while True:
+        chunk = await stream.read(READ_CHUNK)
+        pending += decoder.decode(chunk, final=not chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            emit(line + "\n")
+        # Pass on an unterminated line once it is long, so memory stays bounded
+        if pending and (len(pending) >= READ_CHUNK or not chunk):
+            emit(pending)
+            pending = ""
+        if not chunk:
+            return
+
+
+def _signal_group(process: asyncio.subprocess.Process, sig: int) -> None:
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def _terminate(process: asyncio.subprocess.Process, grace: float) -> None:
+    """Stop the process and everything it started."""
+    if process.returncode is not None:
+        return
+    _signal_group(process, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), grace)
+    except asyncio.TimeoutError:
+        _signal_group(process, signal.SIGKILL)
+        await process.wait()
+
+
+async def run_command(
+    command: Command,
+    timeout: Optional[float] = None,
+    on_output: Optional[OutputCallback] = None,
+    cwd: Optional[str] = None,
+    env: Optional[Dict[str, str]] = None,
+    max_capture: int = MAX_CAPTURE,
+    kill_grace: float = KILL_GRACE,
+) -> CommandResult:
+    """Run `command` (a shell string or an argv list) to completion.
+
+    `on_output(stream, line)` is called for each line of "stdout" and
+    "stderr" as it arrives. On timeout the process group is killed and the
+    result has `timed_out` set; on cancellation it is killed and
+    CancelledError propagates.
+    """
+    kwargs = dict(
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+        env=env,
+        start_new_session=True,
+    )
+    started = time.monotonic()
+    if isinstance(command, str):
+        process = await asyncio.create_subprocess_shell(command, **kwargs)
+    else:
+        process = await asyncio.create_subprocess_exec(*command, **kwargs)
+
+    out, err = _Capture(max_capture), _Capture(max_capture)
+    readers = asyncio.gather(
+        _pump(process.stdout, "stdout", out, on_output),
+        _pump(process.stderr, "stderr", err, on_output),
+    )
+
+    async def finished() -> None:
+        await asyncio.shield(readers)
+        await process.wait()
+
+    timed_out = False
+    try:
+        # One deadline for both: a command may close its output and keep running
+        await asyncio.wait_for(finished(), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+    finally:
+        await _terminate(process, kill_grace)
+        # Collect what was written before the group went away; a child that
+        # escaped the group may still hold the pipes, so don't wait forever
+        try:
+            await asyncio.wait_for(readers, 1.0)
+        except (asyncio.TimeoutError, asyncio.CancelledError, Exception):
+            pass
+
+    return CommandResult(
+        command=command,
+        returncode=process.returncode,
+        stdout=out.text(),
+        stderr=err.text(),
+        duration=time.monotonic() - started,
+        timed_out=timed_out,
+        truncated=out.truncated or err.truncated,
+    )
+
+
+class CommandPool:
+    """Runs commands with at most `max_concurrency` in flight."""
+
+    def __init__(
+        self, max_concurrency: int = 4, default_timeout: Optional[float] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def run(self, command: Command, **kwargs) -> CommandResult:
+        kwargs.setdefault("timeout", self.default_timeout)
+        async with self._semaphore:
+            return await run_command(command, **kwargs)
+
+    def submit(self, command: Command, **kwargs) -> "asyncio.Task[CommandResult]":
+        task = asyncio.ensure_future(self.run(command, **kwargs))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def run_all(
+        self, commands: Sequence[Command], **kwargs
+    ) -> List[Union[CommandResult, BaseException]]:
+        """Run every command; results come back in the given order."""
+        tasks = [self.submit(command, **kwargs) for command in commands]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def cancel_all(self) -> None:
+        """Cancel queued and running commands, killing their processes."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def is_wsl() -> bool:
+    if "WSL_DISTRO_NAME" in os.environ:
+        return True
+    try:
+        with open("/proc/version", encoding="utf-8") as f:
+            return "microsoft" in f.read().lower()
+    except OSError:
+        return False
+
+
+def has_command(name: str) -> bool:
+    return shutil.which(name) is not None
@@ -0,0 +1,379 @@
+"""
+Compiled configuration snapshots.
+
+config.toml (plus mcp.json) is parsed, has its `${Name}` placeholders
+resolved from keys.txt or the environment, and is validated, producing an
+immutable ConfigSnapshot. The validated result is cached on disk under the
+hash of the sources (keys.txt included) and of the environment values the
+placeholders use, so later processes skip parsing, resolution and
+validation. Secrets are never written to the cache: it stores the tree with
+its placeholders plus the paths of the strings that hold them, and a cache
+hit only substitutes those strings. A background watcher reloads on change
+and notifies subscribers; readers never block on a reload and always see a
+complete snapshot.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import threading
+import tomllib
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from key_loader import find_keys_file, load_keys
+
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, ".cache", "config")
+
+# Bump when the compiled layout changes so stale caches are ignored
+CACHE_VERSION = 3
+
+PLACEHOLDER = re.compile(r"\$\{([^}]+)\}")
+
+Subscriber = Callable[["ConfigSnapshot", Optional["ConfigSnapshot"]], None]
+
+
+class ConfigError(ValueError):
+    """Raised when the configuration cannot be parsed or is invalid."""
+
+
+def find_config_file(root: str = PROJECT_ROOT) -> str:
+    """config/config.toml, falling back to the bundled example."""
+    for name in ("config.toml", "config.example.toml"):
+        path = os.path.join(root, "config", name)
+        if os.path.exists(path):
+            return path
+    raise ConfigError(f"No configuration file found in {os.path.join(root, 'config')}")
+
+
+def resolve_placeholders(value: Any, keys: Mapping[str, str], missing: List[str]):
+    """Replace `${Name}` in every string with keys.txt (or environment) values.
+
+    Unknown names are left untouched and appended to `missing`.
+    """
+    if isinstance(value, str):
+
+        def substitute(match: re.Match) -> str:
+            name = match.group(1)
+            if name in keys:
+                return keys[name]
+            if name in os.environ:
+                return os.environ[name]
+            missing.append(name)
+            return match.group(0)
+
+        return PLACEHOLDER.sub(substitute, value)
+    if isinstance(value, dict):
+        return {k: resolve_placeholders(v, keys, missing) for k, v in value.items()}
+    if isinstance(value, list):
+        return [resolve_placeholders(v, keys, missing) for v in value]
+    return value
+
+
+def placeholder_paths(value: Any, path: Tuple = ()) -> List[Tuple]:
+    """Paths (keys and list indexes) of the strings holding placeholders."""
+    if isinstance(value, str):
+        return [path] if PLACEHOLDER.search(value) else []
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return []
+    return [p for key, item in items for p in placeholder_paths(item, path + (key,))]
+
+
+def validate(data: Dict[str, Any]) -> None:
+    """Check the structure the agents rely on."""
+    llm = data.get("llm")
+    if llm is None:
+        return
+    if not isinstance(llm, dict):
+        raise ConfigError("[llm] must be a table")
+    provider = llm.get("provider")
+    if provider is not None:
+        if not isinstance(llm.get(provider), dict):
+            raise ConfigError(
+                f"llm.provider is {provider!r} but [llm.{provider}] is missing"
+            )
+    for name, section in llm.items():
+        if isinstance(section, dict) and "max_tokens" in section:
+            if not isinstance(section["max_tokens"], int) or section["max_tokens"] <= 0:
+                raise ConfigError(f"llm.{name}.max_tokens must be a positive integer")
+    mcp = data.get("mcp", {})
+    if not isinstance(mcp, dict):
+        raise ConfigError("[mcp] and mcp.json must be objects")
+    if not isinstance(mcp.get("mcpServers", {}), dict):
+        raise ConfigError("mcpServers must be an object")
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert dicts to read-only mappings and lists to tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """An immutable, fully resolved view of the configuration."""
+
+    data: Mapping[str, Any]
+    digest: str
+    sources: Tuple[str, ...]
+    unresolved: Tuple[str, ...] = ()
+    root_path: str = PROJECT_ROOT
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """Look up a dotted path such as "llm.openai.model"."""
+        node: Any = self.data
+        for part in path.split("."):
+            if not isinstance(node, Mapping) or part not in node:
+                return default
+            node = node[part]
+        return node
+
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    @property
+    def llm(self) -> Mapping[str, Any]:
+        """Settings of the selected llm.provider (or the [llm] table itself)."""
+        llm = self.data.get("llm", MappingProxyType({}))
+        provider = llm.get("provider")
+        return llm[provider] if provider else llm
+
+    @property
+    def mcp_servers(self) -> Mapping[str, Any]:
+        return self.get("mcp.mcpServers", MappingProxyType({}))
+
+
+class ConfigLoader:
+    """Loads ConfigSnapshots, caching compiled results keyed by file hash."""
+
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        keys_path: Optional[str] = None,
+        mcp_path: Optional[str] = None,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    ):
+        self.config_path = config_path or find_config_file()
+        self.keys_path = keys_path or find_keys_file()
+        self.mcp_path = mcp_path or os.path.join(
+            os.path.dirname(self.config_path), "mcp.json"
+        )
+        self.cache_dir = cache_dir
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._stamp: Optional[Tuple] = None
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    @property
+    def sources(self) -> Tuple[str, ...]:
+        return tuple(p for p in (self.config_path, self.keys_path, self.mcp_path) if p)
+
+    def current(self) -> ConfigSnapshot:
+        """The latest snapshot, loading it on first use."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.load()
+        return snapshot
+
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        """Call `callback(new, old)` after each reload; returns an unsubscribe."""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def load(self) -> ConfigSnapshot:
+        """Read the sources and swap in a new snapshot if their content changed."""
+        with self._lock:
+            stamp = self._stat()
+            contents = [self._read(path) for path in self.sources]
+            # Environment values used by placeholders are part of the identity
+            digest = self._digest(contents + [self._placeholder_env(contents)])
+            old = self._snapshot
+            if old is not None and old.digest == digest:
+                self._stamp = stamp
+                return old
+
+            keys = load_keys(self.keys_path)
+            compiled = self._read_cache(digest)
+            if compiled is None:
+                compiled = self._compile(digest, contents, keys)
+            data, missing = compiled["data"], []
+            # Validated already; only the strings with placeholders need keys
+            for path in compiled["placeholders"]:
+                *parents, last = path
+                node = data
+                for key in parents:
+                    node = node[key]
+                node[last] = resolve_placeholders(node[last], keys, missing)
+            unresolved = sorted(set(missing))
+            snapshot = ConfigSnapshot(
+                data=freeze(data),
+                digest=digest,
+                sources=self.sources,
+                unresolved=tuple(unresolved),
+            )
+            self._snapshot, self._stamp = snapshot, stamp
+
+        if old is not None:
+            for callback in list(self._subscribers):
+                try:
+                    callback(snapshot, old)
+                except Exception:
+                    logger.exception("Config subscriber failed")
+        return snapshot
+
+    def refresh(self) -> bool:
+        """Reload if any source file changed on disk; True if the snapshot changed."""
+        if self._snapshot is not None and self._stat() == self._stamp:
+            return False
+        old = self._snapshot
+        return self.load() is not old
+
+    def start_watching(self, interval: float = 2.0) -> None:
+        """Poll the sources from a daemon thread and reload on change."""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop.clear()
+
+        def watch() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    # Keep serving the last good snapshot
+                    logger.warning(f"Config reload failed: {e}")
+
+        self._watcher = threading.Thread(
+            target=watch, name="config-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        if self._watcher:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _compile(
+        self, digest: str, contents: List[bytes], keys: Mapping[str, str]
+    ) -> Dict[str, Any]:
+        """Parse and validate the sources and cache the result without secrets."""
+        try:
+            data = tomllib.loads(contents[0].decode("utf-8"))
+        except (tomllib.TOMLDecodeError, UnicodeDecodeError) as e:
+            raise ConfigError(f"Invalid TOML in {self.config_path}: {e}") from e
+        if self.mcp_path and contents[-1]:
+            try:
+                servers = json.loads(contents[-1])
+            except ValueError as e:
+                raise ConfigError(f"Invalid JSON in {self.mcp_path}: {e}") from e
+            # mcp.json adds mcpServers to the [mcp] table of config.toml
+            mcp = data.get("mcp", {})
+            if isinstance(mcp, dict) and isinstance(servers, dict):
+                servers = {**mcp, **servers}
+            data["mcp"] = servers
+        validate(resolve_placeholders(data, keys, []))
+        compiled = {"data": data, "placeholders": placeholder_paths(data)}
+        self._write_cache(digest, compiled)
+        return compiled
+
+    @staticmethod
+    def _placeholder_env(contents: List[bytes]) -> bytes:
+        names = sorted(
+            {
+                name
+                for blob in contents
+                for name in PLACEHOLDER.findall(blob.decode("utf-8", "replace"))
+            }
+        )
+        return json.dumps([(name, os.environ.get(name)) for name in names]).encode()
+
+    def _stat(self) -> Tuple:
+        stamp = []
+        for path in self.sources:
+            try:
+                st = os.stat(path)
+                stamp.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append((path, None, None))
+        return tuple(stamp)
+
+    @staticmethod
+    def _read(path: str) -> bytes:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return b""
+
+    @staticmethod
+    def _digest(contents: List[bytes]) -> str:
+        h = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+        for blob in contents:
+            h.update(len(blob).to_bytes(8, "big"))
+            h.update(blob)
+        return h.hexdigest()
+
+    def _cache_path(self, digest: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"{digest}.pickle")
+
+    def _read_cache(self, digest: str) -> Optional[Dict[str, Any]]:
+        path = self._cache_path(digest)
+        if not path:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+
+    def _write_cache(self, digest: str, compiled: Dict[str, Any]) -> None:
+        path = self._cache_path(digest)
+        if not path:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Unresolved, but config.toml itself may hold literal keys
+            tmp = f"{path}.{os.getpid()}.tmp"
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".pickle") and name != os.path.basename(path):
+                    os.remove(os.path.join(self.cache_dir, name))
+        except OSError as e:
+            logger.debug(f"Could not write config cache: {e}")
+
+
+_config_loader: Optional[ConfigLoader] = None
+
+
+def get_config_loader() -> ConfigLoader:
+    """Shared loader for the project configuration."""
+    global _config_loader
+    if _config_loader is None:
+        _config_loader = ConfigLoader()
+    return _config_loader
+
+
+def get_config() -> ConfigSnapshot:
+    """The current configuration snapshot."""
+    return get_config_loader().current()
@@ -0,0 +1,800 @@
+"""
+Columnar data sessions for the DataAnalysis agent.
+
+A dataset is parsed once into a column cache (`.cache/datasets/<key>/`): one
+raw binary file per column, numeric columns as int64/float64 and text
+columns dictionary-encoded as int32 codes plus a category list. Later loads,
+including from another process, memory-map those files, so a multi-GB CSV
+is parsed only once and each step touches just the columns it uses.
+
+Datasets stay resident in a `DataSession` across agent steps. Filters,
+projections and group-by aggregations are evaluated with NumPy on whole
+columns; the agent reaches them through `DataSessionTool` instead of
+generating pandas code that re-reads the file every step.
+
+CSV/TSV needs nothing beyond NumPy. Parquet and Arrow/Feather files are
+read batch by batch with the optional `pyarrow` package.
+"""
+import csv
+import hashlib
+import json
+import math
+import os
+import shutil
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+try:
+    import pyarrow
+except ImportError:  # optional dependency
+    pyarrow = None
+
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ".cache",
+    "datasets",
+)
+CHUNK_ROWS = 65536
+MAX_RESULT_ROWS = 1000
+# Cells that count as missing in numeric columns
+NULL_TOKENS = {"", "na", "n/a", "nan", "null", "none", "-"}
+AGGREGATES = ("count", "sum", "mean", "min", "max", "std", "nunique")
+
+csv.field_size_limit(1 << 30)
+
+
+class DataSessionError(ValueError):
+    """Bad request against a dataset; the message is shown to the agent."""
+
+
+# Loading
+
+
+class _ColumnWriter:
+    """Appends chunks of one column to a raw file, settling its type."""
+
+    def __init__(self, directory: str, index: int, name: str):
+        self.name = name
+        self.file = f"c{index}.bin"
+        self.path = os.path.join(directory, self.file)
+        self.kind: Optional[str] = None
+        self.categories: Dict[str, int] = {}
+        self.rows = 0
+
+    @staticmethod
+    def infer(values: Sequence[str]) -> str:
+        present = [v for v in values if v.strip().lower() not in NULL_TOKENS]
+        if present and len(present) == len(values):
+            try:
+                np.array(present, dtype=np.int64)
+                return "int"
+            except (ValueError, OverflowError):
+                pass
+        try:
+            np.array(present or ["0"], dtype=np.float64)
+            return "float"
+        except ValueError:
+            return "category"
+
+    def append_strings(self, values: Sequence[str]) -> None:
+        if self.kind is None:
+            self.kind = self.infer(values)
+        if self.kind == "int":
+            try:
+                self._write(np.array(values, dtype=np.int64))
+                return
+            except (ValueError, OverflowError):
+                self._promote_to_float()
+        if self.kind == "float":
+            floats = _parse_floats(values)
+            if floats is not None:
+                self._write(floats)
+                return
+            self._promote_to_category()
+        self._write_categories(values)
+
+    def append_array(self, array: np.ndarray) -> None:
+        """Column of an Arrow batch; nulls in integer columns arrive as NaN."""
+        numeric = array.dtype.kind in "iufb"
+        if self.kind is None:
+            if not numeric:
+                self.kind = "category"
+            else:
+                self.kind = "int" if array.dtype.kind in "iub" else "float"
+        if self.kind == "int" and array.dtype.kind not in "iub":
+            self._promote_to_float()
+        if self.kind == "int":
+            self._write(array.astype(np.int64))
+        elif self.kind == "float" and numeric:
+            self._write(array.astype(np.float64))
+        else:
+            self.append_strings(["" if v is None else str(v) for v in array])
+
+    def _write_categories(self, values: Iterable[str]) -> None:
+        categories = self.categories
+        codes = np.fromiter(
+            (categories.setdefault(v, len(categories)) for v in values),
+            dtype=np.int32,
+        )
+        self._write(codes)
+
+    def _write(self, array: np.ndarray) -> None:
+        with open(self.path, "ab") as f:
+            array.tofile(f)
+        self.rows += len(array)
+
+    def _promote_to_float(self) -> None:
+        self.kind = "float"
+        if not self.rows:
+            return
+        existing = np.fromfile(self.path, dtype=np.int64)
+        os.remove(self.path)
+        self.rows = 0
+        self._write(existing.astype(np.float64))
+
+    def _promote_to_category(self) -> None:
+        """Text after numeric chunks: re-encode what was written as categories."""
+        self.kind = "category"
+        if not self.rows:
+            return
+        existing = np.fromfile(self.path, dtype=np.float64)
+        os.remove(self.path)
+        self.rows = 0
+        self._write_categories(_float_text(v) for v in existing.tolist())
+
+    def finish(self) -> Dict[str, Any]:
+        if self.kind is None:
+            self.kind = "float"
+        if not os.path.exists(self.path):
+            open(self.path, "wb").close()
+        entry = {"name": self.name, "kind": self.kind, "file": self.file}
+        if self.kind == "category":
+            entry["categories"] = list(self.categories)
+        return entry
+
+
+def _parse_floats(values: Sequence[str]) -> Optional[np.ndarray]:
+    """Values as floats with nulls as NaN; None if any cell is not a number."""
+    try:
+        return np.array(
+            [v if v.strip().lower() not in NULL_TOKENS else "nan" for v in values],
+            dtype=np.float64,
+        )
+    except ValueError:
+        out = np.empty(len(values), dtype=np.float64)
+        for i, value in enumerate(values):
+            try:
+                out[i] = float(value)
+            except ValueError:
+                if value.strip().lower() not in NULL_TOKENS:
+                    return None
+                out[i] = np.nan
+        return out
+
+
+def _float_text(value: float) -> str:
+    if math.isnan(value):
+        return ""
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _csv_chunks(
+    path: str, delimiter: Optional[str]
+) -> Tuple[List[str], Iterator[List[List[str]]]]:
+    f = open(path, "r", encoding="utf-8", errors="replace", newline="")
+    if delimiter is None:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        delimiter = (
+            "\t"
+            if path.endswith(".tsv") or sample.count("\t") > sample.count(",")
+            else ","
+        )
+    reader = csv.reader(f, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        f.close()
+        raise DataSessionError(f"{path} is empty")
+
+    def chunks() -> Iterator[List[List[str]]]:
+        with f:
+            columns: List[List[str]] = [[] for _ in header]
+            for row in reader:
+                if not row:
+                    continue
+                for i, column in enumerate(columns):
+                    column.append(row[i] if i < len(row) else "")
+                if len(columns[0]) >= CHUNK_ROWS:
+                    yield columns
+                    columns = [[] for _ in header]
+            if columns and columns[0]:
+                yield columns
+
+    return header, chunks()
+
+
+def _arrow_batches(path: str) -> Tuple[List[str], Iterator[List[np.ndarray]]]:
+    if pyarrow is None:
+        raise DataSessionError("Reading Parquet/Arrow files requires pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    if path.endswith(".parquet"):
+        parquet = pyarrow.parquet.ParquetFile(path, memory_map=True)
+        names = parquet.schema_arrow.names
+        batches = parquet.iter_batches(batch_size=CHUNK_ROWS)
+    else:
+        source = pyarrow.memory_map(path, "r")
+        reader = pyarrow.ipc.open_file(source)
+        names = reader.schema.names
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+
+    def arrays() -> Iterator[List[np.ndarray]]:
+        for batch in batches:
+            yield [column.to_numpy(zero_copy_only=False) for column in batch.columns]
+
+    return names, arrays()
+
+
+def _unique_names(header: Sequence[str]) -> List[str]:
+    names: List[str] = []
+    for i, name in enumerate(header):
+        name = name.strip() or f"column_{i}"
+        base, n = name, 1
+        while name in names:
+            n += 1
+            name = f"{base}_{n}"
+        names.append(name)
+    return names
+
+
+def build_cache(path: str, directory: str, delimiter: Optional[str] = None) -> None:
+    """Parse `path` once into the column cache at `directory`."""
+    tmp = f"{directory}.tmp-{os.getpid()}-{threading.get_ident()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    try:
+        if path.endswith((".parquet", ".arrow", ".feather", ".ipc")):
+            header, chunks = _arrow_batches(path)
+            arrow = True
+        else:
+            header, chunks = _csv_chunks(path, delimiter)
+            arrow = False
+        names = _unique_names(header)
+        writers = [_ColumnWriter(tmp, i, name) for i, name in enumerate(names)]
+        for chunk in chunks:
+            for writer, values in zip(writers, chunk):
+                if arrow:
+                    writer.append_array(values)
+                else:
+                    writer.append_strings(values)
+        stat = os.stat(path)
+        manifest = {
+            "source": os.path.abspath(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "rows": writers[0].rows if writers else 0,
+            "columns": [writer.finish() for writer in writers],
+        }
+        with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp, directory)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+# Querying
+
+_DTYPES = {"int": np.int64, "float": np.float64, "category": np.int32}
+
+
+class Dataset:
+    """Memory-mapped columns of one cached file."""
+
+    def __init__(self, name: str, directory: str):
+        with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.name = name
+        self.source = manifest["source"]
+        self.rows = manifest["rows"]
+        self.kinds: Dict[str, str] = {}
+        self.columns: Dict[str, np.ndarray] = {}
+        self.categories: Dict[str, np.ndarray] = {}
+        for entry in manifest["columns"]:
+            column = entry["name"]
+            dtype = _DTYPES[entry["kind"]]
+            file = os.path.join(directory, entry["file"])
+            self.kinds[column] = entry["kind"]
+            if self.rows:
+                self.columns[column] = np.memmap(
+                    file, dtype=dtype, mode="r", shape=(self.rows,)
+                )
+            else:
+                self.columns[column] = np.zeros(0, dtype=dtype)
+            if entry["kind"] == "category":
+                self.categories[column] = np.array(entry["categories"], dtype=object)
+
+    def _column(self, name: str) -> np.ndarray:
+        if name not in self.columns:
+            raise DataSessionError(
+                f"Unknown column {name!r}; columns are: {', '.join(self.columns)}"
+            )
+        return self.columns[name]
+
+    def values(self, name: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Decoded values of a column, optionally only at `rows`."""
+        column = self._column(name)
+        column = column if rows is None else column[rows]
+        if self.kinds[name] == "category":
+            return self.categories[name][column]
+        return np.asarray(column)
+
+    def _codes_matching(self, name: str, predicate) -> np.ndarray:
+        categories = self.categories[name]
+        return np.flatnonzero([predicate(c) for c in categories]).astype(np.int32)
+
+    def condition(self, column: str, op: str, value: Any) -> np.ndarray:
+        data = self._column(column)
+        if self.kinds[column] == "category":
+            if op in ("==", "!=", "in", "not in"):
+                wanted = _listed(value) if op in ("in", "not in") else [value]
+                wanted = {str(v) for v in wanted}
+                codes = self._codes_matching(column, lambda c: c in wanted)
+                mask = np.isin(data, codes)
+                return ~mask if op in ("!=", "not in") else mask
+            if op == "contains":
+                needle = str(value).lower()
+                return np.isin(
+                    data, self._codes_matching(column, lambda c: needle in c.lower())
+                )
+            if op in ("<", "<=", ">", ">="):
+                compare = _COMPARE[op]
+                return np.isin(
+                    data, self._codes_matching(column, lambda c: compare(c, str(value)))
+                )
+        else:
+            if op in ("in", "not in"):
+                numbers = [_number(column, v) for v in _listed(value)]
+                mask = np.isin(data, np.asarray(numbers, dtype=np.float64))
+                return ~mask if op == "not in" else mask
+            if op == "is null":
+                return (
+                    np.isnan(data)
+                    if data.dtype.kind == "f"
+                    else np.zeros(len(data), bool)
+                )
+            if op in _COMPARE:
+                return _COMPARE[op](data, _number(column, value))
+        raise DataSessionError(f"Unsupported operator {op!r} for column {column!r}")
+
+    def mask(self, where: Optional[Sequence[Sequence[Any]]]) -> Optional[np.ndarray]:
+        """AND of [column, op, value] conditions; None means all rows."""
+        mask = None
+        for condition in where or ():
+            if len(condition) == 2 and condition[1] == "is null":
+                column, op, value = condition[0], "is null", None
+            elif len(condition) == 3:
+                column, op, value = condition
+            else:
+                raise DataSessionError(
+                    f"Bad condition {condition!r}; use [column, op, value]"
+                )
+            current = self.condition(column, op, value)
+            mask = current if mask is None else mask & current
+        return mask
+
+    def _rows(self, where) -> Tuple[Any, int]:
+        """Row selector and its length; unfiltered columns are not copied."""
+        mask = self.mask(where)
+        if mask is None:
+            return slice(None), self.rows
+        rows = np.flatnonzero(mask)
+        return rows, len(rows)
+
+    def select(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        where=None,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+        limit: int = 20,
+    ) -> Dict[str, Any]:
+        rows, matched = self._rows(where)
+        limit = max(0, min(limit, MAX_RESULT_ROWS))
+        if sort_by is not None:
+            values = self.values(sort_by, rows)
+            order = np.argsort(values, kind="stable")
+            if descending and values.dtype.kind == "f":
+                # argsort puts NaN last; keep it there when reversing
+                nulls = np.isnan(values[order])
+                order = np.concatenate([order[~nulls][::-1], order[nulls]])
+            elif descending:
+                order = order[::-1]
+            rows = order if isinstance(rows, slice) else rows[order]
+        elif isinstance(rows, slice):
+            rows = np.arange(min(limit, self.rows))
+        rows = rows[:limit]
+        columns = list(columns or self.columns)
+        data = {name: self.values(name, rows) for name in columns}
+        return {
+            "matched": matched,
+            "columns": columns,
+            "rows": [
+                [_plain(data[name][i]) for name in columns] for i in range(len(rows))
+            ],
+        }
+
+    def _group_keys(
+        self, group_by: Sequence[str], rows: Any
+    ) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """Group id per row and the key values per group."""
+        inverses, uniques = [], []
+        for name in group_by:
+            column = np.asarray(self._column(name)[rows])
+            unique, inverse = np.unique(column, return_inverse=True)
+            uniques.append(unique)
+            inverses.append(inverse)
+        if len(inverses) == 1:
+            group = inverses[0]
+            key_index = [np.arange(len(uniques[0]))]
+        else:
+            combined = np.ravel_multi_index(inverses, [len(u) for u in uniques])
+            present, group = np.unique(combined, return_inverse=True)
+            key_index = list(np.unravel_index(present, [len(u) for u in uniques]))
+        keys = []
+        for name, unique, index in zip(group_by, uniques, key_index):
+            values = unique[index]
+            if self.kinds[name] == "category":
+                values = self.categories[name][values]
+            keys.append(values)
+        return group, keys
+
+    def aggregate(
+        self,
+        metrics: Dict[str, Sequence[str]],
+        group_by: Optional[Sequence[str]] = None,
+        where=None,
+        sort_by: Optional[str] = None,
+        descending: bool = True,
+        limit: int = 50,
+    ) -> Dict[str, Any]:
+        """Vectorized group-by; `metrics` maps column -> aggregate names."""
+        rows, matched = self._rows(where)
+        group_by = list(group_by or [])
+        if group_by:
+            group, keys = self._group_keys(group_by, rows)
+            groups = len(keys[0])
+        else:
+            group, keys, groups = np.zeros(matched, dtype=np.int64), [], 1
+        counts = np.bincount(group, minlength=groups)
+        order = np.argsort(group, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        result_columns = list(group_by)
+        results = list(keys)
+        for column, aggregates in metrics.items():
+            if isinstance(aggregates, str):
+                aggregates = [aggregates]
+            for aggregate in aggregates:
+                if aggregate not in AGGREGATES:
+                    raise DataSessionError(
+                        f"Unknown aggregate {aggregate!r}; use one of {', '.join(AGGREGATES)}"
+                    )
+                result_columns.append(f"{aggregate}({column})")
+                results.append(
+                    self._aggregate(
+                        column, aggregate, rows, group, counts, order, starts, groups
+                    )
+                )
+        table = list(zip(*results)) if results else []
+        if sort_by is not None:
+            if sort_by not in result_columns:
+                raise DataSessionError(
+                    f"Cannot sort by {sort_by!r}; result columns are {result_columns}"
+                )
+            index = result_columns.index(sort_by)
+            table.sort(key=lambda row: _sort_key(row[index]), reverse=descending)
+        limit = max(0, min(limit, MAX_RESULT_ROWS))
+        return {
+            "matched": matched,
+            "groups": groups if matched else 0,
+            "columns": result_columns,
+            "rows": [[_plain(v) for v in row] for row in table[:limit]],
+        }
+
+    def _aggregate(self, column, aggregate, rows, group, counts, order, starts, groups):
+        if aggregate == "count":
+            return counts
+        data = np.asarray(self._column(column)[rows])
+        if aggregate == "nunique":
+            if data.dtype.kind == "f":
+                keep = ~np.isnan(data)
+                data, group = data[keep], group[keep]
+            order = np.lexsort((data, group))
+            group_sorted, data_sorted = group[order], data[order]
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = (group_sorted[1:] != group_sorted[:-1]) | (
+                data_sorted[1:] != data_sorted[:-1]
+            )
+            return np.bincount(group_sorted[first], minlength=groups)
+        if self.kinds[column] == "category":
+            raise DataSessionError(
+                f"{aggregate} needs a numeric column; {column!r} is text"
+            )
+        data = data.astype(np.float64)
+        valid = ~np.isnan(data)
+        n = np.bincount(group, weights=valid, minlength=groups)
+        filled = np.where(valid, data, 0.0)
+        total = np.bincount(group, weights=filled, minlength=groups)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if aggregate == "sum":
+                return total
+            mean = total / n
+            if aggregate == "mean":
+                return mean
+            if aggregate == "std":
+                squares = np.bincount(group, weights=filled * filled, minlength=groups)
+                return np.sqrt(np.maximum(squares / n - mean * mean, 0.0))
+        if not len(data):
+            return np.full(groups, np.nan)
+        fill = np.inf if aggregate == "min" else -np.inf
+        sorted_data = np.where(valid, data, fill)[order]
+        reduce = np.minimum if aggregate == "min" else np.maximum
+        out = reduce.reduceat(sorted_data, np.minimum(starts, len(sorted_data) - 1))
+        out[(counts == 0) | (n == 0)] = np.nan
+        return out
+
+    def describe(self) -> Dict[str, Any]:
+        columns = {}
+        for name, kind in self.kinds.items():
+            data = np.asarray(self.columns[name])
+            info: Dict[str, Any] = {"type": kind}
+            if kind == "category":
+                counts = np.bincount(data, minlength=len(self.categories[name]))
+                top = np.argsort(counts)[::-1][:5]
+                info["unique"] = len(self.categories[name])
+                info["top"] = {
+                    str(self.categories[name][i]): int(counts[i])
+                    for i in top
+                    if counts[i]
+                }
+            elif len(data):
+                values = data.astype(np.float64)
+                info["nulls"] = int(np.isnan(values).sum())
+                if info["nulls"] < len(values):
+                    info["min"] = _plain(np.nanmin(data if kind == "int" else values))
+                    info["max"] = _plain(np.nanmax(data if kind == "int" else values))
+                    info["mean"] = _plain(np.nanmean(values))
+            columns[name] = info
+        return {
+            "name": self.name,
+            "source": self.source,
+            "rows": self.rows,
+            "columns": columns,
+        }
+
+
+_COMPARE = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+def _listed(value: Any) -> List[Any]:
+    """The value list of an in/not in condition; a scalar is a list of one."""
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def _number(column: str, value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise DataSessionError(
+            f"Column {column!r} is numeric; {value!r} is not a number"
+        ) from None
+
+
+def _plain(value: Any) -> Any:
+    """JSON-friendly scalar."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, float):
+        return round(value, 10)
+    return value
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    value = _plain(value)
+    return (0, 0) if value is None else (1, value)
+
+
+class DataSession:
+    """Datasets kept resident across agent steps, keyed by name."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.datasets: Dict[str, Dataset] = {}
+        self._lock = threading.Lock()
+
+    def cache_path(self, path: str) -> str:
+        stat = os.stat(path)
+        source = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:16]
+        version = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return os.path.join(self.cache_dir, f"{source}-{version.hexdigest()[:16]}")
+
+    def _prune(self, directory: str) -> None:
+        """Remove caches of earlier versions of the same file.
+
+        Datasets still mapping them keep working; the data is freed once
+        they are dropped.
+        """
+        current = os.path.basename(directory)
+        source = current.split("-")[0]
+        for entry in os.listdir(self.cache_dir):
+            # In-progress builds (".tmp-") belong to whoever is writing them
+            if (
+                entry.startswith(source + "-")
+                and ".tmp-" not in entry
+                and entry != current
+            ):
+                shutil.rmtree(os.path.join(self.cache_dir, entry), ignore_errors=True)
+
+    def load(
+        self, path: str, name: Optional[str] = None, delimiter: Optional[str] = None
+    ) -> Dataset:
+        """Make `path` available as `name`, parsing it only if not cached."""
+        if not os.path.isfile(path):
+            raise DataSessionError(f"No such file: {path}")
+        name = name or os.path.splitext(os.path.basename(path))[0]
+        directory = self.cache_path(path)
+        with self._lock:
+            if not os.path.exists(os.path.join(directory, "manifest.json")):
+                build_cache(path, directory, delimiter)
+                self._prune(directory)
+            dataset = Dataset(name, directory)
+            self.datasets[name] = dataset
+        return dataset
+
+    def get(self, name: str) -> Dataset:
+        dataset = self.datasets.get(name)
+        if dataset is None:
+            known = ", ".join(self.datasets) or "none loaded"
+            raise DataSessionError(f"Unknown dataset {name!r} ({known})")
+        return dataset
+
+    def drop(self, name: str) -> None:
+        self.get(name)
+        del self.datasets[name]
+
+
+class DataSessionTool:
+    """Agent tool over a DataSession; follows the app BaseTool interface."""
+
+    name = "data_session"
+    description = (
+        "Load CSV/TSV/Parquet/Arrow files once and query them without re-reading: "
+        "describe columns, select/filter rows and run group-by aggregations. "
+        "Much faster than pandas code for large files. Conditions are "
+        "[column, op, value] lists with op one of ==, !=, <, <=, >, >=, in, "
+        '"not in", contains, "is null".'
+    )
+    parameters = {
+        "type": "object",
+        "properties": {
+            "command": {
+                "type": "string",
+                "enum": ["load", "list", "describe", "select", "aggregate", "drop"],
+            },
+            "path": {"type": "string", "description": "File to load (load)"},
+            "dataset": {
+                "type": "string",
+                "description": "Dataset name; defaults to the file name",
+            },
+            "columns": {"type": "array", "items": {"type": "string"}},
+            "where": {
+                "type": "array",
+                "items": {"type": "array"},
+                "description": "Conditions combined with AND",
+            },
+            "group_by": {"type": "array", "items": {"type": "string"}},
+            "metrics": {
+                "type": "object",
+                "description": 'Column -> aggregates, e.g. {"price": ["mean", "max"]}; '
+                f"aggregates: {', '.join(AGGREGATES)}",
+            },
+            "sort_by": {"type": "string"},
+            "descending": {"type": "boolean"},
+            "limit": {"type": "integer"},
+        },
+        "required": ["command"],
+    }
+
+    def __init__(self, session: Optional["DataSession"] = None):
+        self.session = session or get_data_session()
+
+    def to_param(self) -> Dict[str, Any]:
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": self.parameters,
+            },
+        }
+
+    async def __call__(self, **kwargs) -> str:
+        return await self.execute(**kwargs)
+
+    async def execute(self, command: str, **kwargs) -> str:
+        try:
+            result = self.run(command, **kwargs)
+        except (DataSessionError, OSError) as e:
+            return f"Error: {e}"
+        return json.dumps(result, ensure_ascii=False, default=str)
+
+    def run(
+        self,
+        command: str,
+        path: Optional[str] = None,
+        dataset: Optional[str] = None,
+        columns=None,
+        where=None,
+        group_by=None,
+        metrics=None,
+        sort_by: Optional[str] = None,
+        descending: Optional[bool] = None,
+        limit: Optional[int] = None,
+    ) -> Any:
+        session = self.session
+        if command == "load":
+            if not path:
+                raise DataSessionError("load needs a path")
+            return session.load(path, dataset).describe()
+        if command == "list":
+            return {name: ds.rows for name, ds in session.datasets.items()}
+        if dataset is None and len(session.datasets) == 1:
+            dataset = next(iter(session.datasets))
+        if dataset is None:
+            raise DataSessionError("Specify which dataset to use")
+        if command == "drop":
+            session.drop(dataset)
+            return {"dropped": dataset}
+        data = session.get(dataset)
+        if command == "describe":
+            return data.describe()
+        if command == "select":
+            return data.select(columns, where, sort_by, bool(descending), limit or 20)
+        if command == "aggregate":
+            if not metrics:
+                metrics = {(group_by or list(data.columns))[0]: ["count"]}
+            return data.aggregate(
+                metrics,
+                group_by,
+                where,
+                sort_by,
+                True if descending is None else descending,
+                limit or 50,
+            )
+        raise DataSessionError(f"Unknown command {command!r}")
+
+
+_data_session: Optional[DataSession] = None
+
+
+def get_data_session() -> DataSession:
+    """Session shared by the agents of this process."""
+    global _data_session
+    if _data_session is None:
+        _data_session = DataSession()
+    return _data_session
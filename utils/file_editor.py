@@ -0,0 +1,273 @@
+"""
+Indexed file editing engine for str_replace_editor on large files.
+
+Files are memory-mapped and a line-offset index is kept per session, so
+`view` ranges are answered without reading the whole file. Edits are written
+as patches (prefix, replacement, suffix streamed into a temp file) and moved
+into place with an atomic rename. Cached indexes are invalidated by mtime.
+"""
+import mmap
+import os
+import tempfile
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+COPY_CHUNK = 1024 * 1024
+
+
+class FileEditError(Exception):
+    """Raised when an edit cannot be applied; mirrors ToolError messages."""
+
+
+@dataclass
+class _Patch:
+    """Replace `old` at `offset` with `new`; kept for undo."""
+
+    offset: int
+    old: bytes
+    new: bytes
+
+
+class LineIndex:
+    """Byte offsets of every line start in a file."""
+
+    def __init__(self, starts: array, size: int):
+        self.starts = starts
+        self.size = size
+
+    @classmethod
+    def build(cls, path: str) -> "LineIndex":
+        starts = array("q", [0])
+        size = os.path.getsize(path)
+        if size:
+            with open(path, "rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mm:
+                pos = mm.find(b"\n")
+                while pos != -1:
+                    starts.append(pos + 1)
+                    pos = mm.find(b"\n", pos + 1)
+        return cls(starts, size)
+
+    @property
+    def line_count(self) -> int:
+        # A trailing newline does not open a new line.
+        return len(self.starts) - (1 if self.starts[-1] == self.size else 0)
+
+    def line_of(self, offset: int) -> int:
+        """Return the 0-based line containing `offset` (O(log n))."""
+        return bisect_right(self.starts, offset) - 1
+
+    def span(self, start_line: int, end_line: int) -> Tuple[int, int]:
+        """Byte range of 1-based inclusive lines [start_line, end_line]."""
+        begin = self.starts[start_line - 1]
+        end = self.starts[end_line] if end_line < len(self.starts) else self.size
+        return begin, end
+
+    def apply(self, patch: _Patch) -> None:
+        """Update the index in place for a patch instead of rescanning the file."""
+        delta = len(patch.new) - len(patch.old)
+        first = self.line_of(patch.offset) + 1
+        last = bisect_right(self.starts, patch.offset + len(patch.old))
+        inserted = array(
+            "q",
+            (patch.offset + i + 1 for i, byte in enumerate(patch.new) if byte == 0x0A),
+        )
+        tail = array("q", (s + delta for s in self.starts[last:]))
+        self.starts = self.starts[:first] + inserted + tail
+        self.size += delta
+
+
+@dataclass
+class _CachedFile:
+    mtime_ns: int
+    size: int
+    index: LineIndex
+
+
+class IndexedFileEditor:
+    """Per-session editor: cached line indexes, patch writes and undo history."""
+
+    def __init__(self, encoding: str = "utf-8"):
+        self.encoding = encoding
+        self._cache: Dict[str, _CachedFile] = {}
+        self._history: Dict[str, List[_Patch]] = {}
+
+    def index(self, path: str) -> LineIndex:
+        """Return the line index for `path`, rebuilding it if the file changed."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        cached = self._cache.get(path)
+        if cached and cached.mtime_ns == st.st_mtime_ns and cached.size == st.st_size:
+            return cached.index
+        index = LineIndex.build(path)
+        self._cache[path] = _CachedFile(st.st_mtime_ns, st.st_size, index)
+        return index
+
+    def view(
+        self, path: str, view_range: Optional[List[int]] = None
+    ) -> Tuple[str, int]:
+        """Return (text, first_line) for a 1-based inclusive range; -1 means EOF."""
+        index = self.index(path)
+        total = index.line_count
+        if not view_range:
+            start, end = 1, total
+        else:
+            if len(view_range) != 2:
+                raise FileEditError(
+                    "Invalid `view_range`. It should be a list of two integers."
+                )
+            start, end = view_range
+            if end == -1:
+                end = total
+            if start < 1 or start > max(total, 1):
+                raise FileEditError(
+                    f"Invalid `view_range`: {view_range}. Its first element `{start}` "
+                    f"should be within the range of lines of the file: {[1, total]}"
+                )
+            if end > total:
+                raise FileEditError(
+                    f"Invalid `view_range`: {view_range}. Its second element `{end}` "
+                    f"should be smaller than the number of lines in the file: `{total}`"
+                )
+            if end < start:
+                raise FileEditError(
+                    f"Invalid `view_range`: {view_range}. Its second element `{end}` "
+                    f"should be larger or equal than its first `{start}`"
+                )
+        if total == 0:
+            return "", 1
+        begin, stop = index.span(start, end)
+        return self._read(path, begin, stop).rstrip("\n"), start
+
+    def str_replace(self, path: str, old_str: str, new_str: str = "") -> int:
+        """Replace the unique occurrence of `old_str`; return its 1-based line."""
+        old = old_str.encode(self.encoding)
+        if not old:
+            raise FileEditError("`old_str` must not be empty.")
+        offsets = self._find(path, old, limit=2)
+        if not offsets:
+            raise FileEditError(
+                f"No replacement was performed, old_str `{old_str}` did not appear "
+                f"verbatim in {path}."
+            )
+        if len(offsets) > 1:
+            index = self.index(path)
+            lines = sorted({index.line_of(o) + 1 for o in self._find(path, old)})
+            raise FileEditError(
+                f"No replacement was performed. Multiple occurrences of old_str "
+                f"`{old_str}` in lines {lines}. Please ensure it is unique"
+            )
+        patch = _Patch(offsets[0], old, new_str.encode(self.encoding))
+        self._apply(path, patch)
+        return self.index(path).line_of(patch.offset) + 1
+
+    def insert(self, path: str, insert_line: int, new_str: str) -> None:
+        """Insert `new_str` after 1-based `insert_line` (0 inserts at the top)."""
+        index = self.index(path)
+        total = index.line_count
+        if insert_line < 0 or insert_line > total:
+            raise FileEditError(
+                f"Invalid `insert_line` parameter: {insert_line}. It should be within "
+                f"the range of lines of the file: {[0, total]}"
+            )
+        text = new_str if new_str.endswith("\n") else new_str + "\n"
+        if insert_line == 0:
+            offset = 0
+        else:
+            offset = index.span(insert_line, insert_line)[1]
+            if (
+                offset == index.size
+                and index.size
+                and not self._ends_with_newline(path, index.size)
+            ):
+                text = "\n" + text.rstrip("\n")
+        self._apply(path, _Patch(offset, b"", text.encode(self.encoding)))
+
+    def undo(self, path: str) -> None:
+        """Revert the last edit made to `path` through this editor."""
+        history = self._history.get(os.path.abspath(path))
+        if not history:
+            raise FileEditError(f"No edit history found for {path}.")
+        patch = history[-1]
+        with open(path, "rb") as f:
+            f.seek(patch.offset)
+            current = f.read(len(patch.new))
+        if current != patch.new:
+            # Changed outside this editor; splicing by offset would corrupt it
+            raise FileEditError(
+                f"Cannot undo the last edit to {path}: the file was modified since."
+            )
+        history.pop()
+        self._apply(path, _Patch(patch.offset, patch.new, patch.old), record=False)
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        if path is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(os.path.abspath(path), None)
+
+    def _find(self, path: str, needle: bytes, limit: int = 0) -> List[int]:
+        if os.path.getsize(path) == 0:
+            return []
+        found: List[int] = []
+        with open(path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            pos = mm.find(needle)
+            while pos != -1:
+                found.append(pos)
+                if limit and len(found) >= limit:
+                    break
+                pos = mm.find(needle, pos + 1)
+        return found
+
+    def _read(self, path: str, begin: int, end: int) -> str:
+        with open(path, "rb") as f:
+            f.seek(begin)
+            return f.read(end - begin).decode(self.encoding, errors="replace")
+
+    def _ends_with_newline(self, path: str, size: int) -> bool:
+        with open(path, "rb") as f:
+            f.seek(size - 1)
+            return f.read(1) == b"\n"
+
+    def _apply(self, path: str, patch: _Patch, record: bool = True) -> None:
+        path = os.path.abspath(path)
+        index = self.index(path)
+        st = os.stat(path)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".edit-")
+        try:
+            with open(path, "rb") as src, os.fdopen(fd, "wb") as dst:
+                self._copy(src, dst, patch.offset)
+                src.seek(len(patch.old), os.SEEK_CUR)
+                dst.write(patch.new)
+                self._copy(src, dst, None)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.chmod(tmp, st.st_mode & 0o7777)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        index.apply(patch)
+        st = os.stat(path)
+        self._cache[path] = _CachedFile(st.st_mtime_ns, st.st_size, index)
+        if record:
+            self._history.setdefault(path, []).append(patch)
+
+    @staticmethod
+    def _copy(src, dst, length: Optional[int]) -> None:
+        remaining = length
+        while remaining is None or remaining > 0:
+            size = COPY_CHUNK if remaining is None else min(COPY_CHUNK, remaining)
+            chunk = src.read(size)
+            if not chunk:
+                break
+            dst.write(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
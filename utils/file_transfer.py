@@ -0,0 +1,298 @@
+"""
+Parallel file and directory transfer for the WSL agent tools.
+
+Copies between the Linux side and `/mnt/c` are dominated by per-file
+latency, so files are copied by a thread pool and large files are split
+into chunks that are copied concurrently at their own offsets. Data moves
+in the kernel with `copy_file_range` where the filesystems allow it, then
+`sendfile`, then `pread`/`pwrite`. Files whose size and mtime (or hash)
+already match the destination are skipped; mtimes must match exactly except
+on filesystems that round them (drvfs, FAT), and every file is written to a
+temporary name and renamed into place, so an interrupted transfer never
+leaves a truncated file that would later look unchanged.
+"""
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional, Tuple
+
+
+CHUNK_SIZE = 8 * 1024 * 1024
+COPY_BLOCK = 1024 * 1024
+HASH_BLOCK = 1024 * 1024
+# drvfs and FAT-style filesystems round timestamps
+MTIME_TOLERANCE_NS = 2 * 10**9
+COARSE_MTIME_FILESYSTEMS = {"drvfs", "9p", "vfat", "msdos", "exfat"}
+
+
+class TransferError(OSError):
+    """A file could not be copied or failed verification."""
+
+
+@dataclass
+class TransferStats:
+    files_total: int = 0
+    files_copied: int = 0
+    files_skipped: int = 0
+    bytes_total: int = 0
+    bytes_copied: int = 0
+    started: float = field(default_factory=time.monotonic)
+    finished: Optional[float] = None
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Bytes copied per second."""
+        return self.bytes_copied / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def files_done(self) -> int:
+        return self.files_copied + self.files_skipped + len(self.errors)
+
+
+ProgressCallback = Callable[[TransferStats], None]
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _copy_range(
+    src_fd: int, dst_fd: int, offset: int, length: int, exclusive: bool = False
+) -> int:
+    """Copy `length` bytes at `offset` between two open files.
+
+    `exclusive` means no other thread writes to `dst_fd`, which allows
+    `sendfile` (it writes at the shared file position).
+    """
+    end = offset + length
+    position = offset
+    copy_file_range = getattr(os, "copy_file_range", None)
+    while copy_file_range is not None and position < end:
+        try:
+            copied = copy_file_range(
+                src_fd, dst_fd, min(COPY_BLOCK, end - position), position, position
+            )
+        except OSError:
+            # Cross-device or unsupported filesystem (drvfs, 9p, older kernels)
+            break
+        if copied == 0:
+            return position - offset
+        position += copied
+    sendfile = getattr(os, "sendfile", None)
+    if exclusive and sendfile is not None and position < end:
+        os.lseek(dst_fd, position, os.SEEK_SET)
+        try:
+            while position < end:
+                sent = sendfile(dst_fd, src_fd, position, end - position)
+                if sent == 0:
+                    return position - offset
+                position += sent
+        except OSError:
+            pass
+    while position < end:
+        block = os.pread(src_fd, min(COPY_BLOCK, end - position), position)
+        if not block:
+            break
+        view = memoryview(block)
+        while view:
+            written = os.pwrite(dst_fd, view, position)
+            view = view[written:]
+            position += written
+    return position - offset
+
+
+def filesystem_type(path: str) -> Optional[str]:
+    """Type of the filesystem `path` is (or would be) on, from /proc/mounts."""
+    target = os.path.realpath(path)
+    best, best_type = "", None
+    try:
+        with open("/proc/mounts", "r", encoding="utf-8") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount = fields[1].replace("\\040", " ")
+                inside = target == mount or target.startswith(mount.rstrip("/") + "/")
+                if inside and len(mount) > len(best):
+                    best, best_type = mount, fields[2]
+    except OSError:
+        return None
+    return best_type
+
+
+class FileTransfer:
+    """Copies a file or directory tree, skipping files that are unchanged.
+
+    `compare` is "mtime" (size and modification time) or "hash" (size and
+    content hash). Modification times are compared exactly unless
+    `mtime_tolerance_ns` is given; by default a tolerance is used only when
+    the destination is on a filesystem that rounds timestamps. With
+    `verify=True` every copied file is re-read and its hash checked against
+    the source.
+    """
+
+    def __init__(
+        self,
+        workers: int = 8,
+        chunk_size: int = CHUNK_SIZE,
+        compare: str = "mtime",
+        verify: bool = False,
+        on_progress: Optional[ProgressCallback] = None,
+        mtime_tolerance_ns: Optional[int] = None,
+    ):
+        if compare not in ("mtime", "hash"):
+            raise ValueError(f"Unknown compare mode: {compare}")
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.compare = compare
+        self.verify = verify
+        self.on_progress = on_progress
+        self.mtime_tolerance_ns = mtime_tolerance_ns
+        self._tolerance = mtime_tolerance_ns or 0
+        self._lock = threading.Lock()
+
+    def transfer(self, src: str, dst: str) -> TransferStats:
+        """Copy `src` to `dst`; a directory is copied recursively."""
+        stats = TransferStats()
+        if self.mtime_tolerance_ns is None:
+            coarse = filesystem_type(dst) in COARSE_MTIME_FILESYSTEMS
+            self._tolerance = MTIME_TOLERANCE_NS if coarse else 0
+        pairs = list(self._plan(src, dst))
+        stats.files_total = len(pairs)
+        stats.bytes_total = sum(st.st_size for _, _, st in pairs)
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            futures = [
+                pool.submit(self._transfer_file, s, d, st, stats) for s, d, st in pairs
+            ]
+            for future in futures:
+                future.result()
+        stats.finished = time.monotonic()
+        self._report(stats)
+        return stats
+
+    def _plan(self, src: str, dst: str) -> Iterator[Tuple[str, str, os.stat_result]]:
+        if not os.path.isdir(src):
+            yield src, dst, os.stat(src)
+            return
+        for root, dirs, files in os.walk(src):
+            dirs.sort()
+            target = os.path.join(dst, os.path.relpath(root, src))
+            os.makedirs(target, exist_ok=True)
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                if os.path.isfile(path):
+                    yield path, os.path.join(target, name), os.stat(path)
+
+    def is_unchanged(self, src: str, dst: str, src_stat: os.stat_result) -> bool:
+        try:
+            dst_stat = os.stat(dst)
+        except OSError:
+            return False
+        if dst_stat.st_size != src_stat.st_size:
+            return False
+        if self.compare == "hash":
+            return file_digest(src) == file_digest(dst)
+        return abs(dst_stat.st_mtime_ns - src_stat.st_mtime_ns) <= self._tolerance
+
+    def _transfer_file(
+        self,
+        src: str,
+        dst: str,
+        src_stat: os.stat_result,
+        stats: TransferStats,
+    ) -> None:
+        try:
+            if self.is_unchanged(src, dst, src_stat):
+                with self._lock:
+                    stats.files_skipped += 1
+            else:
+                self._copy_file(src, dst, src_stat, stats)
+                with self._lock:
+                    stats.files_copied += 1
+        except OSError as e:
+            with self._lock:
+                stats.errors.append((src, str(e)))
+        self._report(stats)
+
+    def _copy_file(
+        self,
+        src: str,
+        dst: str,
+        src_stat: os.stat_result,
+        stats: TransferStats,
+    ) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+        size = src_stat.st_size
+        partial = f"{dst}.part-{os.getpid()}-{threading.get_ident()}"
+        src_fd = os.open(src, os.O_RDONLY)
+        try:
+            dst_fd = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.ftruncate(dst_fd, size)
+                if size > self.chunk_size:
+                    copied = self._copy_chunks(src_fd, dst_fd, size, stats)
+                else:
+                    copied = _copy_range(src_fd, dst_fd, 0, size, exclusive=True)
+                    self._add_bytes(stats, copied)
+            finally:
+                os.close(dst_fd)
+            if copied != size:
+                raise TransferError(f"{src} changed during copy")
+            os.utime(partial, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+            if self.verify and file_digest(src) != file_digest(partial):
+                raise TransferError(f"Verification failed for {src}")
+            os.replace(partial, dst)
+        except BaseException:
+            try:
+                os.unlink(partial)
+            except OSError:
+                pass
+            raise
+        finally:
+            os.close(src_fd)
+
+    def _copy_chunks(
+        self, src_fd: int, dst_fd: int, size: int, stats: TransferStats
+    ) -> int:
+        # Chunks get their own pool: waiting on the per-file pool from inside
+        # one of its workers deadlocks once every worker is waiting
+        offsets = range(0, size, self.chunk_size)
+
+        def copy(offset: int) -> int:
+            copied = _copy_range(
+                src_fd, dst_fd, offset, min(self.chunk_size, size - offset)
+            )
+            self._add_bytes(stats, copied)
+            return copied
+
+        with ThreadPoolExecutor(min(self.workers, len(offsets))) as chunk_pool:
+            return sum(chunk_pool.map(copy, offsets))
+
+    def _add_bytes(self, stats: TransferStats, count: int) -> None:
+        with self._lock:
+            stats.bytes_copied += count
+
+    def _report(self, stats: TransferStats) -> None:
+        if self.on_progress is not None:
+            self.on_progress(stats)
+
+
+def format_bytes(count: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if count < 1024:
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GB"
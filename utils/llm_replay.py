@@ -0,0 +1,296 @@
+"""
+Record/replay for LLM chat completions.
+
+The recorder wraps the OpenAI-compatible client used by `app.llm.LLM` and
+appends every request/response pair to a JSONL transcript. The replay client
+serves those responses back without network access, optionally sleeping
+according to the recorded or a synthetic latency distribution, so entry
+points can run offline and deterministically for benchmarks and CI.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+
+RECORD_ENV = "OPENMANUS_LLM_RECORD"
+REPLAY_ENV = "OPENMANUS_LLM_REPLAY"
+LATENCY_ENV = "OPENMANUS_LLM_REPLAY_LATENCY"
+
+
+class ReplayMissError(LookupError):
+    """No recorded response matches the request."""
+
+
+def request_key(params: Dict[str, Any]) -> str:
+    """Stable hash of the parts of a request that determine the response."""
+    relevant = {
+        k: v
+        for k, v in params.items()
+        if k not in ("stream", "timeout", "extra_headers", "stream_options")
+    }
+    blob = json.dumps(relevant, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(blob.encode()).hexdigest()[:32]
+
+
+def _dump(obj: Any) -> Any:
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(exclude_none=True)
+    return obj
+
+
+class TranscriptWriter:
+    """Append-only JSONL writer shared by every recorded client in a process."""
+
+    def __init__(self, path: str, store_requests: bool = False):
+        self.path = path
+        self.store_requests = store_requests
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, params: Dict[str, Any], latency: float, **payload) -> None:
+        record = {
+            "key": request_key(params),
+            "model": params.get("model"),
+            "latency": round(latency, 4),
+            **payload,
+        }
+        if self.store_requests:
+            record["request"] = params
+        line = json.dumps(record, default=str, separators=(",", ":"))
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class LatencyModel:
+    """Delay applied to replayed responses.
+
+    Specs: "none" (default), "recorded", "fixed:<s>", "lognormal:<mu>,<sigma>",
+    optionally suffixed with "*<scale>" (e.g. "recorded*0.1").
+    """
+
+    def __init__(self, spec: Optional[str] = None, seed: int = 0):
+        spec = (spec or "none").strip()
+        spec, _, scale = spec.partition("*")
+        self.scale = float(scale) if scale else 1.0
+        self.kind, _, args = spec.partition(":")
+        self.args = [float(a) for a in args.split(",") if a]
+        self._rng = random.Random(seed)
+
+    def delay(self, recorded: float) -> float:
+        if self.kind == "recorded":
+            value = recorded
+        elif self.kind == "fixed":
+            value = self.args[0]
+        elif self.kind == "lognormal":
+            value = self._rng.lognormvariate(*self.args)
+        else:
+            value = 0.0
+        return value * self.scale
+
+
+class RecordingCompletions:
+    """Wraps `client.chat.completions` and records every call."""
+
+    def __init__(self, completions: Any, writer: TranscriptWriter):
+        self._completions = completions
+        self._writer = writer
+
+    async def create(self, **params) -> Any:
+        started = time.perf_counter()
+        response = await self._completions.create(**params)
+        if not params.get("stream"):
+            self._writer.append(
+                params, time.perf_counter() - started, response=_dump(response)
+            )
+            return response
+        return self._record_stream(params, response, started)
+
+    async def _record_stream(
+        self, params: Dict[str, Any], stream: Any, started: float
+    ) -> AsyncIterator[Any]:
+        chunks = []
+        async for chunk in stream:
+            chunks.append(_dump(chunk))
+            yield chunk
+        self._writer.append(params, time.perf_counter() - started, chunks=chunks)
+
+
+class ReplayCompletions:
+    """Serves recorded responses in place of `client.chat.completions`.
+
+    Requests are matched by key; repeated identical requests get successive
+    responses. With `strict=False`, a miss falls back to the next unused
+    record in file order, which tolerates prompts containing timestamps.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        latency: Optional[LatencyModel] = None,
+        strict: bool = False,
+    ):
+        self.latency = latency or LatencyModel()
+        self.strict = strict
+        self._by_key: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._in_order: List[Dict[str, Any]] = []
+        self._used = set()
+        self._cursor = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._by_key[record["key"]].append(record)
+                    self._in_order.append(record)
+
+    async def create(self, **params) -> Any:
+        record = self._next(params)
+        delay = self.latency.delay(record.get("latency", 0.0))
+        if "chunks" in record:
+            return self._stream(record["chunks"], delay)
+        if delay:
+            await asyncio.sleep(delay)
+        return _chat_completion(record["response"])
+
+    def _next(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        queue = self._by_key.get(request_key(params))
+        while queue:
+            record = queue.popleft()
+            if id(record) not in self._used:
+                self._used.add(id(record))
+                return record
+        if self.strict:
+            raise ReplayMissError(
+                f"No recorded response for request to {params.get('model')}"
+            )
+        while self._cursor < len(self._in_order):
+            record = self._in_order[self._cursor]
+            self._cursor += 1
+            if id(record) not in self._used:
+                self._used.add(id(record))
+                return record
+        raise ReplayMissError("Transcript exhausted")
+
+    @staticmethod
+    async def _stream(chunks: List[Dict[str, Any]], delay: float):
+        step = delay / len(chunks) if chunks else 0
+        for chunk in chunks:
+            if step:
+                await asyncio.sleep(step)
+            yield _chat_completion_chunk(chunk)
+
+
+def _chat_completion(data: Dict[str, Any]) -> Any:
+    from openai.types.chat import ChatCompletion
+
+    return ChatCompletion.model_validate(data)
+
+
+def _chat_completion_chunk(data: Dict[str, Any]) -> Any:
+    from openai.types.chat import ChatCompletionChunk
+
+    return ChatCompletionChunk.model_validate(data)
+
+
+class ClientProxy:
+    """Client stand-in exposing `chat.completions` and delegating the rest."""
+
+    def __init__(self, client: Any, completions: Any):
+        self._client = client
+        self.chat = SimpleNamespace(completions=completions)
+
+    def __getattr__(self, name: str) -> Any:
+        if self._client is None:
+            raise AttributeError(name)
+        return getattr(self._client, name)
+
+
+def wrap_client(
+    client: Any,
+    record: Optional[str] = None,
+    replay: Optional[str] = None,
+    latency: Optional[str] = None,
+    strict: bool = False,
+) -> Any:
+    """Return a client that records to `record` or replays from `replay`."""
+    if replay:
+        return ClientProxy(
+            client, ReplayCompletions(replay, LatencyModel(latency), strict=strict)
+        )
+    if record:
+        return ClientProxy(
+            client, RecordingCompletions(client.chat.completions, _writer(record))
+        )
+    return client
+
+
+_writers: Dict[str, TranscriptWriter] = {}
+_replays: Dict[str, ReplayCompletions] = {}
+
+
+def _writer(path: str) -> TranscriptWriter:
+    if path not in _writers:
+        _writers[path] = TranscriptWriter(path)
+    return _writers[path]
+
+
+def configure_llm_transcript(
+    record: Optional[str] = None,
+    replay: Optional[str] = None,
+    latency: Optional[str] = None,
+    strict: bool = False,
+) -> None:
+    """Patch `app.llm.LLM` so every client it creates records or replays.
+
+    Falls back to the OPENMANUS_LLM_RECORD / OPENMANUS_LLM_REPLAY /
+    OPENMANUS_LLM_REPLAY_LATENCY environment variables. Call before agents
+    are constructed.
+    """
+    record = record or os.environ.get(RECORD_ENV)
+    replay = replay or os.environ.get(REPLAY_ENV)
+    latency = latency or os.environ.get(LATENCY_ENV)
+    if not (record or replay):
+        return
+
+    from app.llm import LLM
+
+    if getattr(LLM.__init__, "_transcript_patched", False):
+        return
+    original_init = LLM.__init__
+
+    def __init__(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        client = getattr(self, "client", None)
+        if isinstance(client, ClientProxy):
+            return
+        if replay:
+            # One replay cursor per transcript, shared by every LLM instance.
+            if replay not in _replays:
+                _replays[replay] = ReplayCompletions(
+                    replay, LatencyModel(latency), strict=strict
+                )
+            self.client = ClientProxy(client, _replays[replay])
+        else:
+            self.client = wrap_client(client, record=record)
+
+    __init__._transcript_patched = True
+    LLM.__init__ = __init__
+
+
+def add_transcript_arguments(parser: Any) -> None:
+    """Add --record/--replay/--replay-latency options to an argparse parser."""
+    parser.add_argument("--record", help="Append LLM calls to this JSONL transcript")
+    parser.add_argument(
+        "--replay", help="Serve LLM calls from this JSONL transcript (offline)"
+    )
+    parser.add_argument(
+        "--replay-latency",
+        help="Replay delay: none, recorded, fixed:<s> or lognormal:<mu>,<sigma>",
+    )
@@ -0,0 +1,240 @@
+"""
+Structured, non-blocking logging for every entry point.
+
+`configure_logging()` puts a single QueueHandler on the root logger. Callers
+only format the record and enqueue it; a QueueListener thread does all I/O:
+human-readable console output and, when a log directory is configured, JSON
+lines in files rotated by size and age. Verbose (below WARNING) records from
+chatty components can be sampled per logger prefix. loguru, used by the app
+package, is bridged into the same queue.
+
+Environment:
+    OPENMANUS_LOG_LEVEL   root level (default INFO)
+    OPENMANUS_LOG_DIR     directory for rotated JSON logs (default: none)
+    OPENMANUS_LOG_SAMPLE  per-component rates, e.g. "app.agent=0.1,app.tool=0.5"
+"""
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+
+LEVEL_ENV = "OPENMANUS_LOG_LEVEL"
+DIR_ENV = "OPENMANUS_LOG_DIR"
+SAMPLE_ENV = "OPENMANUS_LOG_SAMPLE"
+
+QUEUE_SIZE = 10000
+CONSOLE_FORMAT = "%(asctime)s | %(levelname)-8s | %(name)s - %(message)s"
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including fields passed via `extra=`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(
+                record.created, datetime.timezone.utc
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        elif record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SizeTimeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotates when the file exceeds `max_bytes` or is older than `interval` s."""
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = 50 * 1024 * 1024,
+        interval: float = 24 * 3600,
+        backup_count: int = 10,
+    ):
+        super().__init__(
+            filename,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+        self.interval = interval
+        try:
+            self.opened_at = os.stat(filename).st_mtime
+        except OSError:
+            self.opened_at = time.time()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.interval and time.time() - self.opened_at >= self.interval:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self.opened_at = time.time()
+
+
+class SamplingFilter(logging.Filter):
+    """Keep 1 in N records below WARNING for the configured logger prefixes.
+
+    Sampling is counter based, so a rate of 0.1 keeps exactly every tenth
+    record; the kept record carries `sample_rate` for later re-weighting.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix wins
+        self.rates = dict(sorted(rates.items(), key=lambda kv: -len(kv[0])))
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def rate_for(self, name: str) -> Optional[str]:
+        for prefix in self.rates:
+            if name == prefix or name.startswith(prefix + "."):
+                return prefix
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        prefix = self.rate_for(record.name)
+        if prefix is None:
+            return True
+        rate = self.rates[prefix]
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        every = max(1, round(1 / rate))
+        with self._lock:
+            count = self._counters.get(prefix, 0)
+            self._counters[prefix] = count + 1
+        if count % every:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: records are dropped when the queue is full."""
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+def parse_sample_rates(spec: Optional[str]) -> Dict[str, float]:
+    rates = {}
+    for part in (spec or "").split(","):
+        name, _, value = part.partition("=")
+        if name.strip() and value.strip():
+            rates[name.strip()] = float(value)
+    return rates
+
+
+class _LoguruBridge:
+    """loguru sink that re-emits messages through stdlib logging."""
+
+    def write(self, message) -> None:
+        record = message.record
+        logger = logging.getLogger(record["name"] or "loguru")
+        level = logging.getLevelName(record["level"].name)
+        if not isinstance(level, int):
+            level = record["level"].no
+        exc = record["exception"]
+        exc_info = (exc.type, exc.value, exc.traceback) if exc else None
+        logger.log(level, record["message"], exc_info=exc_info)
+
+
+def bridge_loguru() -> bool:
+    """Route loguru (app.logger) through the queue instead of its own sinks."""
+    loguru = sys.modules.get("loguru")
+    if loguru is None:
+        return False
+    loguru.logger.remove()
+    loguru.logger.add(_LoguruBridge(), level=0, format="{message}")
+    return True
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    log_dir: Optional[str] = None,
+    sample_rates: Optional[Dict[str, float]] = None,
+    console: bool = True,
+    max_bytes: int = 50 * 1024 * 1024,
+    interval: float = 24 * 3600,
+) -> logging.handlers.QueueListener:
+    """Install the queue pipeline on the root logger (idempotent)."""
+    global _listener
+    if _listener is not None:
+        bridge_loguru()
+        return _listener
+
+    level = (level or os.environ.get(LEVEL_ENV) or "INFO").upper()
+    log_dir = log_dir or os.environ.get(DIR_ENV)
+    if sample_rates is None:
+        sample_rates = parse_sample_rates(os.environ.get(SAMPLE_ENV))
+
+    handlers = []
+    if console:
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        handlers.append(stream)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+        file_handler = SizeTimeRotatingFileHandler(
+            os.path.join(log_dir, "openmanus.jsonl"), max_bytes, interval
+        )
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    log_queue: queue.Queue = queue.Queue(QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rates))
+
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(shutdown_logging)
+    bridge_loguru()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,394 @@
+"""
+Long-term memory across agent runs.
+
+Task summaries (and, with --remember-tools, tool results) are embedded and
+appended to a memory-mapped float32 matrix on disk (`vectors.f32`) with
+their metadata in `meta.jsonl`. Search is a vectorized dot product over the matrix; once the
+store is large it trains an IVF index (spherical k-means centroids) and
+only scores the rows of the few closest clusters, so the top-k memories for
+a new prompt come back in milliseconds at the start of a run.
+
+The default embedder hashes words and character trigrams into a fixed
+number of dimensions. It needs no model or network access; a real
+embedding function can be passed as `embedder` (texts -> 2-D array).
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from utils.startup import lazy_import
+
+
+# Loaded on first use, so entry points can offer --memory without paying
+# for numpy on every start
+np = lazy_import("numpy")
+
+
+DEFAULT_MEMORY_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "workspace",
+    ".memory",
+)
+DIM = 384
+MAX_TEXT = 4000
+# Below this many rows an exact scan is already fast enough
+IVF_MIN_ROWS = 4096
+IVF_PROBES = 8
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 20000
+
+Embedder = Callable[[Sequence[str]], "np.ndarray"]
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+# ToolCallAgent.execute_tool wraps results as "Observed output of cmd `name`
+# executed:\n<result>"; a failed ToolResult renders as "Error: ..."
+_OBSERVATION = re.compile(r"\AObserved output of cmd `[^`]*` executed:\n")
+
+
+class HashingEmbedder:
+    """Signed feature hashing of words and character trigrams."""
+
+    def __init__(self, dim: int = DIM):
+        self.dim = dim
+
+    def features(self, text: str) -> List[str]:
+        words = _TOKEN.findall(text.lower())
+        grams = [f"#{w[i:i + 3]}" for w in words for i in range(max(1, len(w) - 2))]
+        pairs = [f"{a} {b}" for a, b in zip(words, words[1:])]
+        return words + grams + pairs
+
+    def __call__(self, texts: Sequence[str]) -> "np.ndarray":
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.fromiter(
+                (zlib.crc32(f.encode()) for f in self.features(text)),
+                dtype=np.uint32,
+            )
+            if not len(hashes):
+                continue
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(out[row], hashes % self.dim, signs)
+        return _normalize(out)
+
+
+def _normalize(vectors: "np.ndarray") -> "np.ndarray":
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+@dataclass
+class MemoryHit:
+    id: int
+    score: float
+    kind: str
+    text: str
+    meta: Dict[str, Any]
+
+
+class MemoryStore:
+    """Append-only embedded memories with exact or IVF top-k search."""
+
+    def __init__(
+        self,
+        root: str = DEFAULT_MEMORY_DIR,
+        embedder: Optional[Embedder] = None,
+        dim: int = DIM,
+        dedupe_threshold: float = 0.97,
+    ):
+        self.root = root
+        self.embedder = embedder or HashingEmbedder(dim)
+        self.dim = dim
+        self.dedupe_threshold = dedupe_threshold
+        self.vectors_path = os.path.join(root, "vectors.f32")
+        self.meta_path = os.path.join(root, "meta.jsonl")
+        self.ivf_path = os.path.join(root, "ivf.npz")
+        self._lock = threading.RLock()
+        self._records: List[Dict[str, Any]] = []
+        self._kind_codes: Dict[str, int] = {}
+        self._kinds = np.zeros(0, dtype=np.int32)
+        self._vectors: Optional[np.memmap] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._trained_rows = 0
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    # Storage
+
+    def _load(self) -> None:
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "rb+") as f:
+                data = f.read()
+                # Drop a line torn by a crash so the next append starts clean
+                complete = data.rfind(b"\n") + 1
+                if complete < len(data):
+                    f.truncate(complete)
+            for line in data[:complete].decode("utf-8").splitlines():
+                self._records.append(json.loads(line))
+        self._kinds = np.array(
+            [self._kind_code(r["kind"]) for r in self._records], dtype=np.int32
+        )
+        capacity = max(1024, len(self._records))
+        if os.path.exists(self.vectors_path):
+            rows = os.path.getsize(self.vectors_path) // (4 * self.dim)
+            capacity = max(capacity, rows)
+        self._open_vectors(capacity)
+        if os.path.exists(self.ivf_path):
+            with np.load(self.ivf_path) as ivf:
+                if ivf["centroids"].shape[1] == self.dim:
+                    self._centroids = ivf["centroids"]
+                    self._assign = ivf["assign"][: len(self._records)]
+                    self._trained_rows = int(ivf["trained_rows"])
+        if self._centroids is not None and len(self._assign) < len(self):
+            tail = np.arange(len(self._assign), len(self))
+            self._assign = np.concatenate([self._assign, self._nearest(tail)])
+
+    def _open_vectors(self, capacity: int) -> None:
+        size = capacity * self.dim * 4
+        with open(self.vectors_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self._vectors = np.memmap(
+            self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim)
+        )
+
+    def _ensure_capacity(self, rows: int) -> None:
+        capacity = self._vectors.shape[0]
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        self._vectors.flush()
+        self._vectors = None
+        self._open_vectors(capacity)
+
+    def _kind_code(self, kind: str) -> int:
+        return self._kind_codes.setdefault(kind, len(self._kind_codes))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _matrix(self) -> "np.ndarray":
+        return self._vectors[: len(self)]
+
+    # Writing
+
+    def add(self, text: str, kind: str = "task", **meta: Any) -> int:
+        """Store one memory; near-duplicates of an existing one are skipped."""
+        return self.add_many([text], kind, **meta)[0]
+
+    def add_many(
+        self, texts: Sequence[str], kind: str = "task", **meta: Any
+    ) -> List[int]:
+        texts = [t[:MAX_TEXT] for t in texts]
+        vectors = _normalize(self.embedder(texts))
+        ids = []
+        lines = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                duplicate = self._duplicate_of(vector, kind)
+                if duplicate is not None:
+                    ids.append(duplicate)
+                    continue
+                row = len(self)
+                self._ensure_capacity(row + 1)
+                self._vectors[row] = vector
+                record = {"id": row, "kind": kind, "ts": time.time(), "text": text}
+                if meta:
+                    record["meta"] = meta
+                lines.append(json.dumps(record, ensure_ascii=False, default=str))
+                self._records.append(record)
+                self._kinds = np.append(self._kinds, self._kind_code(kind))
+                if self._centroids is not None:
+                    self._assign = np.append(
+                        self._assign, self._nearest(np.array([row]))
+                    )
+                ids.append(row)
+            if lines:
+                # Metadata is written after the vectors; it is what makes
+                # the rows count when the store is reopened
+                self._vectors.flush()
+                with open(self.meta_path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._maybe_train()
+        return ids
+
+    def _duplicate_of(self, vector: "np.ndarray", kind: str) -> Optional[int]:
+        if not len(self) or self.dedupe_threshold >= 1:
+            return None
+        for hit_id, score in self._top(vector, 1, kind):
+            if score >= self.dedupe_threshold:
+                return hit_id
+        return None
+
+    # Index
+
+    def _nearest(self, rows: "np.ndarray", batch: int = 8192) -> "np.ndarray":
+        """Closest centroid of each row, a batch at a time."""
+        labels = np.empty(len(rows), dtype=np.int32)
+        for start in range(0, len(rows), batch):
+            scores = self._vectors[rows[start : start + batch]] @ self._centroids.T
+            labels[start : start + batch] = scores.argmax(axis=1)
+        return labels
+
+    def _maybe_train(self) -> None:
+        rows = len(self)
+        if rows < IVF_MIN_ROWS or rows < 2 * self._trained_rows:
+            return
+        self.train()
+
+    def train(self, clusters: Optional[int] = None, seed: int = 0) -> None:
+        """(Re)build the IVF centroids with spherical k-means."""
+        with self._lock:
+            matrix = self._matrix()
+            rows = len(matrix)
+            clusters = clusters or max(1, int(np.sqrt(rows)))
+            rng = np.random.default_rng(seed)
+            sample = matrix[rng.choice(rows, min(rows, KMEANS_SAMPLE), replace=False)]
+            centroids = sample[rng.choice(len(sample), clusters, replace=False)].copy()
+            for _ in range(KMEANS_ITERATIONS):
+                labels = (sample @ centroids.T).argmax(axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sample)
+                empty = ~sums.any(axis=1)
+                sums[empty] = centroids[empty]
+                centroids = _normalize(sums)
+            self._centroids = centroids
+            self._assign = self._nearest(np.arange(rows))
+            self._trained_rows = rows
+            np.savez(
+                self.ivf_path + ".tmp.npz",
+                centroids=centroids,
+                assign=self._assign,
+                trained_rows=rows,
+            )
+            os.replace(self.ivf_path + ".tmp.npz", self.ivf_path)
+
+    # Search
+
+    def _top(self, query: "np.ndarray", k: int, kind: Optional[str]) -> List[tuple]:
+        if self._centroids is not None:
+            probes = np.argsort(self._centroids @ query)[-IVF_PROBES:]
+            rows = np.flatnonzero(np.isin(self._assign, probes))
+        else:
+            rows = np.arange(len(self))
+        if kind is not None:
+            rows = rows[self._kinds[rows] == self._kind_codes.get(kind, -1)]
+        if not len(rows):
+            return []
+        scores = self._vectors[rows] @ query
+        k = min(k, len(rows))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(int(rows[i]), float(scores[i])) for i in best]
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        kind: Optional[str] = None,
+        min_score: float = 0.0,
+    ) -> List[MemoryHit]:
+        """The `k` memories most similar to `query`, best first."""
+        vector = _normalize(self.embedder([query]))[0]
+        with self._lock:
+            if not len(self):
+                return []
+            hits = []
+            for row, score in self._top(vector, k, kind):
+                if score < min_score:
+                    continue
+                record = self._records[row]
+                hits.append(
+                    MemoryHit(
+                        row,
+                        score,
+                        record["kind"],
+                        record["text"],
+                        record.get("meta", {}),
+                    )
+                )
+            return hits
+
+    def close(self) -> None:
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+
+
+def format_memories(hits: Sequence[MemoryHit]) -> str:
+    """Render hits as context to put in front of a prompt."""
+    if not hits:
+        return ""
+    lines = ["Relevant notes from earlier runs (may be outdated):"]
+    lines.extend(f"- {hit.text}" for hit in hits)
+    return "\n".join(lines)
+
+
+def with_memories(prompt: str, store: MemoryStore, k: int = 3) -> str:
+    context = format_memories(store.search(prompt, k, min_score=0.3))
+    return f"{context}\n\n{prompt}" if context else prompt
+
+
+def remember_tool_results(agent: Any, store: MemoryStore, limit: int = 1000) -> None:
+    """Store successful tool results of an upstream ToolCallAgent.
+
+    Only observations with output are kept; errors (raised or returned in a
+    ToolResult) and empty results are not. Results include untrusted text such as fetched web pages, which later
+    runs get back in their prompts; hence opt-in via --remember-tools.
+    """
+    original = agent.execute_tool
+
+    async def execute_tool(command, *args, **kwargs):
+        result = await original(command, *args, **kwargs)
+        function = getattr(command, "function", None)
+        name = getattr(function, "name", "tool")
+        text = _OBSERVATION.sub("", str(result), count=1)
+        if text and text != str(result) and not text.startswith("Error"):
+            arguments = str(getattr(function, "arguments", ""))[:200]
+            # add() fsyncs and may train the IVF index; keep it off the loop
+            await asyncio.to_thread(
+                store.add,
+                f"{name}({arguments}) -> {text[:limit]}",
+                kind="tool",
+                tool=name,
+            )
+        return result
+
+    # Instance attribute, so only this agent is affected
+    object.__setattr__(agent, "execute_tool", execute_tool)
+
+
+def add_memory_arguments(parser: Any) -> None:
+    """Add --memory to an entry point's argparse parser."""
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Recall notes from earlier runs and remember this one",
+    )
+    parser.add_argument(
+        "--remember-tools",
+        action="store_true",
+        help="With --memory, also remember raw tool output (including web "
+        "content) and recall it in later prompts",
+    )
+
+
+_memory_store: Optional[MemoryStore] = None
+
+
+def get_memory_store() -> MemoryStore:
+    global _memory_store
+    if _memory_store is None:
+        _memory_store = MemoryStore()
+    return _memory_store
@@ -0,0 +1,358 @@
+"""
+Content-addressed cache for fetched pages and their text conversions.
+
+Responses are keyed by URL plus request headers and honour HTTP freshness
+(Cache-Control, Expires, ETag/Last-Modified revalidation). Bodies are stored
+once per content hash, and derived markdown/text is memoized against that
+hash so identical pages are converted only once, in a process pool.
+"""
+import asyncio
+import email.utils
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# (url, request headers) -> (status, response headers, body)
+Fetcher = Callable[[str, Dict[str, str]], Awaitable[Tuple[int, Dict[str, str], bytes]]]
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "workspace",
+    ".page_cache",
+)
+
+
+def html_to_markdown(html: str) -> str:
+    """Convert HTML to markdown with html2text, falling back to plain text."""
+    try:
+        import html2text
+    except ImportError:
+        return html_to_text(html)
+    converter = html2text.HTML2Text()
+    converter.ignore_images = True
+    converter.body_width = 0
+    return converter.handle(html)
+
+
+def html_to_text(html: str) -> str:
+    """Extract visible text from HTML."""
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        text = re.sub(r"(?is)<(script|style).*?</\1>|<[^>]+>", " ", html)
+        return re.sub(r"\s+", " ", text).strip()
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    lines = (line.strip() for line in soup.get_text("\n").splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+CONVERTERS: Dict[str, Callable[[str], str]] = {
+    "markdown": html_to_markdown,
+    "text": html_to_text,
+}
+
+
+@dataclass
+class CacheEntry:
+    """Stored metadata for one URL + request-header combination."""
+
+    url: str
+    status: int
+    headers: Dict[str, str]
+    body_hash: str
+    stored_at: float
+    ttl: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    must_revalidate: bool = False
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        if self.must_revalidate:
+            return False
+        return (now or time.time()) - self.stored_at < self.ttl
+
+
+@dataclass
+class CachedPage:
+    """A response served from (or just added to) the cache."""
+
+    url: str
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    body_hash: str
+    from_cache: bool = False
+    revalidated: bool = False
+    derived: Dict[str, str] = field(default_factory=dict, repr=False)
+
+    @property
+    def html(self) -> str:
+        charset = "utf-8"
+        match = re.search(r"charset=([\w-]+)", self.headers.get("content-type", ""))
+        if match:
+            charset = match.group(1)
+        try:
+            return self.body.decode(charset, errors="replace")
+        except LookupError:
+            # Unknown charset in the header, or one that is not a text codec
+            return self.body.decode("utf-8", errors="replace")
+
+
+def freshness_lifetime(
+    headers: Dict[str, str], default_ttl: float, now: Optional[float] = None
+) -> Tuple[Optional[float], bool]:
+    """Return (ttl, must_revalidate) for a response, or (None, _) if uncacheable."""
+    now = now or time.time()
+    cache_control = headers.get("cache-control", "").lower()
+    directives = dict(
+        (part.split("=", 1) + [""])[:2]
+        for part in (p.strip() for p in cache_control.split(","))
+        if part
+    )
+    if "no-store" in directives or "private" in directives:
+        return None, False
+    must_revalidate = "no-cache" in directives
+    for name in ("s-maxage", "max-age"):
+        if directives.get(name, "").isdigit():
+            return float(directives[name]), must_revalidate
+    if "expires" in headers:
+        expires = _parse_http_date(headers["expires"])
+        date = _parse_http_date(headers.get("date", "")) or now
+        return (max(0.0, expires - date) if expires else 0.0), must_revalidate
+    last_modified = _parse_http_date(headers.get("last-modified", ""))
+    if last_modified:
+        # RFC 9111 heuristic: a tenth of the time since last modification.
+        return min(max(0.0, (now - last_modified) / 10), 86400.0), must_revalidate
+    return default_ttl, must_revalidate
+
+
+def _parse_http_date(value: str) -> Optional[float]:
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+async def httpx_fetcher(
+    url: str, headers: Dict[str, str]
+) -> Tuple[int, Dict[str, str], bytes]:
+    """Default fetcher backed by httpx."""
+    import httpx
+
+    async with httpx.AsyncClient(follow_redirects=True, timeout=30) as client:
+        response = await client.get(url, headers=headers)
+        return (
+            response.status_code,
+            {k.lower(): v for k, v in response.headers.items()},
+            response.content,
+        )
+
+
+class PageCache:
+    """Shared page cache with HTTP revalidation and pooled HTML conversion."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        default_ttl: float = 300.0,
+        fetcher: Optional[Fetcher] = None,
+        max_workers: Optional[int] = None,
+        inline_convert_limit: int = 64 * 1024,
+    ):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.default_ttl = default_ttl
+        self.fetcher = fetcher or httpx_fetcher
+        self.inline_convert_limit = inline_convert_limit
+        self._max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._entries: Dict[str, CacheEntry] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        for sub in ("entries", "bodies", "derived"):
+            os.makedirs(os.path.join(self.cache_dir, sub), exist_ok=True)
+
+    @staticmethod
+    def cache_key(url: str, headers: Optional[Dict[str, str]] = None) -> str:
+        parts = [url] + sorted(f"{k.lower()}:{v}" for k, v in (headers or {}).items())
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    async def fetch(
+        self, url: str, headers: Optional[Dict[str, str]] = None
+    ) -> CachedPage:
+        """Return the page from cache, revalidating or fetching as needed."""
+        key = self.cache_key(url, headers)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            page = await self._fetch(key, url, dict(headers or {}))
+            future.set_result(page)
+            return page
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def markdown(self, url: str, headers: Optional[Dict[str, str]] = None) -> str:
+        return await self.convert(await self.fetch(url, headers), "markdown")
+
+    async def text(self, url: str, headers: Optional[Dict[str, str]] = None) -> str:
+        return await self.convert(await self.fetch(url, headers), "text")
+
+    async def convert(self, page: CachedPage, kind: str) -> str:
+        """Return a derived representation of the page, memoized by content hash."""
+        if kind in page.derived:
+            return page.derived[kind]
+        path = os.path.join(self.cache_dir, "derived", f"{page.body_hash}.{kind}")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                result = f.read()
+        else:
+            converter = CONVERTERS[kind]
+            if len(page.body) <= self.inline_convert_limit:
+                result = converter(page.html)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._get_executor(), converter, page.html
+                )
+            self._atomic_write(path, result.encode("utf-8"))
+        page.derived[kind] = result
+        return result
+
+    def invalidate(self, url: str, headers: Optional[Dict[str, str]] = None) -> None:
+        key = self.cache_key(url, headers)
+        self._entries.pop(key, None)
+        try:
+            os.remove(self._entry_path(key))
+        except FileNotFoundError:
+            pass
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _fetch(self, key: str, url: str, headers: Dict[str, str]) -> CachedPage:
+        entry = self._load_entry(key)
+        body = self._load_body(entry.body_hash) if entry else None
+        if entry and body is not None and entry.is_fresh():
+            return self._page(entry, body, from_cache=True)
+
+        request_headers = dict(headers)
+        if entry and body is not None:
+            if entry.etag:
+                request_headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request_headers["If-Modified-Since"] = entry.last_modified
+
+        status, response_headers, response_body = await self.fetcher(
+            url, request_headers
+        )
+        response_headers = {k.lower(): v for k, v in response_headers.items()}
+
+        if status == 304 and entry and body is not None:
+            merged = {**entry.headers, **response_headers}
+            ttl, must_revalidate = freshness_lifetime(merged, self.default_ttl)
+            entry.headers = merged
+            entry.stored_at = time.time()
+            entry.ttl = ttl or 0.0
+            entry.must_revalidate = must_revalidate
+            self._save_entry(key, entry)
+            return self._page(entry, body, from_cache=True, revalidated=True)
+
+        body_hash = hashlib.sha256(response_body).hexdigest()
+        page = CachedPage(url, status, response_headers, response_body, body_hash)
+        ttl, must_revalidate = freshness_lifetime(response_headers, self.default_ttl)
+        if status == 200 and ttl is not None:
+            self._store_body(body_hash, response_body)
+            self._save_entry(
+                key,
+                CacheEntry(
+                    url=url,
+                    status=status,
+                    headers=response_headers,
+                    body_hash=body_hash,
+                    stored_at=time.time(),
+                    ttl=ttl,
+                    etag=response_headers.get("etag"),
+                    last_modified=response_headers.get("last-modified"),
+                    must_revalidate=must_revalidate,
+                ),
+            )
+        return page
+
+    @staticmethod
+    def _page(entry: CacheEntry, body: bytes, **flags) -> CachedPage:
+        return CachedPage(
+            entry.url, entry.status, entry.headers, body, entry.body_hash, **flags
+        )
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, "entries", f"{key}.json")
+
+    def _body_path(self, body_hash: str) -> str:
+        return os.path.join(self.cache_dir, "bodies", body_hash)
+
+    def _load_entry(self, key: str) -> Optional[CacheEntry]:
+        if key in self._entries:
+            return self._entries[key]
+        try:
+            with open(self._entry_path(key), "r", encoding="utf-8") as f:
+                entry = CacheEntry(**json.load(f))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+        self._entries[key] = entry
+        return entry
+
+    def _save_entry(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._atomic_write(self._entry_path(key), json.dumps(asdict(entry)).encode())
+
+    def _load_body(self, body_hash: str) -> Optional[bytes]:
+        try:
+            with open(self._body_path(body_hash), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _store_body(self, body_hash: str, body: bytes) -> None:
+        path = self._body_path(body_hash)
+        if not os.path.exists(path):
+            self._atomic_write(path, body)
+
+    @staticmethod
+    def _atomic_write(path: str, data: bytes) -> None:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+        return self._executor
+
+
+_page_cache: Optional[PageCache] = None
+
+
+def get_page_cache() -> PageCache:
+    """Return the process-wide page cache shared by browser and crawl tools."""
+    global _page_cache
+    if _page_cache is None:
+        _page_cache = PageCache()
+    return _page_cache
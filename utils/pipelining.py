@@ -0,0 +1,453 @@
+"""
+Pipelined agent steps: overlap LLM generation with tool work.
+
+While `think` waits on the model, a Prefetcher warms what the next tools are
+likely to need (pages for URLs mentioned in recent messages or the plan, a
+browser context, idle Python kernels). The completion request itself is
+streamed: tool calls are assembled from the partial response, and pure tools
+(see `utils.tool_dispatch`) start as soon as their arguments are complete,
+before the model has finished the rest of the turn. `act` then picks up the
+speculative result instead of running the call again. The mode is opt-in
+through `enable_pipelining(agent)` or `--pipeline`.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.llm_replay import ClientProxy
+from utils.tool_dispatch import ToolCallDispatcher
+
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_ENV = "OPENMANUS_PIPELINE"
+
+URL_PATTERN = re.compile(r"https?://[^\s<>\"'`)\]}]+")
+# Messages scanned for URLs before each LLM call
+RECENT_MESSAGES = 4
+
+Warmer = Callable[[Any], Awaitable[Any]]
+
+
+@dataclass
+class PipelineStats:
+    prefetched_urls: int = 0
+    prefetch_errors: int = 0
+    speculative_calls: int = 0
+    speculative_hits: int = 0
+    speculative_misses: int = 0
+    # Tool time that ran while the model was still generating
+    overlap_seconds: float = 0.0
+
+
+def extract_urls(text: str) -> List[str]:
+    """Return the http(s) URLs in `text`, in order and without duplicates."""
+    urls = []
+    for match in URL_PATTERN.findall(text or ""):
+        url = match.rstrip(".,;:!?'\"")
+        if url not in urls:
+            urls.append(url)
+    return urls
+
+
+def _message_text(message: Any) -> str:
+    if isinstance(message, dict):
+        return str(message.get("content") or "")
+    return str(getattr(message, "content", "") or "")
+
+
+def _tool_names(agent: Any) -> Sequence[str]:
+    tools = getattr(agent, "available_tools", None)
+    return list(getattr(tools, "tool_map", {}) or {})
+
+
+class Prefetcher:
+    """Warms likely-needed resources in the background, best effort.
+
+    Failures are logged and counted, never raised: a prefetch that does not
+    pan out only costs the idle time it was filling.
+    """
+
+    def __init__(
+        self,
+        page_cache: Any = None,
+        browser_pool: Any = None,
+        kernel_pool: Any = None,
+        warmers: Sequence[Warmer] = (),
+        max_urls: int = 4,
+        timeout: float = 20.0,
+        stats: Optional[PipelineStats] = None,
+    ):
+        self.page_cache = page_cache
+        self.browser_pool = browser_pool
+        self.kernel_pool = kernel_pool
+        self.warmers = list(warmers)
+        self.max_urls = max_urls
+        self.timeout = timeout
+        self.stats = stats or PipelineStats()
+        self._seen_urls: set = set()
+        self._browser_warmed: set = set()
+        self._tasks: set = set()
+
+    def schedule(self, agent: Any) -> None:
+        """Start prefetches for the agent's next step and return immediately."""
+        messages = list(getattr(getattr(agent, "memory", None), "messages", []))
+        # Flow step prompts carry the current plan, so it is covered here too
+        text = "\n".join(_message_text(m) for m in messages[-RECENT_MESSAGES:])
+
+        if self.page_cache is not None:
+            urls = [u for u in extract_urls(text) if u not in self._seen_urls]
+            for url in urls[: self.max_urls]:
+                self._seen_urls.add(url)
+                self._spawn(self._prefetch_url(url), f"fetch {url}")
+
+        tools = _tool_names(agent)
+        agent_id = getattr(agent, "name", None) or "agent"
+        if (
+            self.browser_pool is not None
+            and "browser_use" in tools
+            and agent_id not in self._browser_warmed
+        ):
+            self._browser_warmed.add(agent_id)
+            self._spawn(self._warm_browser(agent_id), "browser context")
+        if self.kernel_pool is not None and "python_execute" in tools:
+            self._spawn(asyncio.to_thread(self.kernel_pool.warm), "kernel pool")
+        for warmer in self.warmers:
+            self._spawn(warmer(agent), getattr(warmer, "__name__", "warmer"))
+
+    async def _prefetch_url(self, url: str) -> None:
+        await self.page_cache.fetch(url)
+        self.stats.prefetched_urls += 1
+
+    async def _warm_browser(self, agent_id: str) -> None:
+        await self.browser_pool.acquire(agent_id)
+        await self.browser_pool.release(agent_id)
+
+    def _spawn(self, coro: Awaitable[Any], label: str) -> None:
+        task = asyncio.ensure_future(self._guarded(coro, label))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _guarded(self, coro: Awaitable[Any], label: str) -> None:
+        try:
+            await asyncio.wait_for(coro, self.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats.prefetch_errors += 1
+            logger.debug("Prefetch of %s failed: %s", label, e)
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+def _complete_arguments(arguments: str) -> bool:
+    text = arguments.strip()
+    if not text.endswith("}"):
+        return False
+    try:
+        return isinstance(json.loads(text), dict)
+    except ValueError:
+        return False
+
+
+class ToolCallStream:
+    """Assembles an assistant message from streamed completion chunks.
+
+    `feed` returns the tool calls that became complete with that chunk: a
+    call is complete once its arguments parse as a JSON object, or when the
+    model moves on to the next call index. `finish` flushes the rest.
+    """
+
+    def __init__(self):
+        self.content: List[str] = []
+        self.finish_reason: Optional[str] = None
+        self.usage: Any = None
+        self.model: Optional[str] = None
+        self._calls: Dict[int, Dict[str, str]] = {}
+        self._emitted: set = set()
+
+    def feed(self, chunk: Any) -> List[Dict[str, Any]]:
+        ready = []
+        self.model = getattr(chunk, "model", None) or self.model
+        if getattr(chunk, "usage", None):
+            self.usage = chunk.usage
+        for choice in getattr(chunk, "choices", None) or []:
+            delta = choice.delta
+            if getattr(delta, "content", None):
+                self.content.append(delta.content)
+            for part in getattr(delta, "tool_calls", None) or []:
+                index = part.index or 0
+                for earlier in sorted(self._calls):
+                    if earlier < index and earlier not in self._emitted:
+                        ready.append(self._emit(earlier))
+                call = self._calls.setdefault(
+                    index, {"id": "", "name": "", "arguments": ""}
+                )
+                if part.id:
+                    call["id"] = part.id
+                function = getattr(part, "function", None)
+                if function is not None:
+                    call["name"] += function.name or ""
+                    call["arguments"] += function.arguments or ""
+                if (
+                    index not in self._emitted
+                    and call["id"]
+                    and call["name"]
+                    and _complete_arguments(call["arguments"])
+                ):
+                    ready.append(self._emit(index))
+            if choice.finish_reason:
+                self.finish_reason = choice.finish_reason
+        return ready
+
+    def finish(self) -> List[Dict[str, Any]]:
+        return [self._emit(i) for i in sorted(self._calls) if i not in self._emitted]
+
+    def _emit(self, index: int) -> Dict[str, Any]:
+        call = self._calls[index]
+        self._emitted.add(index)
+        return self._as_dict(call)
+
+    @staticmethod
+    def _as_dict(call: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            "id": call["id"],
+            "type": "function",
+            "function": {"name": call["name"], "arguments": call["arguments"]},
+        }
+
+    def completion(self, model: Optional[str] = None) -> Any:
+        """Return the assembled response as a `ChatCompletion`."""
+        from openai.types.chat import ChatCompletion
+
+        tool_calls = [self._as_dict(self._calls[i]) for i in sorted(self._calls)]
+        usage = self.usage
+        return ChatCompletion.model_validate(
+            {
+                "id": f"pipelined-{time.time_ns()}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": self.model or model or "",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": self.finish_reason
+                        or ("tool_calls" if tool_calls else "stop"),
+                        "message": {
+                            "role": "assistant",
+                            "content": "".join(self.content) or None,
+                            "tool_calls": tool_calls or None,
+                        },
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+                    "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+                    "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+                },
+            }
+        )
+
+
+class Speculation:
+    """Pure tool calls started early from a streaming response."""
+
+    def __init__(
+        self,
+        execute: Callable[[Any], Awaitable[str]],
+        dispatcher: ToolCallDispatcher,
+        stats: PipelineStats,
+    ):
+        self._execute = execute
+        self.dispatcher = dispatcher
+        self.stats = stats
+        self._tasks: Dict[str, Tuple[str, str, asyncio.Task]] = {}
+        self._streaming = True
+
+    def start(self, call: Dict[str, Any]) -> None:
+        function = call["function"]
+        name = function["name"]
+        if not self.dispatcher.policy(name).pure or call["id"] in self._tasks:
+            return
+        command = _tool_call(call)
+        task = asyncio.ensure_future(self._run(name, command))
+        self._tasks[call["id"]] = (name, function["arguments"], task)
+        self.stats.speculative_calls += 1
+
+    async def _run(self, name: str, command: Any) -> str:
+        started = time.monotonic()
+        try:
+            return await self.dispatcher.run_limited(name, self._execute, command)
+        finally:
+            if self._streaming:
+                self.stats.overlap_seconds += time.monotonic() - started
+
+    def stream_done(self) -> None:
+        self._streaming = False
+
+    def take(self, command: Any) -> Optional[asyncio.Task]:
+        """Return the early task for `command` if it matches what was run."""
+        entry = self._tasks.pop(getattr(command, "id", None), None)
+        if entry is None:
+            return None
+        name, arguments, task = entry
+        function = command.function
+        if (function.name, function.arguments) != (name, arguments):
+            task.cancel()
+            self.stats.speculative_misses += 1
+            return None
+        self.stats.speculative_hits += 1
+        return task
+
+    def cancel(self) -> None:
+        for _, _, task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+
+def _tool_call(call: Dict[str, Any]) -> Any:
+    try:
+        from app.schema import ToolCall
+    except ImportError:
+        from openai.types.chat import ChatCompletionMessageToolCall as ToolCall
+    return ToolCall.model_validate(call)
+
+
+_speculation: contextvars.ContextVar[Optional[Speculation]] = contextvars.ContextVar(
+    "openmanus_speculation", default=None
+)
+
+
+class StreamingCompletions:
+    """`chat.completions` stand-in that streams tool-calling requests.
+
+    Outside a pipelined `think` (or for requests without tools) calls pass
+    straight through, so the wrapped client can be shared between agents.
+    """
+
+    def __init__(self, completions: Any):
+        self._completions = completions
+
+    async def create(self, **params) -> Any:
+        speculation = _speculation.get()
+        if speculation is None or params.get("stream") or not params.get("tools"):
+            return await self._completions.create(**params)
+
+        # ask_tool passes stream=False explicitly; replace it rather than add
+        request = {
+            k: v for k, v in params.items() if k not in ("stream", "stream_options")
+        }
+        response = await self._completions.create(
+            **request, stream=True, stream_options={"include_usage": True}
+        )
+        if hasattr(response, "choices"):
+            # The backend answered without streaming (e.g. a replayed record)
+            return response
+        assembler = ToolCallStream()
+        try:
+            async for chunk in response:
+                for call in assembler.feed(chunk):
+                    speculation.start(call)
+            for call in assembler.finish():
+                speculation.start(call)
+        finally:
+            speculation.stream_done()
+        return assembler.completion(params.get("model"))
+
+
+def enable_pipelining(
+    agent: Any,
+    prefetcher: Optional[Prefetcher] = None,
+    speculate: bool = True,
+    dispatcher: Optional[ToolCallDispatcher] = None,
+) -> PipelineStats:
+    """Pipeline `agent`'s steps: prefetch during `think`, speculate pure tools.
+
+    Patches `think`, `execute_tool` and `cleanup` on this instance only, and
+    returns the stats object that the run updates.
+    """
+    existing = getattr(agent, "_pipeline_stats", None)
+    if existing is not None:
+        return existing
+    if prefetcher is None:
+        from utils.browser_pool import get_browser_pool
+        from utils.page_cache import get_page_cache
+
+        prefetcher = Prefetcher(
+            page_cache=get_page_cache(), browser_pool=get_browser_pool()
+        )
+    stats = prefetcher.stats
+    dispatcher = (
+        dispatcher or getattr(agent, "tool_dispatcher", None) or ToolCallDispatcher()
+    )
+    original_think = agent.think
+    original_execute = agent.execute_tool
+    original_cleanup = agent.cleanup
+    current: List[Optional[Speculation]] = [None]
+
+    llm = getattr(agent, "llm", None)
+    if speculate and llm is not None and getattr(llm, "client", None) is not None:
+        if not isinstance(llm.client, ClientProxy) or not isinstance(
+            llm.client.chat.completions, StreamingCompletions
+        ):
+            llm.client = ClientProxy(
+                llm.client, StreamingCompletions(llm.client.chat.completions)
+            )
+
+    async def think() -> bool:
+        if current[0] is not None:
+            current[0].cancel()
+        prefetcher.schedule(agent)
+        if not speculate:
+            return await original_think()
+        current[0] = Speculation(original_execute, dispatcher, stats)
+        token = _speculation.set(current[0])
+        try:
+            return await original_think()
+        finally:
+            _speculation.reset(token)
+
+    async def execute_tool(command: Any) -> str:
+        task = current[0].take(command) if current[0] is not None else None
+        if task is None:
+            return await original_execute(command)
+        return await task
+
+    async def cleanup() -> Any:
+        if current[0] is not None:
+            current[0].cancel()
+        await prefetcher.close()
+        logger.info("Pipelining: %s", stats)
+        return await original_cleanup()
+
+    object.__setattr__(agent, "think", think)
+    object.__setattr__(agent, "execute_tool", execute_tool)
+    object.__setattr__(agent, "cleanup", cleanup)
+    object.__setattr__(agent, "_pipeline_stats", stats)
+    return stats
+
+
+def pipelining_enabled(flag: bool = False) -> bool:
+    return flag or os.environ.get(PIPELINE_ENV, "").lower() in ("1", "true", "yes")
+
+
+def add_pipeline_arguments(parser: Any) -> None:
+    """Add the --pipeline option to an argparse parser."""
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Prefetch during LLM calls and start pure tools from the stream",
+    )
@@ -0,0 +1,254 @@
+"""
+Persistent Python kernels for the Python Execute tool.
+
+Each agent session gets one long-lived worker process whose globals survive
+between calls and whose heavy imports are loaded once. Calls have timeouts,
+workers can be capped by address-space size, crashed or timed-out workers
+are restarted, and stdout/stderr are streamed back while the code runs.
+A KernelPool keeps pre-started workers ready so the first call is cheap.
+"""
+import asyncio
+import builtins
+import importlib
+import multiprocessing
+import sys
+import time
+import traceback
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+
+
+DEFAULT_PRELOAD = ("numpy", "pandas")
+
+
+@dataclass
+class KernelEvent:
+    """One piece of output from a running call.
+
+    kind is "stdout", "stderr", "error", "timeout", "crash" or "done".
+    """
+
+    kind: str
+    text: str = ""
+
+
+class _StreamWriter:
+    def __init__(self, conn, call_id: int, kind: str):
+        self._conn = conn
+        self._call_id = call_id
+        self._kind = kind
+
+    def write(self, text: str) -> int:
+        if text:
+            self._conn.send((self._kind, self._call_id, text))
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+def _kernel_main(conn, preload: Sequence[str], memory_limit_mb: Optional[int]):
+    if memory_limit_mb:
+        try:
+            import resource
+
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    stdout, stderr = sys.stdout, sys.stderr
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        call_id, code = message
+        sys.stdout = _StreamWriter(conn, call_id, "stdout")
+        sys.stderr = _StreamWriter(conn, call_id, "stderr")
+        error = None
+        try:
+            exec(compile(code, "<kernel>", "exec"), namespace)
+        except MemoryError:
+            error = "MemoryError: kernel memory limit exceeded"
+        except BaseException:
+            error = traceback.format_exc()
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+        conn.send(("error" if error else "done", call_id, error or ""))
+
+
+def _mp_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+
+
+class PythonKernel:
+    """A restartable worker process that executes code in persistent globals."""
+
+    def __init__(
+        self,
+        preload: Sequence[str] = DEFAULT_PRELOAD,
+        memory_limit_mb: Optional[int] = None,
+    ):
+        self.preload = tuple(preload)
+        self.memory_limit_mb = memory_limit_mb
+        self.restarts = 0
+        self._process = None
+        self._conn = None
+        self._call_id = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self) -> "PythonKernel":
+        ctx = _mp_context()
+        parent, child = ctx.Pipe()
+        self._process = ctx.Process(
+            target=_kernel_main,
+            args=(child, self.preload, self.memory_limit_mb),
+            daemon=True,
+        )
+        self._process.start()
+        child.close()
+        self._conn = parent
+        return self
+
+    def restart(self) -> None:
+        self.kill()
+        self.restarts += 1
+        self.start()
+
+    def kill(self) -> None:
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.kill()
+            self._process.join(timeout=5)
+            self._process = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def shutdown(self) -> None:
+        """Ask the worker to exit, killing it if it does not."""
+        if self.alive:
+            try:
+                self._conn.send(None)
+                self._process.join(timeout=1)
+            except (OSError, ValueError):
+                pass
+        self.kill()
+
+    async def stream(
+        self, code: str, timeout: Optional[float] = 5
+    ) -> AsyncIterator[KernelEvent]:
+        """Run `code`, yielding output as it is produced and a final status event."""
+        async with self._lock:
+            if self._process is None:
+                self.start()
+            elif not self.alive:
+                self.restart()
+            self._call_id += 1
+            call_id = self._call_id
+            try:
+                self._conn.send((call_id, code))
+            except (OSError, ValueError):
+                self.restart()
+                yield KernelEvent("crash", "Kernel was not running; restarted")
+                return
+
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self.restart()
+                    yield KernelEvent(
+                        "timeout",
+                        f"Execution timeout after {timeout} seconds; kernel restarted",
+                    )
+                    return
+                try:
+                    ready = await asyncio.to_thread(self._conn.poll, remaining)
+                    if not ready:
+                        continue
+                    kind, event_id, text = self._conn.recv()
+                except (EOFError, OSError):
+                    self._process.join(timeout=1)
+                    exitcode = self._process.exitcode
+                    self.restart()
+                    yield KernelEvent(
+                        "crash", f"Kernel died (exit code {exitcode}); restarted"
+                    )
+                    return
+                if event_id != call_id:
+                    continue
+                yield KernelEvent(kind, text)
+                if kind in ("done", "error"):
+                    return
+
+    async def execute(self, code: str, timeout: Optional[float] = 5) -> Dict:
+        """Run `code` and return the PythonExecute-style result dict."""
+        output: List[str] = []
+        success = True
+        async for event in self.stream(code, timeout):
+            if event.kind in ("stdout", "stderr"):
+                output.append(event.text)
+            elif event.kind != "done":
+                success = False
+                output.append(event.text)
+        return {"observation": "".join(output), "success": success}
+
+
+class KernelPool:
+    """Pre-started kernels handed out one per agent session."""
+
+    def __init__(self, size: int = 2, **kernel_options):
+        self.size = size
+        self.kernel_options = kernel_options
+        self._idle: List[PythonKernel] = []
+        self._sessions: Dict[str, PythonKernel] = {}
+
+    def warm(self) -> None:
+        """Top the idle list back up to `size` kernels."""
+        while len(self._idle) < self.size:
+            self._idle.append(PythonKernel(**self.kernel_options).start())
+
+    def acquire(self, session_id: str) -> PythonKernel:
+        """Return the session's kernel, binding a warm one on first use."""
+        kernel = self._sessions.get(session_id)
+        if kernel is None:
+            kernel = (
+                self._idle.pop(0)
+                if self._idle
+                else PythonKernel(**self.kernel_options).start()
+            )
+            self._sessions[session_id] = kernel
+            self.warm()
+        return kernel
+
+    def release(self, session_id: str) -> None:
+        """Shut down the session's kernel; its state is discarded."""
+        kernel = self._sessions.pop(session_id, None)
+        if kernel is not None:
+            kernel.shutdown()
+
+    def shutdown(self) -> None:
+        for kernel in self._idle + list(self._sessions.values()):
+            kernel.shutdown()
+        self._idle.clear()
+        self._sessions.clear()
@@ -0,0 +1,215 @@
+"""
+Admission scheduling for concurrent agent requests.
+
+Requests that share a context (an A2A conversation/session) run one at a
+time in arrival order, since they build on each other's state; requests of
+different contexts run in parallel up to a global limit. When requests are
+waiting for a slot, clients are served by weighted fair queueing (start-time
+fair queueing over per-client virtual finish tags), so one client flooding
+the server delays its own requests rather than everyone else's. Time spent
+queued is recorded per client, and any request can be cancelled whether it
+is still queued or already running.
+
+Fairness is only as good as the client ids: callers should derive them from
+an authenticated identity, never from a header the client controls.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from utils.tracing import Histogram
+
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENCY_ENV = "OPENMANUS_A2A_MAX_CONCURRENCY"
+CLIENT_WEIGHTS_ENV = "OPENMANUS_A2A_CLIENT_WEIGHTS"
+ANONYMOUS = "anonymous"
+
+T = TypeVar("T")
+
+
+def parse_weights(text: Optional[str]) -> Dict[str, float]:
+    """Parse "alice=3,bob=0.5" into a client -> weight mapping."""
+    weights = {}
+    for item in (text or "").split(","):
+        if "=" in item:
+            client, weight = item.split("=", 1)
+            weights[client.strip()] = float(weight)
+    return weights
+
+
+@dataclass
+class _Job:
+    seq: int
+    task_id: str
+    context_id: str
+    client_id: str
+    start_tag: float
+    finish_tag: float
+    enqueued: float = field(default_factory=time.monotonic)
+    owner: Optional[asyncio.Task] = None
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+    running: bool = False
+
+
+@dataclass
+class _Client:
+    weight: float
+    last_finish: float = 0.0
+    queued: int = 0
+    running: int = 0
+    completed: int = 0
+    cancelled: int = 0
+    queue_time: Histogram = field(default_factory=Histogram)
+
+
+class RequestScheduler:
+    """Serializes per context, bounds global concurrency, shares fairly."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        weights: Optional[Dict[str, float]] = None,
+        default_weight: float = 1.0,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.weights = dict(weights or {})
+        self.default_weight = default_weight
+        self._clients: Dict[str, _Client] = {}
+        self._contexts: "OrderedDict[str, Deque[_Job]]" = OrderedDict()
+        self._busy_contexts: set = set()
+        self._jobs: Dict[str, _Job] = {}
+        self._running = 0
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+
+    @classmethod
+    def from_env(cls, max_concurrency: Optional[int] = None) -> "RequestScheduler":
+        """Build from OPENMANUS_A2A_MAX_CONCURRENCY / _CLIENT_WEIGHTS."""
+        if max_concurrency is None:
+            max_concurrency = int(os.environ.get(MAX_CONCURRENCY_ENV, "4"))
+        return cls(max_concurrency, parse_weights(os.environ.get(CLIENT_WEIGHTS_ENV)))
+
+    async def run(
+        self,
+        func: Callable[[], Awaitable[T]],
+        task_id: Optional[str] = None,
+        context_id: Optional[str] = None,
+        client_id: Optional[str] = None,
+        cost: float = 1.0,
+    ) -> T:
+        """Wait for a slot, then `await func()`; cancellable via `cancel`."""
+        seq = next(self._seq)
+        task_id = task_id or f"task-{seq}"
+        # Without a context there is nothing to serialize against
+        context_id = context_id or f"{task_id}#{seq}"
+        client = self._client(client_id or ANONYMOUS)
+        start = max(self._virtual_time, client.last_finish)
+        job = _Job(
+            seq=seq,
+            task_id=task_id,
+            context_id=context_id,
+            client_id=client_id or ANONYMOUS,
+            start_tag=start,
+            finish_tag=start + cost / client.weight,
+            owner=asyncio.current_task(),
+        )
+        client.last_finish = job.finish_tag
+        client.queued += 1
+        self._jobs[task_id] = job
+        self._contexts.setdefault(context_id, deque()).append(job)
+        self._dispatch()
+        try:
+            await job.ready.wait()
+            result = await func()
+            client.completed += 1
+            return result
+        except asyncio.CancelledError:
+            client.cancelled += 1
+            raise
+        finally:
+            self._done(job)
+
+    def cancel(self, task_id: str) -> bool:
+        """Cancel a queued or running request; False if it is unknown."""
+        job = self._jobs.get(task_id)
+        if job is None or job.owner is None or job.owner.done():
+            return False
+        job.owner.cancel()
+        return True
+
+    def _client(self, client_id: str) -> _Client:
+        client = self._clients.get(client_id)
+        if client is None:
+            weight = self.weights.get(client_id, self.default_weight)
+            client = self._clients[client_id] = _Client(weight=max(weight, 1e-6))
+        return client
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_concurrency:
+            heads = [
+                queue[0]
+                for context_id, queue in self._contexts.items()
+                if queue and context_id not in self._busy_contexts
+            ]
+            if not heads:
+                return
+            job = min(heads, key=lambda j: (j.finish_tag, j.seq))
+            self._contexts[job.context_id].popleft()
+            self._busy_contexts.add(job.context_id)
+            self._running += 1
+            self._virtual_time = max(self._virtual_time, job.start_tag)
+            client = self._clients[job.client_id]
+            client.queued -= 1
+            client.running += 1
+            waited = (time.monotonic() - job.enqueued) * 1000
+            client.queue_time.observe(waited)
+            logger.debug(
+                "Starting %s for %s after %.0f ms queued",
+                job.task_id,
+                job.client_id,
+                waited,
+            )
+            job.running = True
+            job.ready.set()
+
+    def _done(self, job: _Job) -> None:
+        self._jobs.pop(job.task_id, None)
+        client = self._clients[job.client_id]
+        if job.running:
+            self._running -= 1
+            self._busy_contexts.discard(job.context_id)
+            client.running -= 1
+        else:
+            self._contexts[job.context_id].remove(job)
+            client.queued -= 1
+            # Return the unused share so the client is not penalized for it
+            if client.last_finish == job.finish_tag:
+                client.last_finish = job.start_tag
+        if not self._contexts.get(job.context_id, True):
+            del self._contexts[job.context_id]
+        self._dispatch()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": self._running,
+            "queued": sum(len(q) for q in self._contexts.values()),
+            "clients": {
+                client_id: {
+                    "weight": client.weight,
+                    "queued": client.queued,
+                    "running": client.running,
+                    "completed": client.completed,
+                    "cancelled": client.cancelled,
+                    "queue_time": client.queue_time.to_dict(),
+                }
+                for client_id, client in self._clients.items()
+            },
+        }
@@ -0,0 +1,87 @@
+"""
+Server-Sent Events helpers shared by the Flask and ASGI backends.
+
+Streams are written once as async generators of (event, data) pairs.
+`sse_stream` turns one into SSE frames for an ASGI StreamingResponse, and
+`sync_sse_stream` drives it from a WSGI response on a private event loop.
+In both cases a client disconnect closes the generator, so `finally`
+blocks in the producer run and any in-flight work is cancelled.
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Iterator, Optional, Tuple
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+Event = Tuple[str, Any]
+
+
+def format_sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """Encode one SSE frame; data is sent as JSON."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    payload = json.dumps(data, ensure_ascii=False)
+    lines.extend(f"data: {line}" for line in payload.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+async def sse_stream(
+    events: AsyncIterator[Event], heartbeat: float = 15.0
+) -> AsyncIterator[str]:
+    """Frame `events` as SSE, sending comments while the producer is idle."""
+    iterator = events.__aiter__()
+    next_event = None
+    event_id = 0
+    try:
+        while True:
+            if next_event is None:
+                next_event = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({next_event}, timeout=heartbeat)
+            if not done:
+                # Keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            try:
+                event, data = next_event.result()
+            except StopAsyncIteration:
+                return
+            finally:
+                next_event = None
+            event_id += 1
+            yield format_sse(event, data, event_id)
+    finally:
+        if next_event is not None:
+            # Cancels the producer at its current await, running its cleanup
+            next_event.cancel()
+            try:
+                await next_event
+            except (asyncio.CancelledError, Exception):
+                pass
+        await iterator.aclose()
+
+
+def sync_sse_stream(
+    events: AsyncIterator[Event], heartbeat: float = 15.0
+) -> Iterator[str]:
+    """Drive `sse_stream` from synchronous code such as a Flask response.
+
+    Closing the returned generator (WSGI servers do so on disconnect) closes
+    the async stream on its loop.
+    """
+    loop = asyncio.new_event_loop()
+    stream = sse_stream(events, heartbeat)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(stream.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(stream.aclose())
+        loop.close()
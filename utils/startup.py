@@ -0,0 +1,93 @@
+"""
+Startup helpers: deferred imports and per-module import-time profiling.
+"""
+import importlib.util
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from types import ModuleType
+from typing import List, Sequence
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return `name` as a module whose body runs on first attribute access."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def profile_imports(modules: Sequence[str]) -> List[ImportTiming]:
+    """Import `modules` in a fresh interpreter under `-X importtime`.
+
+    A fresh process is used so nothing already imported by the caller hides
+    the real cold-start cost.
+    """
+    code = "; ".join(f"import {name}" for name in modules) or "pass"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(p for p in sys.path if p)}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    timings = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue
+        timings.append(ImportTiming(fields[2].strip(), self_us, cumulative_us))
+    if proc.returncode != 0 and not timings:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "")
+    return timings
+
+
+def format_import_profile(timings: List[ImportTiming], top: int = 25) -> str:
+    """Render the slowest imports plus top-level package totals."""
+    lines = []
+    total_us = sum(t.self_us for t in timings)
+    lines.append(
+        f"Total import time: {total_us / 1000:.1f} ms ({len(timings)} modules)"
+    )
+    lines.append("")
+    lines.append(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for t in sorted(timings, key=lambda t: t.cumulative_us, reverse=True)[:top]:
+        lines.append(
+            f"{t.cumulative_us / 1000:14.1f} {t.self_us / 1000:9.1f}  {t.module}"
+        )
+
+    packages = {}
+    for t in timings:
+        root = t.module.split(".")[0]
+        packages[root] = packages.get(root, 0) + t.self_us
+    lines.append("")
+    lines.append(f"{'self ms':>14}  package")
+    for root, us in sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        lines.append(f"{us / 1000:14.1f}  {root}")
+    return "\n".join(lines)
+
+
+def print_startup_profile(modules: Sequence[str], top: int = 25) -> None:
+    """Print the import profile of `modules` (for --profile-startup)."""
+    print(format_import_profile(profile_imports(modules), top))
@@ -0,0 +1,270 @@
+"""
+In-memory static asset store for the web frontend.
+
+Every file under the static root is read once at startup and kept with its
+gzip (and, when the optional `brotli` package is installed, brotli) variants
+and a content-hash ETag. Requests are answered from memory: conditional GETs
+get a 304 without touching the disk, and fingerprinted URLs
+(`/static/app.<hash>.js`) are served with immutable cache headers. HTML
+pages are rewritten at load time to reference the fingerprinted URLs.
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Tuple
+
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+)
+MIN_COMPRESS_SIZE = 512
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# name.<8+ hex chars>.ext
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+HTML_REFERENCE = re.compile(r'(?P<attr>(?:src|href)=")(?P<url>/[^"?#]+)(?=")')
+
+
+@dataclass
+class StaticAsset:
+    path: str
+    content_type: str
+    body: bytes
+    etag: str
+    mtime_ns: int
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+
+    def variant(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        """Best stored encoding the client accepts."""
+        accepted = parse_accept_encoding(accept_encoding)
+        if self.br is not None and accepted.get("br", 0) > 0:
+            return self.br, "br"
+        if self.gzip is not None and accepted.get("gzip", 0) > 0:
+            return self.gzip, "gzip"
+        return self.body, None
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    encodings: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[name.strip().lower()] = q
+    if "*" in encodings:
+        for name in ("br", "gzip"):
+            encodings.setdefault(name, encodings["*"])
+    return encodings
+
+
+def fingerprint(path: str, etag: str) -> str:
+    """static/app.js -> static/app.<hash>.js"""
+    root, ext = os.path.splitext(path)
+    digest = etag.strip('"')[:12]
+    return f"{root}.{digest}{ext}"
+
+
+class StaticAssetStore:
+    """Serves files below `root` from memory with compression and ETags."""
+
+    def __init__(
+        self,
+        root: str,
+        auto_reload: bool = False,
+        reload_interval: float = 1.0,
+        compress_level: int = 9,
+    ):
+        self.root = os.path.abspath(root)
+        self.auto_reload = auto_reload
+        self.reload_interval = reload_interval
+        self.compress_level = compress_level
+        self._assets: Dict[str, StaticAsset] = {}
+        self._aliases: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self.load()
+
+    def load(self) -> None:
+        """(Re)read every file under root and rebuild variants and aliases."""
+        started = time.perf_counter()
+        assets: Dict[str, StaticAsset] = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                rel = os.path.relpath(full, self.root).replace(os.sep, "/")
+                previous = self._assets.get(rel)
+                try:
+                    mtime_ns = os.stat(full).st_mtime_ns
+                    # HTML is re-read so its asset links follow the new hashes
+                    if (
+                        previous
+                        and previous.mtime_ns == mtime_ns
+                        and not rel.endswith(".html")
+                    ):
+                        assets[rel] = previous
+                        continue
+                    with open(full, "rb") as f:
+                        body = f.read()
+                except OSError:
+                    continue
+                assets[rel] = self._build(rel, body, mtime_ns)
+
+        aliases = {}
+        for rel, asset in assets.items():
+            if not rel.endswith(".html") and not HASHED_NAME.search(rel):
+                aliases[fingerprint(rel, asset.etag)] = rel
+        by_url = {"/" + rel: "/" + alias for alias, rel in aliases.items()}
+        for rel, asset in list(assets.items()):
+            if rel.endswith(".html"):
+                assets[rel] = self._rewrite_html(asset, by_url)
+
+        with self._lock:
+            self._assets, self._aliases = assets, aliases
+            self._checked = time.monotonic()
+        logger.debug(
+            f"Loaded {len(assets)} static assets in "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+    def get(self, path: str) -> Tuple[Optional[StaticAsset], bool]:
+        """Return (asset, immutable) for a request path, or (None, False)."""
+        if self.auto_reload and time.monotonic() - self._checked > self.reload_interval:
+            self._reload_if_changed()
+        path = path.lstrip("/")
+        rel = self._aliases.get(path)
+        if rel is not None:
+            return self._assets.get(rel), True
+        asset = self._assets.get(path)
+        return asset, bool(asset and HASHED_NAME.search(path))
+
+    def url_for(self, path: str) -> str:
+        """Fingerprinted URL for an asset, or the plain path if unknown."""
+        path = path.lstrip("/")
+        for alias, rel in self._aliases.items():
+            if rel == path:
+                return "/" + alias
+        return "/" + path
+
+    def respond(
+        self, path: str, headers: Mapping[str, str], fallback: Optional[str] = None
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """Build (status, headers, body) for a GET of `path`.
+
+        `fallback` (e.g. index.html) is served for unknown paths.
+        """
+        asset, immutable = self.get(path) if path else (None, False)
+        if asset is None and fallback is not None:
+            asset, immutable = self.get(fallback)
+        if asset is None:
+            return 404, {"Content-Type": "text/plain; charset=utf-8"}, b"Not Found"
+
+        response_headers = {
+            "ETag": asset.etag,
+            "Cache-Control": IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+        }
+        if asset.gzip is not None or asset.br is not None:
+            response_headers["Vary"] = "Accept-Encoding"
+        if self._etag_matches(headers.get("If-None-Match"), asset.etag):
+            return 304, response_headers, b""
+
+        body, encoding = asset.variant(headers.get("Accept-Encoding", ""))
+        response_headers["Content-Type"] = asset.content_type
+        response_headers["Content-Length"] = str(len(body))
+        if encoding:
+            response_headers["Content-Encoding"] = encoding
+        return 200, response_headers, body
+
+    @staticmethod
+    def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return etag in tags
+
+    def _build(self, rel: str, body: bytes, mtime_ns: int) -> StaticAsset:
+        content_type = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in (
+            "application/javascript",
+            "application/json",
+        ):
+            content_type += "; charset=utf-8"
+        asset = StaticAsset(
+            path=rel,
+            content_type=content_type,
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            mtime_ns=mtime_ns,
+        )
+        if len(body) >= MIN_COMPRESS_SIZE and content_type.startswith(
+            COMPRESSIBLE_TYPES
+        ):
+            compressed = gzip.compress(body, self.compress_level, mtime=0)
+            if len(compressed) < len(body):
+                asset.gzip = compressed
+            if brotli is not None:
+                compressed = brotli.compress(body)
+                if len(compressed) < len(body):
+                    asset.br = compressed
+        return asset
+
+    def _rewrite_html(self, asset: StaticAsset, by_url: Dict[str, str]) -> StaticAsset:
+        try:
+            html = asset.body.decode("utf-8")
+        except UnicodeDecodeError:
+            return asset
+        rewritten = HTML_REFERENCE.sub(
+            lambda m: m.group("attr") + by_url.get(m.group("url"), m.group("url")),
+            html,
+        )
+        if rewritten == html:
+            return asset
+        return self._build(asset.path, rewritten.encode("utf-8"), asset.mtime_ns)
+
+    def _reload_if_changed(self) -> None:
+        self._checked = time.monotonic()
+        seen = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                rel = os.path.relpath(full, self.root).replace(os.sep, "/")
+                asset = self._assets.get(rel)
+                seen += 1
+                try:
+                    if asset is None or os.stat(full).st_mtime_ns != asset.mtime_ns:
+                        self.load()
+                        return
+                except OSError:
+                    self.load()
+                    return
+        if seen != len(self._assets):
+            self.load()
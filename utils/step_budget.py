@@ -0,0 +1,324 @@
+"""
+Adaptive step budgets and early termination for agent runs.
+
+A fixed `max_steps` is wrong both ways: too small and tasks fail, too large
+and a looping agent burns tokens until the cap. `control_steps` wraps an
+upstream agent so that each run gets a budget derived from the kind of task
+(keyword classification of the prompt) and the step counts earlier runs of
+that kind needed, and so that stalls end the run early. A stall is the same
+tool call repeated, steps that change nothing (identical observations), or
+oscillation between a few calls. The first stall gets a re-plan nudge; the
+next one stops the run. Steps the controller saved against the static cap
+are reported in `budget_metrics`.
+"""
+import functools
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "workspace",
+    ".runs",
+    "step_history.json",
+)
+
+# Class -> (prompt keywords, default budget)
+TASK_CLASSES: Dict[str, Tuple[Sequence[str], int]] = {
+    "lookup": (("what is", "who is", "when did", "define", "translate"), 6),
+    "browse": (("http", "website", "browse", "search", "scrape", "news"), 15),
+    "code": (("code", "script", "function", "bug", "implement", "python"), 20),
+    "data": (("csv", "dataset", "chart", "plot", "analy", "excel"), 20),
+    "files": (("file", "folder", "directory", "rename", "report"), 12),
+}
+DEFAULT_CLASS = "general"
+DEFAULT_BUDGET = 12
+MIN_BUDGET = 3
+# Runs of a class needed before history overrides the default budget
+MIN_SAMPLES = 5
+HISTORY_LIMIT = 50
+
+REPLAN_PROMPT = (
+    "You appear to be stuck: {reason}. Do not repeat that. Reconsider the "
+    "plan, try a different approach, or call `terminate` if the task is done "
+    "or cannot be completed."
+)
+
+
+def classify_task(prompt: Optional[str]) -> str:
+    """Return the task class whose keywords best match `prompt`."""
+    text = (prompt or "").lower()
+    best, best_hits = DEFAULT_CLASS, 0
+    for name, (keywords, _) in TASK_CLASSES.items():
+        hits = sum(keyword in text for keyword in keywords)
+        if hits > best_hits:
+            best, best_hits = name, hits
+    return best
+
+
+class StepHistory:
+    """Recent step counts per task class, persisted as JSON."""
+
+    def __init__(self, path: Optional[str] = DEFAULT_HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._runs: Dict[str, List[Dict[str, Any]]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._runs = json.load(f)
+            except (OSError, ValueError):
+                self._runs = {}
+
+    def runs(self, task_class: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._runs.get(task_class, []))
+
+    def record(self, task_class: str, steps: int, outcome: str) -> None:
+        with self._lock:
+            runs = self._runs.setdefault(task_class, [])
+            runs.append({"steps": steps, "outcome": outcome})
+            del runs[:-HISTORY_LIMIT]
+            if self.path:
+                self._save()
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._runs, f)
+        os.replace(tmp, self.path)
+
+
+class StallDetector:
+    """Spots runs that stopped making progress from their recent steps."""
+
+    def __init__(self, window: int = 6, repeat_limit: int = 3, idle_limit: int = 3):
+        self.window = window
+        self.repeat_limit = repeat_limit
+        self.idle_limit = idle_limit
+        self._steps: Deque[Tuple[str, str]] = deque(maxlen=window)
+
+    def reset(self) -> None:
+        self._steps.clear()
+
+    def observe(self, calls: Sequence[str], state: str) -> Optional[str]:
+        """Record one step; return why the run looks stalled, if it does."""
+        signature = "\n".join(calls)
+        self._steps.append((signature, hashlib.sha1(state.encode()).hexdigest()))
+        signatures = [s for s, _ in self._steps]
+
+        repeats = signatures.count(signature)
+        if signature and repeats >= self.repeat_limit:
+            return f"the same tool call was made {repeats} times"
+        recent = list(self._steps)[-self.idle_limit :]
+        if len(recent) == self.idle_limit and len({h for _, h in recent}) == 1:
+            return f"the last {self.idle_limit} steps changed nothing"
+        for period in (2, 3):
+            tail = signatures[-2 * period :]
+            if (
+                len(tail) == 2 * period
+                and tail[:period] == tail[period:]
+                and len(set(tail[:period])) > 1
+            ):
+                return f"the agent is alternating between {period} tool calls"
+        return None
+
+
+@dataclass
+class BudgetMetrics:
+    runs: int = 0
+    steps_used: int = 0
+    steps_saved: int = 0
+    stopped_early: int = 0
+    replans: int = 0
+    budget_exhausted: int = 0
+    by_class: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def add(self, task_class: str, used: int, saved: int, outcome: str) -> None:
+        self.runs += 1
+        self.steps_used += used
+        self.steps_saved += saved
+        self.stopped_early += outcome == "stalled"
+        self.budget_exhausted += outcome == "budget"
+        counts = self.by_class.setdefault(
+            task_class, {"runs": 0, "steps_used": 0, "steps_saved": 0}
+        )
+        counts["runs"] += 1
+        counts["steps_used"] += used
+        counts["steps_saved"] += saved
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+budget_metrics = BudgetMetrics()
+
+
+class StepBudgetController:
+    """Allocates step budgets and decides when a run should stop."""
+
+    def __init__(
+        self,
+        history: Optional[StepHistory] = None,
+        max_replans: int = 1,
+        metrics: Optional[BudgetMetrics] = None,
+        detector_factory: Callable[[], StallDetector] = StallDetector,
+    ):
+        self.history = history if history is not None else StepHistory()
+        self.max_replans = max_replans
+        self.metrics = metrics if metrics is not None else budget_metrics
+        self.detector_factory = detector_factory
+
+    def budget_for(self, task_class: str, cap: int) -> int:
+        """Steps to allow a `task_class` run, never more than `cap`."""
+        default = TASK_CLASSES.get(task_class, ((), DEFAULT_BUDGET))[1]
+        runs = self.history.runs(task_class)
+        if len(runs) < MIN_SAMPLES:
+            budget = default
+        else:
+            steps = sorted(run["steps"] for run in runs)
+            p90 = steps[min(len(steps) - 1, math.ceil(0.9 * len(steps)) - 1)]
+            budget = math.ceil(p90 * 1.25) + 1
+            # Budgets that keep running out were too tight, not the tasks too long
+            exhausted = sum(run["outcome"] == "budget" for run in runs)
+            if exhausted > len(runs) // 5:
+                budget = math.ceil(budget * 1.5)
+        return max(MIN_BUDGET, min(cap, budget))
+
+    def finish(
+        self, task_class: str, used: int, cap: int, budget: int, outcome: str
+    ) -> int:
+        """Record a finished run and return the steps saved against `cap`."""
+        if outcome == "stalled":
+            saved = cap - used
+        elif outcome == "budget":
+            saved = cap - budget
+        else:
+            saved = 0
+        self.metrics.add(task_class, used, max(0, saved), outcome)
+        self.history.record(task_class, used, outcome)
+        return max(0, saved)
+
+
+def _call_signatures(agent: Any) -> List[str]:
+    calls = []
+    for call in getattr(agent, "tool_calls", None) or []:
+        function = getattr(call, "function", None)
+        calls.append(
+            f"{getattr(function, 'name', '')}({getattr(function, 'arguments', '')})"
+        )
+    return calls
+
+
+def _last_observations(agent: Any) -> str:
+    """Tool results of the latest step: the tool messages ending memory."""
+    messages = getattr(getattr(agent, "memory", None), "messages", [])
+    results = []
+    for message in reversed(messages):
+        if not str(getattr(message, "role", "")).lower().endswith("tool"):
+            break
+        results.append(str(getattr(message, "content", "") or ""))
+    return "\n".join(reversed(results))
+
+
+def _stop(agent: Any) -> None:
+    # AgentState is an Enum; reach FINISHED through the current value's type
+    agent.state = type(agent.state).FINISHED
+
+
+def control_steps(
+    agent: Any,
+    controller: Optional[StepBudgetController] = None,
+    state: Optional[Callable[[], str]] = None,
+) -> StepBudgetController:
+    """Give each run of an upstream agent an adaptive budget and stall checks.
+
+    `state` may return a fingerprint of the environment (e.g. a workspace
+    summary) that counts as progress; by default only tool observations do.
+    """
+    controller = controller or StepBudgetController()
+    cap = agent.max_steps
+    original_run = agent.run
+    original_step = agent.step
+    current: Dict[str, Any] = {}
+
+    @functools.wraps(original_run)
+    async def run(request: Optional[str] = None, *args, **kwargs):
+        task_class = classify_task(request)
+        budget = controller.budget_for(task_class, cap)
+        agent.max_steps = budget
+        current.update(
+            detector=controller.detector_factory(),
+            steps=0,
+            replans=0,
+            terminated=False,
+            outcome="finished",
+        )
+        try:
+            return await original_run(request, *args, **kwargs)
+        finally:
+            agent.max_steps = cap
+            used = current["steps"]
+            if (
+                current["outcome"] == "finished"
+                and not current["terminated"]
+                and used >= budget
+            ):
+                current["outcome"] = "budget"
+            saved = controller.finish(task_class, used, cap, budget, current["outcome"])
+            agent_name = getattr(agent, "name", "agent")
+            logger.info(
+                f"{agent_name}: {used}/{budget} steps ({task_class}, "
+                f"{current['outcome']}), {saved} saved against max_steps={cap}"
+            )
+
+    @functools.wraps(original_step)
+    async def step(*args, **kwargs):
+        result = await original_step(*args, **kwargs)
+        if not current:
+            return result
+        current["steps"] += 1
+        if getattr(agent.state, "name", agent.state) == "FINISHED":
+            current["terminated"] = True
+            return result
+        observation = _last_observations(agent)
+        if state is not None:
+            observation += "\n" + state()
+        reason = current["detector"].observe(_call_signatures(agent), observation)
+        if reason is None:
+            return result
+        if current["replans"] < controller.max_replans:
+            current["replans"] += 1
+            controller.metrics.replans += 1
+            current["detector"].reset()
+            agent.update_memory("user", REPLAN_PROMPT.format(reason=reason))
+            logger.warning(f"Stall detected ({reason}); asking for a new plan")
+        else:
+            current["outcome"] = "stalled"
+            _stop(agent)
+            logger.warning(f"Stall detected ({reason}); stopping the run early")
+        return result
+
+    # Instance attributes, so only this agent is affected
+    object.__setattr__(agent, "run", run)
+    object.__setattr__(agent, "step", step)
+    return controller
+
+
+def add_step_budget_arguments(parser: Any) -> None:
+    """Add --adaptive-steps to an entry point's argparse parser."""
+    parser.add_argument(
+        "--adaptive-steps",
+        action="store_true",
+        help="Budget steps per task type and stop stalled runs early",
+    )
@@ -0,0 +1,166 @@
+"""
+Concurrent dispatch for the tool calls of a single LLM turn.
+
+Tools are classified as pure (no dependency on or effect to local state, e.g.
+web search) or side-effecting (python_execute, str_replace_editor, bash, ...).
+Pure calls start immediately; side-effecting calls keep their relative order.
+Per-tool semaphores cap concurrency and results always come back in the
+order the model issued the calls.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, ClassVar, Dict, List, Optional, Sequence
+
+
+@dataclass(frozen=True)
+class ToolPolicy:
+    """How a tool may be scheduled relative to other calls in the same turn."""
+
+    pure: bool = False
+    max_concurrency: int = 1
+
+
+DEFAULT_TOOL_POLICIES: Dict[str, ToolPolicy] = {
+    "web_search": ToolPolicy(pure=True, max_concurrency=4),
+    "crawl4ai": ToolPolicy(pure=True, max_concurrency=4),
+    "create_chat_completion": ToolPolicy(pure=True, max_concurrency=4),
+    "python_execute": ToolPolicy(),
+    "str_replace_editor": ToolPolicy(),
+    "bash": ToolPolicy(),
+    "browser_use": ToolPolicy(),
+    "planning": ToolPolicy(),
+    "data_session": ToolPolicy(),
+    "workspace_index": ToolPolicy(),
+    "ask_human": ToolPolicy(),
+    "terminate": ToolPolicy(),
+}
+
+
+def tool_call_name(call: Any) -> str:
+    """Return the function name of an OpenAI-style tool call."""
+    function = getattr(call, "function", None)
+    if function is None and isinstance(call, dict):
+        function = call.get("function", {})
+    if isinstance(function, dict):
+        return function.get("name", "")
+    return getattr(function, "name", "") or ""
+
+
+class ToolCallDispatcher:
+    """Runs one turn's tool calls concurrently where that is safe."""
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, ToolPolicy]] = None,
+        default_policy: ToolPolicy = ToolPolicy(),
+    ):
+        self.policies = {**DEFAULT_TOOL_POLICIES, **(policies or {})}
+        self.default_policy = default_policy
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def policy(self, name: str) -> ToolPolicy:
+        return self.policies.get(name, self.default_policy)
+
+    async def dispatch(
+        self,
+        calls: Sequence[Any],
+        run: Callable[[Any], Awaitable[Any]],
+    ) -> List[Any]:
+        """Run `run(call)` for every call and return results in call order."""
+        if len(calls) <= 1:
+            return [await run(call) for call in calls]
+
+        previous_effect: Optional[asyncio.Task] = None
+        tasks: List[asyncio.Task] = []
+        for call in calls:
+            name = tool_call_name(call)
+            if self.policy(name).pure:
+                task = asyncio.ensure_future(self.run_limited(name, run, call))
+            else:
+                task = asyncio.ensure_future(
+                    self._after(previous_effect, name, run, call)
+                )
+                previous_effect = task
+            tasks.append(task)
+
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    async def _after(
+        self,
+        previous: Optional[asyncio.Task],
+        name: str,
+        run: Callable[[Any], Awaitable[Any]],
+        call: Any,
+    ) -> Any:
+        if previous is not None:
+            await asyncio.wait([previous])
+        return await self.run_limited(name, run, call)
+
+    async def run_limited(
+        self, name: str, run: Callable[[Any], Awaitable[Any]], call: Any
+    ) -> Any:
+        """Run `run(call)` under the per-tool concurrency limit."""
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, self.policy(name).max_concurrency))
+            self._semaphores[name] = semaphore
+        async with semaphore:
+            return await run(call)
+
+
+class ParallelToolCallMixin:
+    """
+    Replaces ToolCallAgent.act with a concurrent version.
+
+    Mix in ahead of the agent class, e.g. `class A2AManus(ParallelToolCallMixin,
+    Manus)`. Tool messages are added to memory in the order the model issued
+    the calls, exactly as the sequential implementation does.
+    """
+
+    tool_dispatcher: ClassVar[Optional[ToolCallDispatcher]] = None
+
+    async def act(self) -> str:
+        from app.logger import logger
+        from app.schema import Message, ToolChoice
+
+        if not self.tool_calls:
+            if self.tool_choices == ToolChoice.REQUIRED:
+                raise ValueError("Tool calls required but none provided")
+            return (
+                self.memory.messages[-1].content or "No content or commands to execute"
+            )
+
+        dispatcher = self.tool_dispatcher or ToolCallDispatcher()
+
+        async def run(command):
+            result = await self.execute_tool(command)
+            # execute_tool stores the image on the agent; read and clear it
+            # before yielding so concurrent calls cannot see each other's image.
+            image, self._current_base64_image = self._current_base64_image, None
+            return result, image
+
+        self._current_base64_image = None
+        outcomes = await dispatcher.dispatch(self.tool_calls, run)
+
+        results = []
+        for command, (result, image) in zip(self.tool_calls, outcomes):
+            if self.max_observe:
+                result = result[: self.max_observe]
+            logger.info(
+                f"🎯 Tool '{command.function.name}' completed its mission! Result: {result}"
+            )
+            self.memory.add_message(
+                Message.tool_message(
+                    content=result,
+                    tool_call_id=command.id,
+                    name=command.function.name,
+                    base64_image=image,
+                )
+            )
+            results.append(result)
+        return "\n\n".join(results)
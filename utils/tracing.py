@@ -0,0 +1,429 @@
+"""
+Span instrumentation for the agent, LLM, tool, sandbox and file-transfer paths.
+
+Tracing is off unless OPENMANUS_TRACE is set (or `tracer.enable()` is
+called); while off, `tracer.span()` returns a shared no-op object, so the
+cost on the hot path is one attribute check. Finished spans feed in-memory
+latency histograms (served by the /api/metrics endpoints) and are exported
+as OTLP/JSON, either appended to a local file or POSTed to a collector.
+"""
+import atexit
+import contextvars
+import functools
+import importlib
+import inspect
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+TRACE_ENV = "OPENMANUS_TRACE"
+TRACE_FILE_ENV = "OPENMANUS_TRACE_FILE"
+TRACE_ENDPOINT_ENV = "OPENMANUS_TRACE_ENDPOINT"
+
+# Histogram bucket upper bounds in milliseconds.
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "openmanus_current_span", default=None
+)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """A timed operation; usable as a sync or async context manager."""
+
+    __slots__ = (
+        "tracer",
+        "name",
+        "attributes",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_ns",
+        "end_ns",
+        "error",
+        "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        parent = _current_span.get()
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.parent_id = parent.span_id if parent else None
+        self.span_id = secrets.token_hex(8)
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.time_ns()
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.tracer._finish(self)
+        return False
+
+    async def __aenter__(self) -> "Span":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        return self.__exit__(exc_type, exc, tb)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class Histogram:
+    """Fixed-bucket latency histogram."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.min_ms = float("inf")
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def observe(self, value_ms: float, error: bool = False) -> None:
+        self.count += 1
+        self.errors += int(error)
+        self.total_ms += value_ms
+        self.min_ms = min(self.min_ms, value_ms)
+        self.max_ms = max(self.max_ms, value_ms)
+        self.buckets[bisect_left(BUCKETS_MS, value_ms)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound containing the q-th observation."""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS + (self.max_ms,), self.buckets):
+            seen += count
+            if seen >= target and count:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "min_ms": self.min_ms if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": {
+                **{f"le_{b}": c for b, c in zip(BUCKETS_MS, self.buckets)},
+                "le_inf": self.buckets[-1],
+            },
+        }
+
+
+class OTLPExporter:
+    """Batches finished spans on a background thread as OTLP/JSON.
+
+    Writes one `ExportTraceServiceRequest` per line to `path` and/or POSTs it
+    to `endpoint` (e.g. http://localhost:4318/v1/traces).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        service_name: str = "openmanus",
+        batch_size: int = 256,
+        flush_interval: float = 2.0,
+    ):
+        self.path = path
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=10000)
+        self._thread = threading.Thread(
+            target=self._run, name="otlp-exporter", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass  # drop rather than block the traced code
+
+    def shutdown(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch: List[Span] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    span = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if span is None:
+                    stop = True
+                    break
+                batch.append(span)
+            self._flush(batch)
+
+    def _flush(self, spans: List[Span]) -> None:
+        if not spans:
+            return
+        payload = json.dumps(self.encode(spans), default=str)
+        try:
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(payload + "\n")
+            if self.endpoint:
+                import urllib.request
+
+                request = urllib.request.Request(
+                    self.endpoint,
+                    data=payload.encode(),
+                    headers={"Content-Type": "application/json"},
+                )
+                urllib.request.urlopen(request, timeout=5).close()
+        except Exception as e:
+            logger.debug(f"Span export failed: {e}")
+
+    def encode(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [_attr("service.name", self.service_name)]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "openmanus.tracing"},
+                            "spans": [_encode_span(s) for s in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+
+def _attr(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _encode_span(span: Span) -> Dict[str, Any]:
+    encoded = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [_attr(k, v) for k, v in span.attributes.items()],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        encoded["parentSpanId"] = span.parent_id
+    return encoded
+
+
+class Tracer:
+    """Creates spans and aggregates their durations by span name."""
+
+    def __init__(self):
+        self.enabled = False
+        self.exporter: Optional[OTLPExporter] = None
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def enable(
+        self, path: Optional[str] = None, endpoint: Optional[str] = None
+    ) -> None:
+        if path or endpoint:
+            self.exporter = OTLPExporter(path=path, endpoint=endpoint)
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+        if self.exporter is not None:
+            self.exporter.shutdown()
+            self.exporter = None
+
+    def span(self, name: str, **attributes: Any):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = {name: h.to_dict() for name, h in self._histograms.items()}
+        return {"enabled": self.enabled, "spans": spans}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            histogram = self._histograms.get(span.name)
+            if histogram is None:
+                histogram = self._histograms[span.name] = Histogram()
+            histogram.observe(span.duration_ms, span.error is not None)
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+
+tracer = Tracer()
+
+
+def traced(name: str, attributes: Optional[Callable[..., Dict[str, Any]]] = None):
+    """Decorator wrapping a sync or async callable in a span.
+
+    `attributes(*args, **kwargs)` may return extra span attributes.
+    """
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return await func(*args, **kwargs)
+                attrs = attributes(*args, **kwargs) if attributes else {}
+                with tracer.span(name, **attrs):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            attrs = attributes(*args, **kwargs) if attributes else {}
+            with tracer.span(name, **attrs):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _patch(owner: Any, method: str, name: str, attributes=None) -> None:
+    func = getattr(owner, method, None)
+    if func is None or getattr(func, "_openmanus_traced", False):
+        return
+    wrapped = traced(name, attributes)(func)
+    wrapped._openmanus_traced = True
+    setattr(owner, method, wrapped)
+
+
+def _agent_attrs(agent, *args, **kwargs) -> Dict[str, Any]:
+    return {"agent": agent.name, "step": agent.current_step}
+
+
+def _llm_attrs(llm, *args, **kwargs) -> Dict[str, Any]:
+    return {"model": llm.model}
+
+
+def _tool_attrs(tools, *args, name: str = "", **kwargs) -> Dict[str, Any]:
+    return {"tool": name}
+
+
+# (module, class, method, span name, attribute extractor)
+APP_TARGETS = (
+    # BaseAgent.step is abstract; ReActAgent.step is what concrete agents run
+    ("app.agent.react", "ReActAgent", "step", "agent.step", _agent_attrs),
+    ("app.llm", "LLM", "ask", "llm.call", _llm_attrs),
+    ("app.llm", "LLM", "ask_tool", "llm.call", _llm_attrs),
+    ("app.tool.tool_collection", "ToolCollection", "execute", "tool.call", _tool_attrs),
+    (
+        "app.sandbox.client",
+        "LocalSandboxClient",
+        "run_command",
+        "sandbox.command",
+        None,
+    ),
+    ("app.sandbox.client", "LocalSandboxClient", "copy_from", "file.transfer", None),
+    ("app.sandbox.client", "LocalSandboxClient", "copy_to", "file.transfer", None),
+)
+
+
+def instrument_app() -> None:
+    """Wrap the agent, LLM, tool and sandbox hot paths of the app package."""
+    for module_name, class_name, method, span_name, attributes in APP_TARGETS:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        owner = getattr(module, class_name, None)
+        if owner is not None:
+            _patch(owner, method, span_name, attributes)
+
+
+def configure_tracing() -> bool:
+    """Enable tracing from the environment; returns whether it is on."""
+    if tracer.enabled:
+        return True
+    if os.environ.get(TRACE_ENV, "").lower() not in ("1", "true", "yes", "on"):
+        return False
+    tracer.enable(
+        path=os.environ.get(TRACE_FILE_ENV, "traces.otlp.jsonl"),
+        endpoint=os.environ.get(TRACE_ENDPOINT_ENV),
+    )
+    instrument_app()
+    return True
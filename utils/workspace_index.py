@@ -0,0 +1,644 @@
+"""
+In-memory index of the agent workspace with incremental change tracking.
+
+Agents otherwise re-discover the workspace with `ls`, `find` and `cat`
+after every step. `WorkspaceIndex` keeps a tree of every file with its
+size, mtime, content hash and line count, answers list/search/grep from
+it, and records each change with a generation number. `mark_step(n)` ties
+the current generation to an agent step, so `changes_since(n)` and
+`summary_since(n)` give a compact "what changed since step N" diff.
+
+The index is kept current by inotify on Linux (via libc, no extra
+dependency) and by periodic rescans elsewhere; a rescan only hashes files
+whose size or mtime changed.
+
+With `--workspace-index`, `enable_workspace_index` gives an agent the
+`workspace_index` tool and adds the files each step changed to its memory.
+"""
+import ctypes
+import ctypes.util
+import fnmatch
+import functools
+import hashlib
+import os
+import re
+import select
+import struct
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+DEFAULT_WORKSPACE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "workspace"
+)
+DEFAULT_IGNORE = (".git", "__pycache__", ".runs", "node_modules", ".venv", "*.pyc")
+MAX_HASH_BYTES = 64 * 1024 * 1024
+TEXT_CACHE_BYTES = 32 * 1024 * 1024
+MAX_GREP_FILE_BYTES = 4 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    path: str
+    size: int
+    mtime_ns: int
+    digest: Optional[str]
+    lines: Optional[int]
+
+    @property
+    def is_text(self) -> bool:
+        return self.lines is not None
+
+
+@dataclass(frozen=True)
+class Change:
+    generation: int
+    path: str
+    kind: str  # "added", "modified" or "deleted"
+
+
+def _describe(full_path: str, size: int) -> Tuple[Optional[str], Optional[int]]:
+    """Content hash and line count; line count is None for binary files."""
+    if size > MAX_HASH_BYTES:
+        return None, None
+    digest = hashlib.blake2b(digest_size=16)
+    lines = 0
+    binary = False
+    last = b""
+    with open(full_path, "rb") as f:
+        for block in iter(functools.partial(f.read, 1024 * 1024), b""):
+            digest.update(block)
+            if not binary:
+                binary = b"\0" in block
+                lines += block.count(b"\n")
+            last = block
+    if size and not binary and not last.endswith(b"\n"):
+        lines += 1
+    return digest.hexdigest(), None if binary else lines
+
+
+class WorkspaceIndex:
+    """File tree of `root` kept up to date by a watcher thread."""
+
+    def __init__(
+        self,
+        root: str = DEFAULT_WORKSPACE,
+        ignore: Iterable[str] = DEFAULT_IGNORE,
+        poll_interval: float = 2.0,
+    ):
+        self.root = os.path.abspath(root)
+        self.ignore = tuple(ignore)
+        self.poll_interval = poll_interval
+        self.generation = 0
+        self._entries: Dict[str, FileEntry] = {}
+        self._changes: List[Change] = []
+        self._steps: Dict[int, int] = {}
+        self._text_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._text_cache_size = 0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._watcher: Optional["_Inotify"] = None
+
+    # Maintenance
+
+    def _ignored(self, name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.ignore)
+
+    def _relative(self, full_path: str) -> str:
+        return os.path.relpath(full_path, self.root).replace(os.sep, "/")
+
+    def _walk(self) -> Iterable[str]:
+        for dirpath, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if not self._ignored(d)]
+            for name in files:
+                if not self._ignored(name):
+                    yield self._relative(os.path.join(dirpath, name))
+
+    def _update(self, path: str, changes: List[Change]) -> None:
+        """Re-stat one path and record what happened to it."""
+        full_path = os.path.join(self.root, path)
+        old = self._entries.get(path)
+        try:
+            st = os.stat(full_path)
+            if not os.path.isfile(full_path):
+                raise FileNotFoundError(full_path)
+        except OSError:
+            if old is not None:
+                del self._entries[path]
+                changes.append(Change(self.generation + 1, path, "deleted"))
+            return
+        if old is not None and (old.size, old.mtime_ns) == (st.st_size, st.st_mtime_ns):
+            return
+        try:
+            digest, lines = _describe(full_path, st.st_size)
+        except OSError:
+            return
+        self._entries[path] = FileEntry(path, st.st_size, st.st_mtime_ns, digest, lines)
+        if old is None:
+            changes.append(Change(self.generation + 1, path, "added"))
+        elif old.digest != digest or digest is None:
+            changes.append(Change(self.generation + 1, path, "modified"))
+
+    def _commit(self, changes: List[Change]) -> List[Change]:
+        if changes:
+            self.generation += 1
+            self._changes.extend(changes)
+        return changes
+
+    def scan(self) -> List[Change]:
+        """Full rescan; cheap for files whose size and mtime are unchanged."""
+        with self._lock:
+            changes: List[Change] = []
+            seen = set(self._walk()) if os.path.isdir(self.root) else set()
+            for path in sorted(seen | set(self._entries)):
+                self._update(path, changes)
+            return self._commit(changes)
+
+    def refresh(self, paths: Iterable[str]) -> List[Change]:
+        """Re-check specific files or directories (relative to the root)."""
+        with self._lock:
+            changes: List[Change] = []
+            targets: Set[str] = set()
+            for path in paths:
+                path = path.strip("/")
+                full_path = os.path.join(self.root, path)
+                prefix = path + "/" if path else ""
+                if os.path.isdir(full_path):
+                    for dirpath, dirs, files in os.walk(full_path):
+                        dirs[:] = [d for d in dirs if not self._ignored(d)]
+                        targets.update(
+                            self._relative(os.path.join(dirpath, name))
+                            for name in files
+                            if not self._ignored(name)
+                        )
+                targets.update(p for p in self._entries if p.startswith(prefix))
+                if path and not self._ignored(os.path.basename(path)):
+                    targets.add(path)
+            for path in sorted(targets):
+                self._update(path, changes)
+            return self._commit(changes)
+
+    # Watching
+
+    def start(self) -> "WorkspaceIndex":
+        """Index the workspace and keep it current in a background thread."""
+        os.makedirs(self.root, exist_ok=True)
+        self.scan()
+        if self._thread is None:
+            self._stop.clear()
+            try:
+                self._watcher = _Inotify(self.root, self._ignored)
+                target = self._watch_inotify
+            except OSError:
+                self._watcher = None
+                target = self._watch_polling
+            self._thread = threading.Thread(
+                target=target, name="workspace-index", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+
+    @property
+    def watching(self) -> str:
+        if self._thread is None:
+            return "off"
+        return "inotify" if self._watcher is not None else "polling"
+
+    def _watch_polling(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            self.scan()
+
+    def _watch_inotify(self) -> None:
+        while not self._stop.is_set():
+            if self._watcher.wait(0.2):
+                self._drain()
+
+    def _drain(self) -> None:
+        # Read and apply under the lock so wait_until_current never sees
+        # events that were read but not yet applied
+        with self._lock:
+            paths, overflow = self._watcher.read()
+            if overflow:
+                self.scan()
+            elif paths:
+                self.refresh(self._relative(p) for p in paths)
+
+    def wait_until_current(self) -> None:
+        """Catch up with changes the watcher has not processed yet."""
+        if self._watcher is not None:
+            self._drain()
+        else:
+            self.scan()
+
+    # Queries
+
+    def get(self, path: str) -> Optional[FileEntry]:
+        return self._entries.get(path.strip("/"))
+
+    def list(self, directory: str = "", recursive: bool = False) -> List[FileEntry]:
+        """Files under `directory`; direct children only unless `recursive`."""
+        prefix = directory.strip("/")
+        prefix = prefix + "/" if prefix else ""
+        with self._lock:
+            entries = [
+                entry
+                for path, entry in self._entries.items()
+                if path.startswith(prefix)
+                and (recursive or "/" not in path[len(prefix) :])
+            ]
+        return sorted(entries, key=lambda e: e.path)
+
+    def directories(self, directory: str = "") -> List[str]:
+        """Immediate subdirectories of `directory` that contain files."""
+        prefix = directory.strip("/")
+        prefix = prefix + "/" if prefix else ""
+        with self._lock:
+            return sorted(
+                {
+                    path[len(prefix) :].split("/", 1)[0]
+                    for path in self._entries
+                    if path.startswith(prefix) and "/" in path[len(prefix) :]
+                }
+            )
+
+    def search(self, pattern: str, limit: int = 200) -> List[FileEntry]:
+        """Files whose path matches a glob, or contains `pattern` otherwise."""
+        glob = any(c in pattern for c in "*?[")
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda e: e.path)
+        matches = [
+            entry
+            for entry in entries
+            if (
+                fnmatch.fnmatch(entry.path, pattern)
+                or fnmatch.fnmatch(os.path.basename(entry.path), pattern)
+                if glob
+                else pattern.lower() in entry.path.lower()
+            )
+        ]
+        return matches[:limit]
+
+    def grep(
+        self,
+        pattern: str,
+        path_glob: Optional[str] = None,
+        ignore_case: bool = False,
+        limit: int = 200,
+    ) -> List[Tuple[str, int, str]]:
+        """(path, line number, line) for text files matching a regex."""
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda e: e.path)
+        results = []
+        for entry in entries:
+            if not entry.is_text or entry.size > MAX_GREP_FILE_BYTES:
+                continue
+            if path_glob and not fnmatch.fnmatch(entry.path, path_glob):
+                continue
+            text = self._text(entry)
+            if text is None or not regex.search(text):
+                continue
+            for number, line in enumerate(text.splitlines(), 1):
+                if regex.search(line):
+                    results.append((entry.path, number, line))
+                    if len(results) >= limit:
+                        return results
+        return results
+
+    def _text(self, entry: FileEntry) -> Optional[str]:
+        key = (entry.path, entry.digest)
+        with self._lock:
+            text = self._text_cache.get(key)
+            if text is not None:
+                self._text_cache.move_to_end(key)
+                return text
+        try:
+            with open(os.path.join(self.root, entry.path), "rb") as f:
+                text = f.read().decode("utf-8", errors="replace")
+        except OSError:
+            return None
+        with self._lock:
+            self._text_cache[key] = text
+            self._text_cache_size += len(text)
+            while self._text_cache_size > TEXT_CACHE_BYTES and self._text_cache:
+                _, old = self._text_cache.popitem(last=False)
+                self._text_cache_size -= len(old)
+        return text
+
+    # Step tracking
+
+    def mark_step(self, step: int) -> None:
+        """Remember the index generation at the end of agent step `step`."""
+        with self._lock:
+            self._steps[step] = self.generation
+
+    def changes_since(self, step: Optional[int] = None) -> Dict[str, List[str]]:
+        """Net added/modified/deleted files since step `step` (all if None)."""
+        with self._lock:
+            since = self._steps.get(step, 0) if step is not None else 0
+        return self.changes_after(since)
+
+    def changes_after(self, since: int) -> Dict[str, List[str]]:
+        """Net added/modified/deleted files after index generation `since`."""
+        with self._lock:
+            state: Dict[str, str] = {}
+            for change in self._changes:
+                if change.generation <= since:
+                    continue
+                previous = state.get(change.path)
+                if previous == "added" and change.kind == "deleted":
+                    del state[change.path]
+                elif previous == "added":
+                    continue
+                elif previous == "deleted" and change.kind == "added":
+                    state[change.path] = "modified"
+                else:
+                    state[change.path] = change.kind
+        diff: Dict[str, List[str]] = {"added": [], "modified": [], "deleted": []}
+        for path, kind in sorted(state.items()):
+            diff[kind].append(path)
+        return diff
+
+    def summary_since(self, step: Optional[int] = None, limit: int = 50) -> str:
+        """The diff as a few lines of text for an agent prompt."""
+        label = f"step {step}" if step is not None else "start"
+        return self.format_changes(self.changes_since(step), label, limit)
+
+    def format_changes(
+        self, diff: Dict[str, List[str]], label: str, limit: int = 50
+    ) -> str:
+        lines = []
+        for kind, paths in diff.items():
+            if not paths:
+                continue
+            shown = []
+            for path in paths[:limit]:
+                entry = self._entries.get(path)
+                if entry is not None and entry.lines is not None:
+                    shown.append(f"{path} ({entry.lines} lines)")
+                elif entry is not None:
+                    shown.append(f"{path} ({entry.size} bytes)")
+                else:
+                    shown.append(path)
+            more = f" and {len(paths) - limit} more" if len(paths) > limit else ""
+            lines.append(f"{kind}: {', '.join(shown)}{more}")
+        if not lines:
+            return f"No workspace changes since {label}."
+        return f"Workspace changes since {label}:\n" + "\n".join(lines)
+
+
+def track_agent_steps(agent: Any, index: WorkspaceIndex, report: bool = False) -> None:
+    """Mark the index after each step of an upstream ToolCallAgent.
+
+    With `report`, the files a step changed are added to the agent's memory
+    after the step, so the next LLM call sees them without running `ls`.
+    """
+    original = agent.step
+
+    @functools.wraps(original)
+    async def step(*args, **kwargs):
+        index.wait_until_current()
+        before = index.generation
+        try:
+            return await original(*args, **kwargs)
+        finally:
+            index.wait_until_current()
+            number = getattr(agent, "current_step", 0)
+            index.mark_step(number)
+            diff = index.changes_after(before)
+            if report and any(diff.values()):
+                agent.update_memory(
+                    "user", index.format_changes(diff, f"the start of step {number}")
+                )
+
+    # Instance attribute, so only this agent is affected
+    object.__setattr__(agent, "step", step)
+
+
+class WorkspaceIndexTool:
+    """Agent tool over a WorkspaceIndex; follows the app BaseTool interface."""
+
+    name = "workspace_index"
+    description = (
+        "Query the indexed workspace instead of running ls/find/cat/grep: list "
+        "a directory, search file paths (substring or glob), grep file contents "
+        "with a regex, or show which files changed since an earlier step."
+    )
+    parameters = {
+        "type": "object",
+        "properties": {
+            "command": {
+                "type": "string",
+                "enum": ["list", "search", "grep", "changes"],
+            },
+            "path": {
+                "type": "string",
+                "description": "Directory to list (list) or path glob (grep)",
+            },
+            "pattern": {
+                "type": "string",
+                "description": "Path substring/glob (search) or regex (grep)",
+            },
+            "recursive": {"type": "boolean"},
+            "ignore_case": {"type": "boolean"},
+            "since_step": {
+                "type": "integer",
+                "description": "Step to diff against (changes); omit for all",
+            },
+            "limit": {"type": "integer"},
+        },
+        "required": ["command"],
+    }
+
+    def __init__(self, index: Optional[WorkspaceIndex] = None):
+        self.index = index or get_workspace_index()
+
+    def to_param(self) -> Dict[str, Any]:
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": self.parameters,
+            },
+        }
+
+    async def __call__(self, **kwargs) -> str:
+        return await self.execute(**kwargs)
+
+    async def execute(self, command: str, **kwargs) -> str:
+        try:
+            return self.run(command, **kwargs)
+        except (re.error, ValueError) as e:
+            return f"Error: {e}"
+
+    def run(
+        self,
+        command: str,
+        path: str = "",
+        pattern: str = "",
+        recursive: bool = False,
+        ignore_case: bool = False,
+        since_step: Optional[int] = None,
+        limit: int = 200,
+    ) -> str:
+        index = self.index
+        index.wait_until_current()
+        if command == "list":
+            dirs = [f"{d}/" for d in index.directories(path)]
+            files = [_entry_line(e) for e in index.list(path, recursive)]
+            return "\n".join(dirs + files[:limit]) or "(empty)"
+        if command == "search":
+            if not pattern:
+                raise ValueError("search needs a pattern")
+            matches = index.search(pattern, limit)
+            return "\n".join(_entry_line(e) for e in matches) or "No matching files."
+        if command == "grep":
+            if not pattern:
+                raise ValueError("grep needs a pattern")
+            hits = index.grep(pattern, path or None, ignore_case, limit)
+            return "\n".join(f"{p}:{n}: {line}" for p, n, line in hits) or "No matches."
+        if command == "changes":
+            return index.summary_since(since_step)
+        raise ValueError(f"Unknown command: {command}")
+
+
+def _entry_line(entry: FileEntry) -> str:
+    if entry.lines is not None:
+        return f"{entry.path} ({entry.lines} lines)"
+    return f"{entry.path} ({entry.size} bytes)"
+
+
+def enable_workspace_index(agent: Any, index: Optional[WorkspaceIndex] = None) -> None:
+    """Give an upstream agent the workspace_index tool and per-step change notes."""
+    index = index or get_workspace_index()
+    agent.available_tools.add_tool(WorkspaceIndexTool(index))
+    track_agent_steps(agent, index, report=True)
+
+
+def add_workspace_arguments(parser: Any) -> None:
+    """Add --workspace-index to an entry point's argparse parser."""
+    parser.add_argument(
+        "--workspace-index",
+        action="store_true",
+        help="Give agents an indexed view of the workspace and per-step changes",
+    )
+
+
+class _Inotify:
+    """Recursive inotify watch through libc."""
+
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = (
+        IN_MODIFY
+        | IN_ATTRIB
+        | IN_CLOSE_WRITE
+        | IN_MOVED_FROM
+        | IN_MOVED_TO
+        | IN_CREATE
+        | IN_DELETE
+        | IN_DELETE_SELF
+    )
+    HEADER = struct.Struct("iIII")
+
+    def __init__(self, root: str, ignored):
+        name = ctypes.util.find_library("c")
+        if not hasattr(select, "poll") or name is None:
+            raise OSError("inotify is not available")
+        self._libc = ctypes.CDLL(name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._ignored = ignored
+        self._dirs: Dict[int, str] = {}
+        self._poll = select.poll()
+        self._poll.register(self._fd, select.POLLIN)
+        self._add_tree(root)
+
+    def _add(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.MASK)
+        if wd >= 0:
+            self._dirs[wd] = path
+
+    def _add_tree(self, root: str) -> None:
+        self._add(root)
+        for dirpath, dirs, _ in os.walk(root):
+            dirs[:] = [d for d in dirs if not self._ignored(d)]
+            for d in dirs:
+                self._add(os.path.join(dirpath, d))
+
+    def wait(self, timeout: float) -> bool:
+        return bool(self._poll.poll(int(timeout * 1000)))
+
+    def read(self) -> Tuple[Set[str], bool]:
+        """Changed paths of all queued events, and whether events were lost
+        (the caller should rescan)."""
+        paths: Set[str] = set()
+        overflow = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self.HEADER.unpack_from(data, offset)
+                offset += self.HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None:
+                    continue
+                if mask & self.IN_DELETE_SELF:
+                    self._dirs.pop(wd, None)
+                path = os.path.join(directory, os.fsdecode(name)) if name else directory
+                if name and self._ignored(os.fsdecode(name)):
+                    continue
+                if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self._add_tree(path)
+                paths.add(path)
+        return paths, overflow
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+_workspace_index: Optional[WorkspaceIndex] = None
+
+
+def get_workspace_index() -> WorkspaceIndex:
+    """Shared, started index of the project workspace."""
+    global _workspace_index
+    if _workspace_index is None:
+        _workspace_index = WorkspaceIndex().start()
+    return _workspace_index
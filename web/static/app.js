@@ -3,6 +3,16 @@ class OpenManusApp {
     constructor() {
         this.currentMode = 'agent';
         this.chatHistory = [];
+        this.sessionId = this.getSessionId();
+        this.historyCursor = null;
+        this.historyExhausted = false;
+        this.loadingHistory = false;
+        // Virtual list state: only messages near the viewport are in the DOM
+        this.estimatedMessageHeight = 80;
+        this.overscanPx = 600;
+        this.messageOffsets = null;
+        this.renderScheduled = false;
+        this.streamController = null;
         this.agentLogs = '';
         this.isLoading = false;
         this.autoRefreshInterval = null;
@@ -12,7 +22,9 @@ class OpenManusApp {
     }
 
     init() {
+        this.setupChatHistoryView();
         this.bindEvents();
+        this.loadChatHistory();
         this.loadAgentLogs();
         this.showMode('agent');
         this.startAutoRefresh();
@@ -50,12 +62,27 @@ class OpenManusApp {
             this.clearChat();
         });
 
+        document.getElementById('chat-history').addEventListener('scroll', () => {
+            this.scheduleRender();
+            if (this.chatHistoryElement.scrollTop < this.overscanPx) {
+                this.loadChatHistory();
+            }
+        });
+
+        window.addEventListener('resize', () => {
+            this.chatHistory.forEach(item => { item.height = null; });
+            this.messageOffsets = null;
+            this.scheduleRender();
+        });
+
         // Chat textarea events
         const textarea = document.getElementById('chat-textarea');
         textarea.addEventListener('keydown', (e) => {
             if (e.key === 'Enter' && !e.shiftKey) {
                 e.preventDefault();
-                this.sendMessage();
+                if (!this.isLoading) {
+                    this.sendMessage();
+                }
             }
         });
 
@@ -95,6 +122,8 @@ class OpenManusApp {
             this.resumeAutoRefresh();
         } else {
             this.pauseAutoRefresh();
+            // Messages loaded while the section was hidden could not be measured
+            this.scrollChatToBottom();
         }
     }
 
@@ -221,14 +250,20 @@ class OpenManusApp {
         const sendBtn = document.getElementById('send-button');
         const message = textarea.value.trim();
 
-        if (!message || this.isLoading) {
+        // While a reply is streaming the send button stops it
+        if (this.isLoading) {
+            this.cancelStream();
+            return;
+        }
+
+        if (!message) {
             return;
         }
 
+        let loadingId = null;
         try {
             this.isLoading = true;
-            sendBtn.disabled = true;
-            sendBtn.textContent = 'Sending...';
+            sendBtn.textContent = 'Stop';
 
             // Add user message to history
             this.addMessageToHistory('user', message);
@@ -236,62 +271,221 @@ class OpenManusApp {
             this.autoResizeTextarea(textarea);
 
             // Add loading message for agent
-            const loadingId = this.addMessageToHistory('agent', 'Thinking...');
+            loadingId = this.addMessageToHistory('agent', 'Thinking...');
+
+            const data = await this.streamChat(message, loadingId);
+
+            // Show error notification if there was an error in the response
+            if (data.error) {
+                this.showNotification('Agent responded with an error', 'warning');
+            }
 
-            const response = await this.fetchWithTimeout('/api/chat', {
+        } catch (error) {
+            if (error.name === 'AbortError') {
+                this.showNotification('Response stopped', 'info');
+            } else {
+                console.error('Error sending message:', error);
+                const errorMessage = this.getErrorMessage(error);
+                this.updateMessageInHistory(loadingId, `Error: ${errorMessage}`);
+                this.showNotification(`Error sending message: ${errorMessage}`, 'error');
+            }
+        } finally {
+            this.isLoading = false;
+            this.streamController = null;
+            sendBtn.disabled = false;
+            sendBtn.textContent = 'Send';
+            textarea.focus();
+        }
+    }
+
+    // POST the message and render the Server-Sent Events reply as it arrives
+    async streamChat(message, messageId, idleTimeout = 30000) {
+        const controller = new AbortController();
+        this.streamController = controller;
+        let timedOut = false;
+        let idleTimer = null;
+        const resetIdleTimer = () => {
+            clearTimeout(idleTimer);
+            idleTimer = setTimeout(() => {
+                timedOut = true;
+                controller.abort();
+            }, idleTimeout);
+        };
+
+        resetIdleTimer();
+        try {
+            const response = await fetch('/api/chat', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
+                    'Accept': 'text/event-stream',
                 },
-                body: JSON.stringify({ input: message })
-            }, 30000);
+                body: JSON.stringify({ input: message, session_id: this.sessionId }),
+                signal: controller.signal
+            });
 
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
 
-            const data = await response.json();
-            
-            // Update the loading message with the actual response
-            const agentResponse = data.output || 'No response received';
-            this.updateMessageInHistory(loadingId, agentResponse);
+            const contentType = response.headers.get('Content-Type') || '';
+            if (!response.body || !contentType.includes('text/event-stream')) {
+                const data = await response.json();
+                this.updateMessageInHistory(messageId, data.output || 'No response received');
+                return data;
+            }
 
-            // Show error notification if there was an error in the response
-            if (data.error) {
-                this.showNotification('Agent responded with an error', 'warning');
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let text = '';
+            let result = { output: '', error: false };
+
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) {
+                    break;
+                }
+                resetIdleTimer();
+                buffer += decoder.decode(value, { stream: true });
+
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const frame = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    const event = this.parseSseFrame(frame);
+                    if (!event) {
+                        continue;
+                    }
+                    if (event.type === 'token') {
+                        text += event.data;
+                        this.updateMessageInHistory(messageId, text);
+                    } else if (event.type === 'step') {
+                        this.updateMessageInHistory(messageId, text || `Working: ${event.data.status || 'step'}...`);
+                    } else if (event.type === 'error') {
+                        result.error = true;
+                        text = text || event.data.message;
+                        this.updateMessageInHistory(messageId, text);
+                    } else if (event.type === 'done') {
+                        result.output = event.data.output;
+                    }
+                }
             }
 
+            result.output = result.output || text;
+            this.updateMessageInHistory(messageId, result.output || 'No response received');
+            return result;
         } catch (error) {
-            console.error('Error sending message:', error);
-            const errorMessage = this.getErrorMessage(error);
-            this.updateMessageInHistory(loadingId, `Error: ${errorMessage}`);
-            this.showNotification(`Error sending message: ${errorMessage}`, 'error');
+            if (timedOut) {
+                throw new Error('Request timed out');
+            }
+            throw error;
         } finally {
-            this.isLoading = false;
-            sendBtn.disabled = false;
-            sendBtn.textContent = 'Send';
-            textarea.focus();
+            clearTimeout(idleTimer);
         }
     }
 
-    addMessageToHistory(sender, message) {
+    parseSseFrame(frame) {
+        let type = 'message';
+        const dataLines = [];
+        frame.split('\n').forEach(line => {
+            if (line.startsWith('event:')) {
+                type = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                dataLines.push(line.slice(5).replace(/^ /, ''));
+            }
+        });
+        // Comment-only frames are keep-alives
+        if (dataLines.length === 0) {
+            return null;
+        }
+        return { type, data: JSON.parse(dataLines.join('\n')) };
+    }
+
+    cancelStream() {
+        if (this.streamController) {
+            // Closing the connection makes the server cancel the reply
+            this.streamController.abort();
+        }
+    }
+
+    getSessionId() {
+        let sessionId = localStorage.getItem('openmanus-session-id');
+        if (!sessionId) {
+            sessionId = window.crypto && crypto.randomUUID
+                ? crypto.randomUUID()
+                : `session-${Date.now()}-${Math.random().toString(36).substr(2, 9)}`;
+            localStorage.setItem('openmanus-session-id', sessionId);
+        }
+        return sessionId;
+    }
+
+    setupChatHistoryView() {
         const historyElement = document.getElementById('chat-history');
-        const messageId = `msg-${Date.now()}-${Math.random().toString(36).substr(2, 9)}`;
-        
-        const messageElement = document.createElement('div');
-        messageElement.className = 'chat-entry';
-        messageElement.innerHTML = `
-            <div class="${sender}" id="${messageId}">${this.escapeHtml(message)}</div>
+        historyElement.innerHTML = `
+            <div class="chat-spacer chat-spacer-top"></div>
+            <div class="chat-window"></div>
+            <div class="chat-spacer chat-spacer-bottom"></div>
         `;
-        
-        historyElement.appendChild(messageElement);
-        
-        // Auto-scroll to bottom
-        historyElement.scrollTop = historyElement.scrollHeight;
-        
-        // Store in chat history
-        this.chatHistory.push({ sender, message, id: messageId });
-        
+        this.chatHistoryElement = historyElement;
+        this.chatTopSpacer = historyElement.querySelector('.chat-spacer-top');
+        this.chatWindow = historyElement.querySelector('.chat-window');
+        this.chatBottomSpacer = historyElement.querySelector('.chat-spacer-bottom');
+    }
+
+    // Load one page of older messages from the server and prepend it
+    async loadChatHistory() {
+        if (this.loadingHistory || this.historyExhausted) {
+            return;
+        }
+        this.loadingHistory = true;
+        try {
+            const params = new URLSearchParams({ session_id: this.sessionId, limit: '50' });
+            if (this.historyCursor !== null) {
+                params.set('before', this.historyCursor);
+            }
+            const response = await this.fetchWithTimeout(`/api/chat/history?${params}`, {}, 10000);
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const data = await response.json();
+            const older = data.messages.map(msg => ({
+                id: `msg-${msg.id}`,
+                serverId: msg.id,
+                sender: msg.role,
+                message: msg.content,
+                height: null
+            }));
+            this.historyCursor = data.next_cursor;
+            this.historyExhausted = data.next_cursor === null;
+
+            // Keep the viewport anchored on the messages the user was reading
+            const wasEmpty = this.chatHistory.length === 0;
+            const previousHeight = this.totalHistoryHeight();
+            this.chatHistory = older.concat(this.chatHistory);
+            this.messageOffsets = null;
+            const added = this.totalHistoryHeight() - previousHeight;
+            this.renderVisibleMessages();
+            if (wasEmpty) {
+                this.scrollChatToBottom();
+            } else {
+                this.chatHistoryElement.scrollTop += added;
+            }
+        } catch (error) {
+            console.error('Error loading chat history:', error);
+        } finally {
+            this.loadingHistory = false;
+        }
+    }
+
+    addMessageToHistory(sender, message) {
+        const messageId = `msg-${Date.now()}-${Math.random().toString(36).substr(2, 9)}`;
+
+        // Store in chat history and render the tail of the list
+        this.chatHistory.push({ sender, message, id: messageId, height: null, isNew: true });
+        this.messageOffsets = null;
+        this.scrollChatToBottom();
+
         return messageId;
     }
 
@@ -300,21 +494,133 @@ class OpenManusApp {
         if (messageElement) {
             messageElement.textContent = newMessage;
         }
-        
+
         // Update in chat history array
         const historyItem = this.chatHistory.find(item => item.id === messageId);
         if (historyItem) {
             historyItem.message = newMessage;
+            historyItem.height = null;
+            this.messageOffsets = null;
+            // Follow a growing reply only if the user has not scrolled away
+            const historyElement = this.chatHistoryElement;
+            const atBottom = historyElement.scrollHeight - historyElement.scrollTop - historyElement.clientHeight < 40;
+            if (atBottom) {
+                this.scrollChatToBottom();
+            } else {
+                this.scheduleRender();
+            }
         }
     }
 
-    clearChat() {
-        const historyElement = document.getElementById('chat-history');
-        historyElement.innerHTML = '';
+    async clearChat() {
+        try {
+            const params = new URLSearchParams({ session_id: this.sessionId });
+            await this.fetchWithTimeout(`/api/chat/history?${params}`, { method: 'DELETE' }, 10000);
+        } catch (error) {
+            console.error('Error clearing chat history:', error);
+        }
         this.chatHistory = [];
+        this.historyCursor = null;
+        this.historyExhausted = true;
+        this.messageOffsets = null;
+        this.renderVisibleMessages();
         this.showNotification('Chat cleared', 'success');
     }
 
+    // Virtual rendering of the chat history
+    computeMessageOffsets() {
+        if (!this.messageOffsets) {
+            const offsets = new Array(this.chatHistory.length + 1);
+            offsets[0] = 0;
+            this.chatHistory.forEach((item, i) => {
+                offsets[i + 1] = offsets[i] + (item.height || this.estimatedMessageHeight);
+            });
+            this.messageOffsets = offsets;
+        }
+        return this.messageOffsets;
+    }
+
+    totalHistoryHeight() {
+        const offsets = this.computeMessageOffsets();
+        return offsets[offsets.length - 1];
+    }
+
+    findMessageIndex(offset) {
+        // Binary search for the message containing the given pixel offset
+        const offsets = this.computeMessageOffsets();
+        let low = 0;
+        let high = this.chatHistory.length;
+        while (low < high) {
+            const mid = (low + high) >> 1;
+            if (offsets[mid + 1] <= offset) {
+                low = mid + 1;
+            } else {
+                high = mid;
+            }
+        }
+        return low;
+    }
+
+    scheduleRender() {
+        if (this.renderScheduled) {
+            return;
+        }
+        this.renderScheduled = true;
+        requestAnimationFrame(() => {
+            this.renderScheduled = false;
+            this.renderVisibleMessages();
+        });
+    }
+
+    renderVisibleMessages() {
+        const historyElement = this.chatHistoryElement;
+        const viewTop = historyElement.scrollTop - this.overscanPx;
+        const viewBottom = historyElement.scrollTop + historyElement.clientHeight + this.overscanPx;
+        const start = this.findMessageIndex(Math.max(0, viewTop));
+        const end = Math.min(this.chatHistory.length, this.findMessageIndex(viewBottom) + 1);
+
+        const fragment = document.createDocumentFragment();
+        for (let i = start; i < end; i++) {
+            const item = this.chatHistory[i];
+            const messageElement = document.createElement('div');
+            messageElement.className = item.isNew ? 'chat-entry chat-entry-new' : 'chat-entry';
+            messageElement.dataset.index = i;
+            messageElement.innerHTML = `
+                <div class="${item.sender}" id="${item.id}">${this.escapeHtml(item.message)}</div>
+            `;
+            item.isNew = false;
+            fragment.appendChild(messageElement);
+        }
+        this.chatWindow.replaceChildren(fragment);
+
+        // Measure what was rendered so later offsets are exact
+        let changed = false;
+        this.chatWindow.querySelectorAll('.chat-entry').forEach(element => {
+            const item = this.chatHistory[Number(element.dataset.index)];
+            const height = element.offsetHeight;
+            if (height && item.height !== height) {
+                item.height = height;
+                changed = true;
+            }
+        });
+        if (changed) {
+            this.messageOffsets = null;
+        }
+
+        const offsets = this.computeMessageOffsets();
+        this.chatTopSpacer.style.height = `${offsets[start]}px`;
+        this.chatBottomSpacer.style.height = `${offsets[offsets.length - 1] - offsets[end]}px`;
+    }
+
+    scrollChatToBottom() {
+        const historyElement = this.chatHistoryElement;
+        historyElement.scrollTop = this.totalHistoryHeight();
+        this.renderVisibleMessages();
+        // Heights measured during the first pass may have moved the bottom
+        historyElement.scrollTop = historyElement.scrollHeight;
+        this.renderVisibleMessages();
+    }
+
     // Auto-refresh functionality
     startAutoRefresh() {
         if (this.autoRefreshInterval) {